@@ -0,0 +1,182 @@
+import os, struct, time, unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from modules import util
+from PIL import Image
+
+logger = util.logger
+
+image_extensions = (".jpg", ".png", ".jpeg")
+settle_time = 2000000000
+jpeg_sof_markers = [0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF]
+
+def normalize(name):
+    return unicodedata.normalize("NFC", os.path.normcase(name))
+
+def image_dimensions(path):
+    with open(path, "rb") as handle:
+        head = handle.read(24)
+        try:
+            if head[:8] == b"\x89PNG\r\n\x1a\n" and head[12:16] == b"IHDR":
+                return struct.unpack(">II", head[16:24])
+            if head[:2] == b"\xff\xd8":
+                handle.seek(2)
+                while True:
+                    marker = handle.read(2)
+                    while len(marker) == 2 and marker[0] == 0xFF and marker[1] == 0xFF:
+                        marker = marker[1:] + handle.read(1)
+                    if len(marker) < 2 or marker[0] != 0xFF:
+                        break
+                    if marker[1] == 0x01 or 0xD0 <= marker[1] <= 0xD8:
+                        continue
+                    length = struct.unpack(">H", handle.read(2))[0]
+                    if marker[1] in jpeg_sof_markers:
+                        _h, _w = struct.unpack(">xHH", handle.read(5))
+                        return _w, _h
+                    handle.seek(length - 2, 1)
+        except struct.error:
+            pass
+    with Image.open(path) as image:
+        return image.size
+
+class AssetIndex:
+    def __init__(self, depth, cache=None, probe=False, threads=1):
+        self.depth = depth
+        self.cache = cache
+        self.probe = probe
+        self.threads = threads
+        self.listings = None
+        self.folders = {}
+        self.files = {}
+        self.dimensions = {}
+        self.probing = {}
+        self.scanned = 0
+        self.revalidated = 0
+
+    def _listing(self, directory):
+        if self.listings is None:
+            self.listings = self.cache.query_asset_listings() if self.cache else {}
+        try:
+            mtime = os.stat(directory).st_mtime_ns
+        except OSError:
+            return None, []
+        if directory in self.listings:
+            cached_mtime, cached_entries, scanned = self.listings[directory]
+            if cached_mtime == mtime and scanned and scanned - mtime > settle_time:
+                self.revalidated += 1
+                return mtime, cached_entries
+        scanned = time.time_ns()
+        entries = []
+        try:
+            with os.scandir(directory) as scan:
+                for entry in scan:
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        is_dir = False
+                    entries.append((entry.name, is_dir))
+        except OSError:
+            return None, []
+        self.scanned += 1
+        self.listings[directory] = (mtime, entries, scanned)
+        if self.cache:
+            self.cache.update_asset_listing(directory, mtime, entries, scanned)
+        return mtime, entries
+
+    def _index_folders(self, asset_directory):
+        folders = {}
+        level = [asset_directory]
+        for depth in range(self.depth + 1):
+            next_level = []
+            for parent in level:
+                for name, is_dir in self._listing(parent)[1]:
+                    if not is_dir:
+                        continue
+                    path = os.path.join(parent, name)
+                    key = normalize(name)
+                    if key not in folders:
+                        folders[key] = path if depth == 0 else os.path.abspath(path)
+                    if not name.startswith("."):
+                        next_level.append(path)
+            level = next_level
+        return folders
+
+    def find_folder(self, asset_directory, folder_name):
+        if asset_directory not in self.folders:
+            self.folders[asset_directory] = self._index_folders(asset_directory)
+            if self.probe:
+                self._probe_folders(self.folders[asset_directory].values())
+        return self.folders[asset_directory].get(normalize(folder_name))
+
+    def add_folder(self, asset_directory, folder_name, path):
+        if asset_directory in self.folders:
+            self.folders[asset_directory][normalize(folder_name)] = path
+
+    def _index_files(self, directory):
+        mtime, entries = self._listing(directory)
+        if mtime is None:
+            return [], {}
+        if directory in self.files and self.files[directory][0] == mtime:
+            return self.files[directory][1], self.files[directory][2]
+        paths = []
+        stems = {}
+        for name, _ in entries:
+            if name.startswith("."):
+                continue
+            path = os.path.join(directory, name)
+            if "." in name:
+                paths.append(path)
+            key = normalize(name)
+            for i in range(1, len(key)):
+                if key[i] == ".":
+                    if key[:i] not in stems:
+                        stems[key[:i]] = []
+                    stems[key[:i]].append(path)
+        self.files[directory] = (mtime, paths, stems)
+        return paths, stems
+
+    def find_files(self, directory, stem):
+        _, stems = self._index_files(directory)
+        return stems.get(normalize(stem), [])
+
+    def list_files(self, directory):
+        paths, _ = self._index_files(directory)
+        return paths
+
+    def invalidate(self, directory):
+        if directory in self.files:
+            del self.files[directory]
+        if self.listings and directory in self.listings:
+            del self.listings[directory]
+
+    def _image_key(self, path):
+        stat = os.stat(path)
+        return path, stat.st_size, stat.st_mtime_ns
+
+    def _probe(self, path):
+        return self._image_key(path), image_dimensions(path)
+
+    def _probe_folders(self, folders):
+        paths = []
+        for folder in folders:
+            files, stems = self._index_files(folder)
+            if "poster" in stems and "background" in stems:
+                continue
+            paths.extend([f for f in files if f.lower().endswith(image_extensions) and f not in self.probing])
+        if paths:
+            executor = ThreadPoolExecutor(max_workers=self.threads)
+            for path in paths:
+                self.probing[path] = executor.submit(self._probe, path)
+            executor.shutdown(wait=False)
+
+    def image_size(self, path):
+        key = self._image_key(path)
+        if key not in self.dimensions:
+            if path in self.probing:
+                try:
+                    probed_key, dimensions = self.probing.pop(path).result()
+                    self.dimensions[probed_key] = dimensions
+                except OSError:
+                    pass
+            if key not in self.dimensions:
+                self.dimensions[key] = image_dimensions(path)
+        return self.dimensions[key]
@@ -100,6 +100,11 @@ tmdb_filters = [
     "original_language", "origin_country", "tmdb_vote_count", "tmdb_year", "tmdb_keyword", "tmdb_genre",
     "first_episode_aired", "last_episode_aired", "last_episode_aired_or_never", "tmdb_status", "tmdb_type", "tmdb_title"
 ]
+pushdown_tag_filters = ["actor", "collection", "content_rating", "country", "director", "genre", "label", "network", "producer", "writer"]
+pushdown_filters = [f"{f}{m}" for f in pushdown_tag_filters for m in ["", ".not"]] + \
+                   [f"year{m}" for m in [".gt", ".gte", ".lt", ".lte"]] + \
+                   [f"{f}{m}" for f in ["critic_rating", "audience_rating", "user_rating"] for m in [".gt", ".gte"]] + \
+                   [f"{f}{m}" for f in ["added", "release"] for m in ["", ".before", ".after"]]
 string_filters = [
     "title", "summary", "studio", "edition", "record_label", "folder", "filepath", "audio_track_title", "tmdb_title",
     "audio_codec", "audio_profile", "video_codec", "video_profile"
@@ -371,8 +376,10 @@ class CollectionBuilder:
         self.added_to_sonarr = []
         self.builders = []
         self.filters = []
+        self.filter_plans = None
         self.has_tmdb_filters = False
         self.found_items = []
+        self.found_keys = set()
         self.filtered_items = []
         self.filtered_keys = {}
         self.run_again_movies = []
@@ -1759,11 +1766,17 @@ class CollectionBuilder:
             logger.info("")
             logger.info("Filtering Builders:")
         filtered_items = []
+        if self.filters and not self.details["only_filter_missing"]:
+            prefetch = {}
+            for item in items:
+                if self.needs_reload(item) and item.ratingKey not in self.found_keys and item.ratingKey not in self.filtered_keys and item.ratingKey not in prefetch:
+                    prefetch[item.ratingKey] = item
+            self.library.reload_many(list(prefetch.values()))
         for i, item in enumerate(items, 1):
             if not isinstance(item, (Movie, Show, Season, Episode, Artist, Album, Track)):
                 logger.error(f"{self.Type} Error: Item: {item} is an invalid type")
                 continue
-            if item not in self.found_items:
+            if item.ratingKey not in self.found_keys:
                 if item.ratingKey in self.filtered_keys:
                     if self.details["show_filtered"] is True:
                         logger.info(f"{name} {self.Type} | X | {self.filtered_keys[item.ratingKey]}")
@@ -1771,6 +1784,7 @@ class CollectionBuilder:
                     current_title = util.item_title(item)
                     if self.check_filters(item, f"{(' ' * (max_length - len(str(i))))}{i}/{total}"):
                         self.found_items.append(item)
+                        self.found_keys.add(item.ratingKey)
                     else:
                         filtered_items.append(item)
                         self.filtered_keys[item.ratingKey] = current_title
@@ -2144,7 +2158,7 @@ class CollectionBuilder:
         key = int(item)
         if key in self.library.cached_items:
             cached_item, full_obj = self.library.cached_items[key]
-            return cached_item
+            return self.library.materialize(cached_item)
         try:
             current = self.library.fetchItem(key)
             if not isinstance(current, (Movie, Show, Season, Episode, Artist, Album, Track)):
@@ -2159,29 +2173,35 @@ class CollectionBuilder:
         logger.separator(f"Adding to {self.name} {self.Type}", space=False, border=False)
         logger.info("")
         name, collection_items = self.library.get_collection_name_and_items(self.obj if self.obj else self.name, self.smart_label_collection)
+        collection_keys = set(item.ratingKey for item in collection_items)
+        pending_removals = len([r for _, r in self.remove_item_map.items() if r is not None])
         total = self.limit if self.limit and len(self.found_items) > self.limit else len(self.found_items)
         spacing = len(str(total)) * 2 + 1
         amount_added = 0
         amount_unchanged = 0
         items_added = []
         for i, item in enumerate(self.found_items, 1):
-            if self.limit and amount_added + self.beginning_count - len([r for _, r in self.remove_item_map.items() if r is not None]) >= self.limit:
+            if self.limit and amount_added + self.beginning_count - pending_removals >= self.limit:
                 logger.info(f"{self.Type} Limit reached")
                 self.found_items = self.found_items[:i - 1]
+                self.found_keys = set(found.ratingKey for found in self.found_items)
                 break
-            current_operation = "=" if item in collection_items else "+"
+            in_collection = item.ratingKey in collection_keys
+            current_operation = "=" if in_collection else "+"
             number_text = f"{i}/{total}"
             logger.info(f"{number_text:>{spacing}} | {name} {self.Type} | {current_operation} | {util.item_title(item)}")
-            if item in collection_items:
+            if in_collection:
+                if self.remove_item_map.get(item.ratingKey) is not None:
+                    pending_removals -= 1
                 self.remove_item_map[item.ratingKey] = None
                 amount_unchanged += 1
             else:
                 items_added.append(item)
-                if not self.playlist:
-                    self.library.alter_collection(item, name, smart_label_collection=self.smart_label_collection)
                 amount_added += 1
                 if self.details["changes_webhooks"]:
                     self.notification_additions.append(util.item_set(item, self.library.get_id_from_maps(item.ratingKey)))
+        if not self.playlist and items_added:
+            self.library.alter_collection_many(items_added, name, smart_label_collection=self.smart_label_collection)
         if self.playlist and items_added and not self.obj:
             self.obj = self.library.create_playlist(self.name, items_added)
             logger.info("")
@@ -2210,11 +2230,11 @@ class CollectionBuilder:
                 number_text = f"{i}/{total}"
                 logger.info(f"{number_text:>{spacing}} | {self.name} {self.Type} | - | {util.item_title(item)}")
                 items_removed.append(item)
-                if not self.playlist:
-                    self.library.alter_collection(item, self.name, smart_label_collection=self.smart_label_collection, add=False)
                 amount_removed += 1
                 if self.details["changes_webhooks"]:
                     self.notification_removals.append(util.item_set(item, self.library.get_id_from_maps(item.ratingKey)))
+            if not self.playlist and items_removed:
+                self.library.alter_collection_many(items_removed, self.name, smart_label_collection=self.smart_label_collection, add=False)
             if self.playlist and items_removed:
                 self.obj.reload()
                 self.obj.removeItems(items_removed)
@@ -2259,16 +2279,59 @@ class CollectionBuilder:
                     final_return = True
         return final_return
 
+    def plan_filters(self):
+        if self.filter_plans is not None:
+            return self.filter_plans
+        self.filter_plans = []
+        item_classes = {item_type: item_class for item_class, item_type in plex.filter_item_types}
+        for filter_list in self.filters:
+            tmdb_f = [(k, v) for k, v in filter_list if k in tmdb_filters]
+            plex_f = [(k, v) for k, v in filter_list if k not in tmdb_filters]
+            server = None
+            server_f = [(k, v) for k, v in plex_f if self.library.split(k)[2] in pushdown_filters]
+            if server_f and not self.playlist and self.builder_level in ["movie", "show", "artist"]:
+                search_all = {}
+                search_any = []
+                for k, v in server_f:
+                    attr, modifier, final = self.library.split(k)
+                    if attr in pushdown_tag_filters and modifier == "":
+                        search_any.append({final: v})
+                    else:
+                        search_all[final] = v
+                if search_any:
+                    search_all["any"] = search_any
+                try:
+                    _, _, uri_args = self.build_filter("plex_search", {"all": search_all})
+                    server = (item_classes[self.builder_level], self.library.get_filter_keys(uri_args), self.library.compile_filters(server_f, self.current_time))
+                    plex_f = [(k, v) for k, v in plex_f if (k, v) not in server_f]
+                    logger.debug(f"Filters {', '.join([k for k, _ in server_f])} matched {len(server[1])} {self.builder_level.capitalize()}s in Plex")
+                except Failed as e:
+                    logger.debug(f"Filter Push Down Error: {e}")
+            self.filter_plans.append((tmdb_f, server, self.library.compile_filters(plex_f, self.current_time)))
+        return self.filter_plans
+
+    def needs_reload(self, item):
+        if not isinstance(item, (Movie, Show, Season, Episode, Artist, Album, Track)):
+            return False
+        for _, server, plex_plan in self.plan_filters():
+            if server and isinstance(item, server[0]) and item.ratingKey not in server[1]:
+                continue
+            if plex_plan or (server and not isinstance(item, server[0])):
+                return True
+        return False
+
     def check_filters(self, item, display):
         final_return = True
         if self.filters and not self.details["only_filter_missing"]:
             logger.ghost(f"Filtering {display} {item.title}")
-            item = self.library.reload(item)
             final_return = False
             tmdb_item = None
-            for filter_list in self.filters:
-                tmdb_f = [(k, v) for k, v in filter_list if k in tmdb_filters]
-                plex_f = [(k, v) for k, v in filter_list if k not in tmdb_filters]
+            for tmdb_f, server, plex_plan in self.plan_filters():
+                if server and isinstance(item, server[0]):
+                    if item.ratingKey not in server[1]:
+                        continue
+                elif server:
+                    plex_plan = server[2] + plex_plan
                 or_result = True
                 if tmdb_f:
                     if not tmdb_item and isinstance(item, (Movie, Show)):
@@ -2285,7 +2348,7 @@ class CollectionBuilder:
                                 or_result = False
                     if not tmdb_item or self.check_tmdb_filters(tmdb_item, tmdb_f, item.ratingKey in self.library.movie_rating_key_map) is False:
                         or_result = False
-                if plex_f and self.library.check_filters(item, plex_f, self.current_time) is False:
+                if plex_plan and self.library.check_filters(item, plex_plan) is False:
                     or_result = False
                 if or_result:
                     final_return = True
@@ -2424,70 +2487,74 @@ class CollectionBuilder:
         remove_genres = self.item_details["item_genre.remove"] if "item_genre.remove" in self.item_details else None
         sync_genres = self.item_details["item_genre.sync"] if "item_genre.sync" in self.item_details else None
 
-        if "non_item_remove_label" in self.item_details:
-            rk_compare = [item.ratingKey for item in self.items]
-            for non_item in self.library.search(label=self.item_details["non_item_remove_label"], libtype=self.builder_level):
-                if non_item.ratingKey not in rk_compare:
-                    self.library.edit_tags("label", non_item, remove_tags=self.item_details["non_item_remove_label"])
-
-        tmdb_paths = []
-        tvdb_paths = []
-        for item in self.items:
-            current_labels = [la.tag for la in self.library.item_labels(item)]
-            if "item_assets" in self.item_details and self.library.asset_directory and "Overlay" not in current_labels:
-                self.library.find_and_upload_assets(item, current_labels)
-            self.library.edit_tags("label", item, add_tags=add_tags, remove_tags=remove_tags, sync_tags=sync_tags)
-            self.library.edit_tags("genre", item, add_tags=add_genres, remove_tags=remove_genres, sync_tags=sync_genres)
-            if "item_edition" in self.item_details and item.editionTitle != self.item_details["item_edition"]:
-                self.library.query_data(item.editEditionTitle, self.item_details["item_edition"])
-                logger.info(f"{item.title[:25]:<25} | Edition | {self.item_details['item_edition']}")
-            path = os.path.dirname(str(item.locations[0])) if self.library.is_movie else str(item.locations[0])
-            if self.library.Radarr and item.ratingKey in self.library.movie_rating_key_map:
-                path = path.replace(self.library.Radarr.plex_path, self.library.Radarr.radarr_path)
-                path = path[:-1] if path.endswith(('/', '\\')) else path
-                tmdb_paths.append((self.library.movie_rating_key_map[item.ratingKey], path))
-            if self.library.Sonarr and item.ratingKey in self.library.show_rating_key_map:
-                path = path.replace(self.library.Sonarr.plex_path, self.library.Sonarr.sonarr_path)
-                path = path[:-1] if path.endswith(('/', '\\')) else path
-                tvdb_paths.append((self.library.show_rating_key_map[item.ratingKey], path))
-            if any([mn in plex.item_advance_keys for mn in self.item_details]) and hasattr(item, "preferences"):
-                advance_edits = {}
-                prefs = [p.id for p in item.preferences()]
-                for method_name, method_data in self.item_details.items():
-                    if method_name in plex.item_advance_keys:
-                        key, options = plex.item_advance_keys[method_name]
-                        if key in prefs and getattr(item, key) != options[method_data]:
-                            advance_edits[key] = options[method_data]
-                if advance_edits:
-                    logger.debug(f"Details Update: {advance_edits}")
-                    if self.library.edit_advance(item, advance_edits):
-                        logger.info(f"{item.title} Advanced Details Update Successful")
-                    else:
-                        logger.error(f"{item.title} Advanced Details Update Failed")
+        with self.library.batch_tag_edits():
+            if "non_item_remove_label" in self.item_details:
+                rk_compare = [item.ratingKey for item in self.items]
+                for non_item in self.library.search(label=self.item_details["non_item_remove_label"], libtype=self.builder_level):
+                    if non_item.ratingKey not in rk_compare:
+                        self.library.edit_tags("label", non_item, remove_tags=self.item_details["non_item_remove_label"])
+
+            tmdb_paths = []
+            tvdb_paths = []
+            queue_uploads = not any([d in self.item_details for d in ["item_lock_background", "item_lock_poster", "item_refresh"]])
+            self.library.reload_many(self.items)
+            for item in self.items:
+                current_labels = [la.tag for la in self.library.item_labels(item)]
+                if "item_assets" in self.item_details and self.library.asset_directory and "Overlay" not in current_labels:
+                    self.library.find_and_upload_assets(item, current_labels, queue=queue_uploads)
+                self.library.edit_tags("label", item, add_tags=add_tags, remove_tags=remove_tags, sync_tags=sync_tags)
+                self.library.edit_tags("genre", item, add_tags=add_genres, remove_tags=remove_genres, sync_tags=sync_genres)
+                if "item_edition" in self.item_details and item.editionTitle != self.item_details["item_edition"]:
+                    self.library.query_data(item.editEditionTitle, self.item_details["item_edition"])
+                    logger.info(f"{item.title[:25]:<25} | Edition | {self.item_details['item_edition']}")
+                path = os.path.dirname(str(item.locations[0])) if self.library.is_movie else str(item.locations[0])
+                if self.library.Radarr and item.ratingKey in self.library.movie_rating_key_map:
+                    path = path.replace(self.library.Radarr.plex_path, self.library.Radarr.radarr_path)
+                    path = path[:-1] if path.endswith(('/', '\\')) else path
+                    tmdb_paths.append((self.library.movie_rating_key_map[item.ratingKey], path))
+                if self.library.Sonarr and item.ratingKey in self.library.show_rating_key_map:
+                    path = path.replace(self.library.Sonarr.plex_path, self.library.Sonarr.sonarr_path)
+                    path = path[:-1] if path.endswith(('/', '\\')) else path
+                    tvdb_paths.append((self.library.show_rating_key_map[item.ratingKey], path))
+                if any([mn in plex.item_advance_keys for mn in self.item_details]) and hasattr(item, "preferences"):
+                    advance_edits = {}
+                    prefs = [p.id for p in item.preferences()]
+                    for method_name, method_data in self.item_details.items():
+                        if method_name in plex.item_advance_keys:
+                            key, options = plex.item_advance_keys[method_name]
+                            if key in prefs and getattr(item, key) != options[method_data]:
+                                advance_edits[key] = options[method_data]
+                    if advance_edits:
+                        logger.debug(f"Details Update: {advance_edits}")
+                        if self.library.edit_advance(item, advance_edits):
+                            logger.info(f"{item.title} Advanced Details Update Successful")
+                        else:
+                            logger.error(f"{item.title} Advanced Details Update Failed")
 
-            if "item_tmdb_season_titles" in self.item_details and item.ratingKey in self.library.show_rating_key_map:
-                try:
-                    tmdb_id = self.config.Convert.tvdb_to_tmdb(self.library.show_rating_key_map[item.ratingKey])
-                    names = {s.season_number: s.name for s in self.config.TMDb.get_show(tmdb_id).seasons}
-                    for season in self.library.query(item.seasons):
-                        if season.index in names and season.title != names[season.index]:
-                            season.editTitle(names[season.index])
-                except Failed as e:
-                    logger.error(e)
+                if "item_tmdb_season_titles" in self.item_details and item.ratingKey in self.library.show_rating_key_map:
+                    try:
+                        tmdb_id = self.config.Convert.tvdb_to_tmdb(self.library.show_rating_key_map[item.ratingKey])
+                        names = {s.season_number: s.name for s in self.config.TMDb.get_show(tmdb_id).seasons}
+                        for season in self.library.query(item.seasons):
+                            if season.index in names and season.title != names[season.index]:
+                                season.editTitle(names[season.index])
+                    except Failed as e:
+                        logger.error(e)
 
-            # Locking should come before refreshing since refreshing can change metadata (i.e. if specified to both lock
-            # background/poster and also refreshing, assume that the item background/poster should be kept)
-            if "item_lock_background" in self.item_details:
-                self.library.query(item.lockArt if self.item_details["item_lock_background"] else item.unlockArt)
-            if "item_lock_poster" in self.item_details:
-                self.library.query(item.lockPoster if self.item_details["item_lock_poster"] else item.unlockPoster)
-            if "item_lock_title" in self.item_details:
-                self.library.edit_query(item, {"title.locked": 1 if self.item_details["item_lock_title"] else 0})
-            if "item_refresh" in self.item_details:
-                delay = self.item_details["item_refresh_delay"] if "item_refresh_delay" in self.item_details else self.library.item_refresh_delay
-                if delay > 0:
-                    time.sleep(delay)
-                self.library.query(item.refresh)
+                # Locking should come before refreshing since refreshing can change metadata (i.e. if specified to both lock
+                # background/poster and also refreshing, assume that the item background/poster should be kept)
+                if "item_lock_background" in self.item_details:
+                    self.library.query(item.lockArt if self.item_details["item_lock_background"] else item.unlockArt)
+                if "item_lock_poster" in self.item_details:
+                    self.library.query(item.lockPoster if self.item_details["item_lock_poster"] else item.unlockPoster)
+                if "item_lock_title" in self.item_details:
+                    self.library.edit_query(item, {"title.locked": 1 if self.item_details["item_lock_title"] else 0})
+                if "item_refresh" in self.item_details:
+                    delay = self.item_details["item_refresh_delay"] if "item_refresh_delay" in self.item_details else self.library.item_refresh_delay
+                    if delay > 0:
+                        time.sleep(delay)
+                    self.library.query(item.refresh)
+            self.library.flush_uploads()
 
         if self.library.Radarr and tmdb_paths:
             if "item_radarr_tag" in self.item_details:
@@ -2697,9 +2764,14 @@ class CollectionBuilder:
                 plex_search["any"] = {"collection": self.name}
             search_data = self.build_filter("plex_search", plex_search)
             items = self.library.get_filter_items(search_data[2])
+        items = list(items)
+        target_keys = set(item.ratingKey for item in items)
+        items.extend([item for item in self.items if item.ratingKey not in target_keys])
+        positions = {item.ratingKey: i for i, item in enumerate(items)}
+        in_place = set(util.longest_increasing_subsequence([positions[item.ratingKey] for item in self.items if item.ratingKey in positions]))
         previous = None
         for i, item in enumerate(items, 0):
-            if len(self.items) <= i or item.ratingKey != self.items[i].ratingKey:
+            if i not in in_place:
                 text = f"after {util.item_title(previous)}" if previous else "to the beginning"
                 logger.info(f"Moving {util.item_title(item)} {text}")
                 self.library.moveItem(self.obj, item, previous)
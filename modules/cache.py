@@ -1,16 +1,69 @@
-import os, random, sqlite3
-from contextlib import closing
+import atexit, codecs, copy, gzip, inspect, json, os, random, re, sqlite3, threading, zlib
+from collections import OrderedDict
+from contextlib import closing, contextmanager
 from datetime import datetime, timedelta
+from functools import wraps
 from modules import util
+from modules.util import Failed
 
 logger = util.logger
 
+LIST_BLOB_VERSION = 1
+EXPORT_VERSION = 1
+shareable_tables = {
+    "guids_map": ["plex_guid"],
+    "imdb_to_tmdb_map": ["imdb_id"],
+    "imdb_to_tvdb_map2": ["imdb_id"],
+    "tmdb_to_tvdb_map2": ["tmdb_id"],
+    "letterboxd_map": ["letterboxd_id"],
+    "flixpatrol_map": ["flixpatrol_id"],
+    "omdb_data3": ["imdb_id"],
+    "mdb_data3": ["key_id"],
+    "anidb_data": ["anidb_id"],
+    "mal_data": ["mal_id"],
+    "tmdb_movie_data": ["tmdb_id"],
+    "tmdb_show_data": ["tmdb_id"],
+    "tvdb_data3": ["tvdb_id"],
+    "tvdb_map": ["tvdb_url"],
+    "anime_map": ["anidb"],
+    "imdb_parental": ["imdb_id"],
+    "ergast_race": ["season", "round"]
+}
+
+def lru_query(table, key_index=0, result_key=None):
+    def decorator(func):
+        signature = inspect.signature(func)
+        @wraps(func)
+        def wrapper(self, *args, **kwargs):
+            bound = signature.bind(self, *args, **kwargs)
+            bound.apply_defaults()
+            values = tuple(bound.arguments.values())[1:]
+            table_name = table(*values) if callable(table) else table
+            return self._lru_query(table_name, values[key_index], (func.__name__, values), lambda: func(self, *values), result_key=result_key)
+        return wrapper
+    return decorator
+
 class Cache:
-    def __init__(self, config_path, expiration):
+    def __init__(self, config_path, expiration, write_behind=False, write_behind_size=1000, transaction_size=500, lru_size=10000):
         self.cache_path = f"{os.path.splitext(config_path)[0]}.cache"
         self.expiration = expiration
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
+        self.write_behind = write_behind
+        self.write_behind_size = write_behind_size
+        self.transaction_size = transaction_size
+        self._local = threading.local()
+        self._write_lock = threading.RLock()
+        self._write_buffer = {}
+        self._pending_keys = {}
+        self._buffered = 0
+        self.lru_size = lru_size
+        self.lru_stats = {}
+        self._lru = OrderedDict()
+        self._lru_index = {}
+        self._lru_lock = threading.RLock()
+        self._asset_listings = None
+        if self.write_behind:
+            atexit.register(self.flush)
+        with self._connection() as connection:
             with closing(connection.cursor()) as cursor:
                 cursor.execute("SELECT count(name) FROM sqlite_master WHERE type='table' AND name='guid_map'")
                 if cursor.fetchone()[0] == 0:
@@ -36,7 +89,7 @@ class Cache:
                     t_id TEXT,
                     imdb_id TEXT,
                     media_type TEXT,
-                    expiration_date TEXT)"""
+                    expiration_date INTEGER)"""
                 )
                 cursor.execute(
                     """CREATE TABLE IF NOT EXISTS imdb_to_tmdb_map (
@@ -44,28 +97,28 @@ class Cache:
                     imdb_id TEXT UNIQUE,
                     tmdb_id TEXT,
                     media_type TEXT,
-                    expiration_date TEXT)"""
+                    expiration_date INTEGER)"""
                 )
                 cursor.execute(
                     """CREATE TABLE IF NOT EXISTS imdb_to_tvdb_map2 (
                     key INTEGER PRIMARY KEY,
                     imdb_id TEXT UNIQUE,
                     tvdb_id TEXT,
-                    expiration_date TEXT)"""
+                    expiration_date INTEGER)"""
                 )
                 cursor.execute(
                     """CREATE TABLE IF NOT EXISTS tmdb_to_tvdb_map2 (
                     key INTEGER PRIMARY KEY,
                     tmdb_id TEXT UNIQUE,
                     tvdb_id TEXT,
-                    expiration_date TEXT)"""
+                    expiration_date INTEGER)"""
                 )
                 cursor.execute(
                     """CREATE TABLE IF NOT EXISTS letterboxd_map (
                     key INTEGER PRIMARY KEY,
                     letterboxd_id TEXT UNIQUE,
                     tmdb_id TEXT,
-                    expiration_date TEXT)"""
+                    expiration_date INTEGER)"""
                 )
                 cursor.execute(
                     """CREATE TABLE IF NOT EXISTS flixpatrol_map (
@@ -73,7 +126,7 @@ class Cache:
                     flixpatrol_id TEXT UNIQUE,
                     tmdb_id TEXT,
                     media_type TEXT,
-                    expiration_date TEXT)"""
+                    expiration_date INTEGER)"""
                 )
                 cursor.execute(
                     """CREATE TABLE IF NOT EXISTS omdb_data3 (
@@ -91,7 +144,7 @@ class Cache:
                     series_id TEXT,
                     season_num INTEGER,
                     episode_num INTEGER,
-                    expiration_date TEXT)"""
+                    expiration_date INTEGER)"""
                 )
                 cursor.execute(
                     """CREATE TABLE IF NOT EXISTS mdb_data3 (
@@ -116,7 +169,7 @@ class Cache:
                     myanimelist_rating REAL,
                     commonsense TEXT,
                     certification TEXT,
-                    expiration_date TEXT)"""
+                    expiration_date INTEGER)"""
                 )
                 cursor.execute(
                     """CREATE TABLE IF NOT EXISTS anidb_data (
@@ -129,7 +182,7 @@ class Cache:
                     score REAL,
                     released TEXT,
                     tags TEXT,
-                    expiration_date TEXT)"""
+                    expiration_date INTEGER)"""
                 )
                 cursor.execute(
                     """CREATE TABLE IF NOT EXISTS mal_data (
@@ -146,7 +199,7 @@ class Cache:
                     rank INTEGER,
                     popularity TEXT,
                     genres TEXT,
-                    expiration_date TEXT)"""
+                    expiration_date INTEGER)"""
                 )
                 cursor.execute(
                     """CREATE TABLE IF NOT EXISTS tmdb_movie_data (
@@ -169,7 +222,7 @@ class Cache:
                     release_date TEXT,
                     collection_id INTEGER,
                     collection_name TEXT,
-                    expiration_date TEXT)"""
+                    expiration_date INTEGER)"""
                 )
                 cursor.execute(
                     """CREATE TABLE IF NOT EXISTS tmdb_show_data (
@@ -196,7 +249,7 @@ class Cache:
                     tvdb_id INTEGER,
                     countries TEXT,
                     seasons TEXT,
-                    expiration_date TEXT)"""
+                    expiration_date INTEGER)"""
                 )
                 cursor.execute(
                     """CREATE TABLE IF NOT EXISTS tvdb_data3 (
@@ -209,14 +262,14 @@ class Cache:
                     background_url TEXT,
                     release_date TEXT,
                     genres TEXT,
-                    expiration_date TEXT)"""
+                    expiration_date INTEGER)"""
                 )
                 cursor.execute(
                     """CREATE TABLE IF NOT EXISTS tvdb_map (
                     key INTEGER PRIMARY KEY,
                     tvdb_url TEXT UNIQUE,
                     tvdb_id INTEGER,
-                    expiration_date TEXT)"""
+                    expiration_date INTEGER)"""
                 )
                 cursor.execute(
                     """CREATE TABLE IF NOT EXISTS anime_map (
@@ -225,7 +278,7 @@ class Cache:
                     anilist TEXT,
                     myanimelist TEXT,
                     kitsu TEXT,
-                    expiration_date TEXT)"""
+                    expiration_date INTEGER)"""
                 )
                 cursor.execute(
                     """CREATE TABLE IF NOT EXISTS image_maps (
@@ -249,7 +302,8 @@ class Cache:
                     key INTEGER PRIMARY KEY,
                     list_type TEXT,
                     list_data TEXT,
-                    expiration_date TEXT)"""
+                    expiration_date INTEGER,
+                    expiration INTEGER)"""
                 )
                 cursor.execute(
                     """CREATE TABLE IF NOT EXISTS list_ids (
@@ -258,6 +312,47 @@ class Cache:
                     media_id TEXT,
                     media_type TEXT)"""
                 )
+                cursor.execute(
+                    """CREATE TABLE IF NOT EXISTS list_blobs (
+                    key INTEGER PRIMARY KEY,
+                    list_key INTEGER UNIQUE,
+                    version INTEGER,
+                    data BLOB)"""
+                )
+                cursor.execute(
+                    """CREATE TABLE IF NOT EXISTS library_snapshots (
+                    key INTEGER PRIMARY KEY,
+                    library TEXT,
+                    rating_key INTEGER,
+                    guid TEXT,
+                    updated_at INTEGER,
+                    UNIQUE(library, rating_key))"""
+                )
+                cursor.execute(
+                    """CREATE TABLE IF NOT EXISTS library_syncs (
+                    key INTEGER PRIMARY KEY,
+                    library TEXT UNIQUE,
+                    full_sync INTEGER)"""
+                )
+                cursor.execute(
+                    """CREATE TABLE IF NOT EXISTS asset_listings (
+                    key INTEGER PRIMARY KEY,
+                    directory TEXT UNIQUE,
+                    mtime INTEGER,
+                    entries TEXT,
+                    scanned INTEGER)"""
+                )
+                cursor.execute(
+                    """CREATE TABLE IF NOT EXISTS image_fingerprints (
+                    key INTEGER PRIMARY KEY,
+                    location TEXT UNIQUE,
+                    size INTEGER,
+                    mtime INTEGER,
+                    etag TEXT,
+                    last_modified TEXT,
+                    fingerprint TEXT,
+                    expiration_date INTEGER)"""
+                )
                 cursor.execute(
                     """CREATE TABLE IF NOT EXISTS imdb_parental (
                     key INTEGER PRIMARY KEY,
@@ -267,7 +362,7 @@ class Cache:
                     profanity TEXT,
                     alcohol TEXT,
                     frightening TEXT,
-                    expiration_date TEXT)"""
+                    expiration_date INTEGER)"""
                 )
                 cursor.execute(
                     """CREATE TABLE IF NOT EXISTS ergast_race (
@@ -276,7 +371,7 @@ class Cache:
                     round INTEGER,
                     name TEXT,
                     date TEXT,
-                    expiration_date TEXT)"""
+                    expiration_date INTEGER)"""
                 )
                 cursor.execute(
                     """CREATE TABLE IF NOT EXISTS overlay_special_text (
@@ -304,37 +399,418 @@ class Cache:
                                 final_table = table_name if row["type"] == "poster" else f"{table_name}_backgrounds"
                                 self.update_image_map(row["rating_key"], final_table, row["location"], row["compare"], overlay=row["overlay"])
                     cursor.execute("DROP TABLE IF EXISTS image_map")
+                cursor.execute("PRAGMA user_version")
+                if cursor.fetchone()[0] < 1:
+                    cursor.execute("SELECT name, sql FROM sqlite_master WHERE type='table' AND sql LIKE '%expiration_date TEXT%'")
+                    for table in cursor.fetchall():
+                        logger.info(f"Migrating {table['name']} expirations")
+                        cursor.execute(f"PRAGMA table_info({table['name']})")
+                        columns = [c["name"] for c in cursor.fetchall()]
+                        selects = ["CAST(strftime('%s', expiration_date, 'utc') AS INTEGER)" if c == "expiration_date" else c for c in columns]
+                        create_sql = re.sub(r"^CREATE TABLE\s+(IF NOT EXISTS\s+)?\"?\w+\"?", f"CREATE TABLE {table['name']}_migrate", table["sql"])
+                        cursor.execute(f"DROP TABLE IF EXISTS {table['name']}_migrate")
+                        cursor.execute(create_sql.replace("expiration_date TEXT", "expiration_date INTEGER"))
+                        cursor.execute(f"INSERT INTO {table['name']}_migrate({', '.join(columns)}) SELECT {', '.join(selects)} FROM {table['name']}")
+                        cursor.execute(f"DROP TABLE {table['name']}")
+                        cursor.execute(f"ALTER TABLE {table['name']}_migrate RENAME TO {table['name']}")
+                    cursor.execute("PRAGMA user_version = 1")
+                cursor.execute("PRAGMA table_info(asset_listings)")
+                if "scanned" not in [c["name"] for c in cursor.fetchall()]:
+                    cursor.execute("ALTER TABLE asset_listings ADD COLUMN scanned INTEGER")
+                cursor.execute("PRAGMA table_info(list_cache)")
+                if "expiration" not in [c["name"] for c in cursor.fetchall()]:
+                    cursor.execute("ALTER TABLE list_cache ADD COLUMN expiration INTEGER")
+                cursor.execute("PRAGMA table_info(image_fingerprints)")
+                if "expiration_date" not in [c["name"] for c in cursor.fetchall()]:
+                    cursor.execute("ALTER TABLE image_fingerprints ADD COLUMN expiration_date INTEGER")
+                cursor.execute("CREATE INDEX IF NOT EXISTS imdb_to_tmdb_map_tmdb_id ON imdb_to_tmdb_map(tmdb_id, media_type)")
+                cursor.execute("CREATE INDEX IF NOT EXISTS imdb_to_tvdb_map2_tvdb_id ON imdb_to_tvdb_map2(tvdb_id)")
+                cursor.execute("CREATE INDEX IF NOT EXISTS tmdb_to_tvdb_map2_tvdb_id ON tmdb_to_tvdb_map2(tvdb_id)")
+                cursor.execute("CREATE INDEX IF NOT EXISTS anime_map_anilist ON anime_map(anilist)")
+                cursor.execute("CREATE INDEX IF NOT EXISTS anime_map_myanimelist ON anime_map(myanimelist)")
+                cursor.execute("CREATE INDEX IF NOT EXISTS anime_map_kitsu ON anime_map(kitsu)")
+                cursor.execute("CREATE INDEX IF NOT EXISTS radarr_adds_tmdb_id ON radarr_adds(tmdb_id, library)")
+                cursor.execute("CREATE INDEX IF NOT EXISTS sonarr_adds_tvdb_id ON sonarr_adds(tvdb_id, library)")
+                cursor.execute("CREATE INDEX IF NOT EXISTS list_cache_list ON list_cache(list_type, list_data)")
+                cursor.execute("CREATE INDEX IF NOT EXISTS list_ids_list_key ON list_ids(list_key)")
+                cursor.execute("CREATE INDEX IF NOT EXISTS imdb_parental_imdb_id ON imdb_parental(imdb_id)")
+                cursor.execute("CREATE INDEX IF NOT EXISTS ergast_race_season ON ergast_race(season, round)")
+                cursor.execute("CREATE INDEX IF NOT EXISTS overlay_special_text_rating_key ON overlay_special_text(rating_key, type)")
+                cursor.execute("CREATE INDEX IF NOT EXISTS testing_name ON testing(name)")
+
+    def _get_connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.cache_path, timeout=30, cached_statements=256)
+            connection.row_factory = sqlite3.Row
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute("PRAGMA cache_size=-16000")
+            connection.execute("PRAGMA temp_store=MEMORY")
+            self._local.connection = connection
+            self._local.depth = 0
+        return connection
+
+    @contextmanager
+    def _connection(self):
+        connection = self._get_connection()
+        self._local.depth += 1
+        try:
+            yield connection
+        except Exception:
+            self._local.depth -= 1
+            if self._local.depth == 0:
+                connection.rollback()
+            raise
+        self._local.depth -= 1
+        if self._local.depth == 0:
+            connection.commit()
+
+    @contextmanager
+    def transaction(self):
+        if not getattr(self._local, "transaction", 0):
+            self._local.transaction = 0
+            self._local.deferred = {}
+            self._local.deferred_keys = {}
+            self._local.deferred_count = 0
+        self._local.transaction += 1
+        try:
+            yield
+        finally:
+            self._local.transaction -= 1
+            if self._local.transaction == 0:
+                self._commit_deferred()
+
+    def _commit_deferred(self):
+        if getattr(self._local, "deferred", None):
+            deferred = self._local.deferred
+            self._local.deferred = {}
+            self._local.deferred_keys = {}
+            self._local.deferred_count = 0
+            self._replay(deferred)
+
+    @contextmanager
+    def _writer(self, table, key_column, key, replace=False):
+        if self.write_behind:
+            cursor = _BufferedCursor()
+            yield cursor
+            with self._write_lock:
+                self._buffered += self._stage(self._write_buffer, self._pending_keys, table, key_column, key, cursor.statements, replace)
+            if self._buffered >= self.write_behind_size:
+                self.flush()
+        elif getattr(self._local, "transaction", 0):
+            cursor = _BufferedCursor()
+            yield cursor
+            self._local.deferred_count += self._stage(self._local.deferred, self._local.deferred_keys, table, key_column, key, cursor.statements, replace)
+            if self._local.deferred_count >= self.transaction_size:
+                self._commit_deferred()
+        else:
+            with self._connection() as connection:
+                with closing(connection.cursor()) as cursor:
+                    yield cursor
+
+    def _stage(self, write_buffer, pending_keys, table, key_column, key, statements, replace):
+        added = 0
+        row = (table, key)
+        if replace and row in write_buffer:
+            added -= len(write_buffer.pop(row))
+        if row not in write_buffer:
+            write_buffer[row] = []
+        pending = write_buffer[row]
+        for sql, params in statements:
+            if sql.startswith("UPDATE "):
+                where = len(params) - sql.split(" WHERE ")[-1].count("?")
+                kept = [(s, p) for s, p in pending if s != sql or p[where:] != params[where:]]
+                added -= len(pending) - len(kept)
+                pending[:] = kept
+            elif sql.startswith("INSERT OR IGNORE ") and (sql, params) in pending:
+                continue
+            pending.append((sql, params))
+            added += 1
+        if table not in pending_keys:
+            pending_keys[table] = (key_column, set())
+        pending_keys[table][1].add(key)
+        return added
+
+    def _is_pending(self, pending_keys, table, column, value):
+        if table in pending_keys:
+            key_column, keys = pending_keys[table]
+            return column != key_column or value in keys
+        return False
+
+    def _check_pending(self, table, column=None, value=None):
+        if self._is_pending(self._pending_keys, table, column, value):
+            self.flush()
+        if getattr(self._local, "transaction", 0) and self._is_pending(self._local.deferred_keys, table, column, value):
+            self._commit_deferred()
+
+    def flush(self):
+        with self._write_lock:
+            if not self._write_buffer:
+                return
+            write_buffer = self._write_buffer
+            self._write_buffer = {}
+            self._pending_keys = {}
+            self._buffered = 0
+            self._replay(write_buffer)
+
+    def _replay(self, write_buffer):
+        with self._connection() as connection:
+            with closing(connection.cursor()) as cursor:
+                level = 0
+                rows = [pending for pending in write_buffer.values() if pending]
+                while rows:
+                    statements = {}
+                    for pending in rows:
+                        sql, params = pending[level]
+                        if sql not in statements:
+                            statements[sql] = []
+                        statements[sql].append(params)
+                    for sql, params in statements.items():
+                        cursor.executemany(sql, params)
+                    level += 1
+                    rows = [pending for pending in rows if level < len(pending)]
+
+    def _lru_query(self, table, key, lru_key, loader, result_key=None):
+        full_key = (table, lru_key)
+        with self._lru_lock:
+            if table not in self.lru_stats:
+                self.lru_stats[table] = {"hits": 0, "misses": 0, "evictions": 0}
+            if full_key in self._lru:
+                self._lru.move_to_end(full_key)
+                self.lru_stats[table]["hits"] += 1
+                return copy.deepcopy(self._lru[full_key][1])
+            self.lru_stats[table]["misses"] += 1
+        result = loader()
+        index_keys = {(table, str(key))}
+        if result_key and result_key(result) is not None:
+            index_keys.add((table, str(result_key(result))))
+        with self._lru_lock:
+            self._lru[full_key] = (index_keys, copy.deepcopy(result))
+            for index_key in index_keys:
+                if index_key not in self._lru_index:
+                    self._lru_index[index_key] = set()
+                self._lru_index[index_key].add(full_key)
+            while len(self._lru) > self.lru_size:
+                old_key, (old_indexes, _) = self._lru.popitem(last=False)
+                for old_index in old_indexes:
+                    if old_index in self._lru_index:
+                        self._lru_index[old_index].discard(old_key)
+                        if not self._lru_index[old_index]:
+                            del self._lru_index[old_index]
+                self.lru_stats[old_key[0]]["evictions"] += 1
+        return result
+
+    def _lru_invalidate(self, table, *keys):
+        with self._lru_lock:
+            for key in keys:
+                for full_key in self._lru_index.pop((table, str(key)), []):
+                    if full_key in self._lru:
+                        for index_key in self._lru.pop(full_key)[0]:
+                            if index_key in self._lru_index:
+                                self._lru_index[index_key].discard(full_key)
+                                if not self._lru_index[index_key]:
+                                    del self._lru_index[index_key]
+
+    def close(self):
+        self._commit_deferred()
+        self.flush()
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.commit()
+            connection.close()
+            self._local.connection = None
 
+    def _file_size(self):
+        return sum([os.path.getsize(f"{self.cache_path}{s}") for s in ["", "-wal"] if os.path.exists(f"{self.cache_path}{s}")])
+
+    def maintenance(self, libraries, expirations=None):
+        self.flush()
+        expirations = expirations if expirations else {}
+        size_before = self._file_size()
+        purged = {}
+        dropped = []
+        now = int(datetime.now().timestamp())
+        with self._connection() as connection:
+            with closing(connection.cursor()) as cursor:
+                cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND sql LIKE '%expiration_date%'")
+                for table in [t["name"] for t in cursor.fetchall()]:
+                    expiration = expirations[table] if table in expirations else self.expiration
+                    if table == "list_cache":
+                        cursor.execute("DELETE FROM list_cache WHERE expiration_date IS NULL OR expiration_date <= ? - (COALESCE(expiration, ?) + 1) * 86400", (now, expiration))
+                    else:
+                        cursor.execute(f"DELETE FROM {table} WHERE expiration_date IS NULL OR expiration_date <= ?", (now - (expiration + 1) * 86400,))
+                    purged[table] = cursor.rowcount
+                cursor.execute("DELETE FROM list_ids WHERE CAST(list_key AS INTEGER) NOT IN (SELECT key FROM list_cache)")
+                purged["list_ids"] = cursor.rowcount
+                cursor.execute("DELETE FROM list_blobs WHERE list_key NOT IN (SELECT key FROM list_cache)")
+                purged["list_blobs"] = cursor.rowcount
+                cursor.execute(f"DELETE FROM library_snapshots WHERE library NOT IN ({', '.join(['?'] * len(libraries))})", list(libraries))
+                purged["library_snapshots"] = cursor.rowcount
+                cursor.execute(f"DELETE FROM library_syncs WHERE library NOT IN ({', '.join(['?'] * len(libraries))})", list(libraries))
+                purged["library_syncs"] = cursor.rowcount
+                cursor.execute("SELECT directory, entries FROM asset_listings")
+                listings = {row["directory"]: row["entries"] for row in cursor.fetchall()}
+                unavailable = []
+                for root in [d for d in listings if os.path.dirname(d) not in listings]:
+                    try:
+                        if not os.listdir(root) and json.loads(listings[root]):
+                            unavailable.append(root)
+                    except OSError:
+                        unavailable.append(root)
+                missing = [(d,) for d in listings if not any([d == r or d.startswith(os.path.join(r, "")) for r in unavailable]) and not os.path.isdir(d)]
+                cursor.executemany("DELETE FROM asset_listings WHERE directory = ?", missing)
+                purged["asset_listings"] = len(missing)
+                cursor.execute("SELECT location FROM image_fingerprints WHERE size IS NOT NULL")
+                missing = [(row["location"],) for row in cursor.fetchall() if not os.path.isfile(row["location"])]
+                cursor.executemany("DELETE FROM image_fingerprints WHERE location = ?", missing)
+                purged["image_fingerprints"] = len(missing)
+                cursor.execute("SELECT * FROM image_maps")
+                for row in cursor.fetchall():
+                    if row["library"] not in libraries:
+                        for suffix in ["", "_backgrounds", "_overlays"]:
+                            cursor.execute(f"DROP TABLE IF EXISTS image_map_{row['key']}{suffix}")
+                        cursor.execute("DELETE FROM image_maps WHERE key = ?", (row["key"],))
+                        dropped.append(row["library"])
+                cursor.execute("ANALYZE")
+        with self._lru_lock:
+            self._lru.clear()
+            self._lru_index.clear()
+        self._asset_listings = None
+        connection = self._get_connection()
+        connection.execute("VACUUM")
+        connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return purged, dropped, size_before, self._file_size()
+
+    def query_expiring(self, table, key_column, expiration, before, limit):
+        self.flush()
+        with self._connection() as connection:
+            with closing(connection.cursor()) as cursor:
+                cursor.execute(f"SELECT {key_column} FROM {table} WHERE expiration_date <= ? ORDER BY expiration_date LIMIT ?", (int(before.timestamp()) - (expiration + 1) * 86400, limit))
+                return [row[key_column] for row in cursor.fetchall()]
+
+    def export_cache(self, path):
+        self.flush()
+        counts = {}
+        with gzip.open(path, "wt", encoding="utf-8") as handle:
+            handle.write(f"{json.dumps({'pmm_cache_export': EXPORT_VERSION, 'created': datetime.now().strftime('%Y-%m-%d %H:%M:%S')})}\n")
+            with self._connection() as connection:
+                with closing(connection.cursor()) as cursor:
+                    for table in shareable_tables:
+                        counts[table] = 0
+                        cursor.execute(f"SELECT * FROM {table}")
+                        for row in cursor:
+                            handle.write(f"{json.dumps({'table': table, 'row': {k: row[k] for k in row.keys() if k != 'key'}})}\n")
+                            counts[table] += 1
+        return counts
+
+    def import_cache(self, path):
+        self.flush()
+        counts = {}
+        with gzip.open(path, "rt", encoding="utf-8") as handle:
+            try:
+                header = json.loads(handle.readline())
+            except ValueError:
+                header = None
+            if not header or "pmm_cache_export" not in header:
+                raise Failed(f"Cache Error: {path} is not a cache export")
+            if header["pmm_cache_export"] > EXPORT_VERSION:
+                raise Failed(f"Cache Error: {path} uses export version {header['pmm_cache_export']} and only version {EXPORT_VERSION} or lower is supported")
+            with self._connection() as connection:
+                with closing(connection.cursor()) as cursor:
+                    columns = {}
+                    for table in shareable_tables:
+                        cursor.execute(f"PRAGMA table_info({table})")
+                        columns[table] = [c["name"] for c in cursor.fetchall() if c["name"] != "key"]
+                        counts[table] = {"added": 0, "updated": 0, "skipped": 0}
+                    lines = enumerate(handle, 2)
+                    while True:
+                        try:
+                            line_number, line = next(lines, (None, None))
+                        except (EOFError, OSError, UnicodeDecodeError) as e:
+                            raise Failed(f"Cache Error: {path} is truncated or corrupt: {e}")
+                        if line is None:
+                            break
+                        if not line.strip():
+                            continue
+                        try:
+                            data = json.loads(line)
+                            table = data["table"]
+                            if table not in shareable_tables:
+                                continue
+                            row = {k: v for k, v in data["row"].items() if k in columns[table]}
+                        except (json.JSONDecodeError, KeyError, TypeError, AttributeError) as e:
+                            raise Failed(f"Cache Error: {path} line {line_number} is malformed: {e}")
+                        keys = shareable_tables[table]
+                        if any([k not in row or row[k] is None for k in keys]):
+                            counts[table]["skipped"] += 1
+                            continue
+                        where = " AND ".join([f"{k} = ?" for k in keys])
+                        cursor.execute(f"SELECT expiration_date FROM {table} WHERE {where}", [row[k] for k in keys])
+                        existing = cursor.fetchone()
+                        if existing is None:
+                            cursor.execute(f"INSERT INTO {table}({', '.join(row)}) VALUES({', '.join(['?'] * len(row))})", list(row.values()))
+                            counts[table]["added"] += 1
+                        elif existing["expiration_date"] is None or (row.get("expiration_date") is not None and row["expiration_date"] > existing["expiration_date"]):
+                            updates = [k for k in row if k not in keys]
+                            cursor.execute(f"UPDATE {table} SET {', '.join([f'{k} = ?' for k in updates])} WHERE {where}", [row[k] for k in updates] + [row[k] for k in keys])
+                            counts[table]["updated"] += 1
+                        else:
+                            counts[table]["skipped"] += 1
+        with self._lru_lock:
+            self._lru.clear()
+            self._lru_index.clear()
+        return counts
+
+    @lru_query("guids_map")
     def query_guid_map(self, plex_guid):
         id_to_return = None
         imdb_id = None
         media_type = None
         expired = None
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
+        with self._connection() as connection:
             with closing(connection.cursor()) as cursor:
+                self._check_pending("guids_map", "plex_guid", plex_guid)
                 cursor.execute(f"SELECT * FROM guids_map WHERE plex_guid = ?", (plex_guid,))
                 row = cursor.fetchone()
                 if row:
-                    time_between_insertion = datetime.now() - datetime.strptime(row["expiration_date"], "%Y-%m-%d")
+                    time_between_insertion = datetime.now() - datetime.fromtimestamp(row["expiration_date"])
                     id_to_return = util.get_list(row["t_id"], int_list=True)
                     imdb_id = util.get_list(row["imdb_id"])
                     media_type = row["media_type"]
                     expired = time_between_insertion.days > self.expiration
         return id_to_return, imdb_id, media_type, expired
 
+    def query_guid_map_many(self, plex_guids, chunk_size=500):
+        results = {}
+        plex_guids = list(dict.fromkeys(plex_guids))
+        with self._connection() as connection:
+            with closing(connection.cursor()) as cursor:
+                for i in range(0, len(plex_guids), chunk_size):
+                    chunk = plex_guids[i:i + chunk_size]
+                    self._check_pending("guids_map")
+                    cursor.execute(f"SELECT * FROM guids_map WHERE plex_guid IN ({', '.join(['?'] * len(chunk))})", chunk)
+                    for row in cursor.fetchall():
+                        time_between_insertion = datetime.now() - datetime.fromtimestamp(row["expiration_date"])
+                        results[row["plex_guid"]] = (
+                            util.get_list(row["t_id"], int_list=True),
+                            util.get_list(row["imdb_id"]),
+                            row["media_type"],
+                            time_between_insertion.days > self.expiration
+                        )
+        return results
+
     def update_guid_map(self, plex_guid, t_id, imdb_id, expired, media_type):
+        self._lru_invalidate("guids_map", plex_guid)
         expiration_date = datetime.now() if expired is True else (datetime.now() - timedelta(days=random.randint(1, self.expiration)))
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
-            with closing(connection.cursor()) as cursor:
-                cursor.execute(f"INSERT OR IGNORE INTO guids_map(plex_guid) VALUES(?)", (plex_guid,))
-                if media_type is None:
-                    sql = f"UPDATE guids_map SET t_id = ?, imdb_id = ?, expiration_date = ? WHERE plex_guid = ?"
-                    cursor.execute(sql, (t_id, imdb_id, expiration_date.strftime("%Y-%m-%d"), plex_guid))
-                else:
-                    sql = f"UPDATE guids_map SET t_id = ?, imdb_id = ?, expiration_date = ?, media_type = ? WHERE plex_guid = ?"
-                    cursor.execute(sql, (t_id, imdb_id, expiration_date.strftime("%Y-%m-%d"), media_type, plex_guid))
+        with self._writer("guids_map", "plex_guid", plex_guid) as cursor:
+            cursor.execute(f"INSERT OR IGNORE INTO guids_map(plex_guid) VALUES(?)", (plex_guid,))
+            if media_type is None:
+                sql = f"UPDATE guids_map SET t_id = ?, imdb_id = ?, expiration_date = ? WHERE plex_guid = ?"
+                cursor.execute(sql, (t_id, imdb_id, int(expiration_date.timestamp()), plex_guid))
+            else:
+                sql = f"UPDATE guids_map SET t_id = ?, imdb_id = ?, expiration_date = ?, media_type = ? WHERE plex_guid = ?"
+                cursor.execute(sql, (t_id, imdb_id, int(expiration_date.timestamp()), media_type, plex_guid))
 
     def query_imdb_to_tmdb_map(self, _id, imdb=True, media_type=None, return_type=False):
         from_id = "imdb_id" if imdb else "tmdb_id"
@@ -372,20 +848,21 @@ class Cache:
     def update_flixpatrol_map(self, expired, flixpatrol_id, tmdb_id, media_type):
         self._update_map("flixpatrol_map", "flixpatrol_id", flixpatrol_id, "tmdb_id", tmdb_id, expired, media_type=media_type)
 
+    @lru_query(lambda map_name, *args, **kwargs: map_name, key_index=1, result_key=lambda result: result[0])
     def _query_map(self, map_name, _id, from_id, to_id, media_type=None, return_type=False):
         id_to_return = None
         expired = None
         out_type = None
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
+        with self._connection() as connection:
             with closing(connection.cursor()) as cursor:
+                self._check_pending(map_name, from_id, _id)
                 if media_type is None:
                     cursor.execute(f"SELECT * FROM {map_name} WHERE {from_id} = ?", (_id,))
                 else:
                     cursor.execute(f"SELECT * FROM {map_name} WHERE {from_id} = ? AND media_type = ?", (_id, media_type))
                 row = cursor.fetchone()
                 if row and row[to_id]:
-                    datetime_object = datetime.strptime(row["expiration_date"], "%Y-%m-%d")
+                    datetime_object = datetime.fromtimestamp(row["expiration_date"])
                     time_between_insertion = datetime.now() - datetime_object
                     if "_" in row[to_id]:
                         id_to_return = row[to_id]
@@ -402,24 +879,24 @@ class Cache:
             return id_to_return, expired
 
     def _update_map(self, map_name, val1_name, val1, val2_name, val2, expired, media_type=None):
+        self._lru_invalidate(map_name, val1, val2)
         expiration_date = datetime.now() if expired is True else (datetime.now() - timedelta(days=random.randint(1, self.expiration)))
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
-            with closing(connection.cursor()) as cursor:
-                cursor.execute(f"INSERT OR IGNORE INTO {map_name}({val1_name}) VALUES(?)", (val1,))
-                if media_type is None:
-                    sql = f"UPDATE {map_name} SET {val2_name} = ?, expiration_date = ? WHERE {val1_name} = ?"
-                    cursor.execute(sql, (val2, expiration_date.strftime("%Y-%m-%d"), val1))
-                else:
-                    sql = f"UPDATE {map_name} SET {val2_name} = ?, expiration_date = ?, media_type = ? WHERE {val1_name} = ?"
-                    cursor.execute(sql, (val2, expiration_date.strftime("%Y-%m-%d"), media_type, val1))
+        with self._writer(map_name, val1_name, val1) as cursor:
+            cursor.execute(f"INSERT OR IGNORE INTO {map_name}({val1_name}) VALUES(?)", (val1,))
+            if media_type is None:
+                sql = f"UPDATE {map_name} SET {val2_name} = ?, expiration_date = ? WHERE {val1_name} = ?"
+                cursor.execute(sql, (val2, int(expiration_date.timestamp()), val1))
+            else:
+                sql = f"UPDATE {map_name} SET {val2_name} = ?, expiration_date = ?, media_type = ? WHERE {val1_name} = ?"
+                cursor.execute(sql, (val2, int(expiration_date.timestamp()), media_type, val1))
 
+    @lru_query("omdb_data3")
     def query_omdb(self, imdb_id, expiration):
         omdb_dict = {}
         expired = None
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
+        with self._connection() as connection:
             with closing(connection.cursor()) as cursor:
+                self._check_pending("omdb_data3", "imdb_id", imdb_id)
                 cursor.execute("SELECT * FROM omdb_data3 WHERE imdb_id = ?", (imdb_id,))
                 row = cursor.fetchone()
                 if row:
@@ -437,31 +914,31 @@ class Cache:
                     omdb_dict["Season"] = row["season_num"] if row["season_num"] else None
                     omdb_dict["Episode"] = row["episode_num"] if row["episode_num"] else None
                     omdb_dict["Response"] = "True"
-                    datetime_object = datetime.strptime(row["expiration_date"], "%Y-%m-%d")
+                    datetime_object = datetime.fromtimestamp(row["expiration_date"])
                     time_between_insertion = datetime.now() - datetime_object
                     expired = time_between_insertion.days > expiration
         return omdb_dict, expired
 
     def update_omdb(self, expired, omdb, expiration):
+        self._lru_invalidate("omdb_data3", omdb.imdb_id)
         expiration_date = datetime.now() if expired is True else (datetime.now() - timedelta(days=random.randint(1, expiration)))
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
-            with closing(connection.cursor()) as cursor:
-                cursor.execute("INSERT OR IGNORE INTO omdb_data3(imdb_id) VALUES(?)", (omdb.imdb_id,))
-                update_sql = "UPDATE omdb_data3 SET title = ?, year = ?, released = ?, content_rating = ?, genres = ?, " \
-                             "imdb_rating = ?, imdb_votes = ?, metacritic_rating = ?, type = ?, series_id = ?, " \
-                             "season_num = ?, episode_num = ?, expiration_date = ? WHERE imdb_id = ?"
-                cursor.execute(update_sql, (
-                    omdb.title, omdb.year, omdb.released.strftime("%d %b %Y") if omdb.released else None, omdb.content_rating,
-                    omdb.genres_str, omdb.imdb_rating, omdb.imdb_votes, omdb.metacritic_rating, omdb.type, omdb.series_id,
-                    omdb.season_num, omdb.episode_num, expiration_date.strftime("%Y-%m-%d"), omdb.imdb_id))
+        with self._writer("omdb_data3", "imdb_id", omdb.imdb_id) as cursor:
+            cursor.execute("INSERT OR IGNORE INTO omdb_data3(imdb_id) VALUES(?)", (omdb.imdb_id,))
+            update_sql = "UPDATE omdb_data3 SET title = ?, year = ?, released = ?, content_rating = ?, genres = ?, " \
+                         "imdb_rating = ?, imdb_votes = ?, metacritic_rating = ?, type = ?, series_id = ?, " \
+                         "season_num = ?, episode_num = ?, expiration_date = ? WHERE imdb_id = ?"
+            cursor.execute(update_sql, (
+                omdb.title, omdb.year, omdb.released.strftime("%d %b %Y") if omdb.released else None, omdb.content_rating,
+                omdb.genres_str, omdb.imdb_rating, omdb.imdb_votes, omdb.metacritic_rating, omdb.type, omdb.series_id,
+                omdb.season_num, omdb.episode_num, int(expiration_date.timestamp()), omdb.imdb_id))
 
+    @lru_query("mdb_data3")
     def query_mdb(self, key_id, expiration):
         mdb_dict = {}
         expired = None
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
+        with self._connection() as connection:
             with closing(connection.cursor()) as cursor:
+                self._check_pending("mdb_data3", "key_id", key_id)
                 cursor.execute("SELECT * FROM mdb_data3 WHERE key_id = ?", (key_id,))
                 row = cursor.fetchone()
                 if row:
@@ -486,35 +963,35 @@ class Cache:
                         {"source": "letterboxd", "value": row["letterboxd_rating"] if row["letterboxd_rating"] else None},
                         {"source": "myanimelist_rating", "value": row["myanimelist_rating"] if row["myanimelist_rating"] else None}
                     ]
-                    datetime_object = datetime.strptime(row["expiration_date"], "%Y-%m-%d")
+                    datetime_object = datetime.fromtimestamp(row["expiration_date"])
                     time_between_insertion = datetime.now() - datetime_object
                     expired = time_between_insertion.days > expiration
         return mdb_dict, expired
 
     def update_mdb(self, expired, key_id, mdb, expiration):
+        self._lru_invalidate("mdb_data3", key_id)
         expiration_date = datetime.now() if expired is True else (datetime.now() - timedelta(days=random.randint(1, expiration)))
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
-            with closing(connection.cursor()) as cursor:
-                cursor.execute("INSERT OR IGNORE INTO mdb_data3(key_id) VALUES(?)", (key_id,))
-                update_sql = "UPDATE mdb_data3 SET title = ?, year = ?, released = ?, type = ?, imdbid = ?, traktid = ?, " \
-                             "tmdbid = ?, score = ?, imdb_rating = ?, metacritic_rating = ?, metacriticuser_rating = ?, " \
-                             "trakt_rating = ?, tomatoes_rating = ?, tomatoesaudience_rating = ?, tmdb_rating = ?, " \
-                             "letterboxd_rating = ?, myanimelist_rating = ?, certification = ?, commonsense = ?, expiration_date = ? WHERE key_id = ?"
-                cursor.execute(update_sql, (
-                    mdb.title, mdb.year, mdb.released.strftime("%Y-%m-%d") if mdb.released else None, mdb.type,
-                    mdb.imdbid, mdb.traktid, mdb.tmdbid, mdb.score, mdb.imdb_rating, mdb.metacritic_rating,
-                    mdb.metacriticuser_rating, mdb.trakt_rating, mdb.tomatoes_rating, mdb.tomatoesaudience_rating,
-                    mdb.tmdb_rating, mdb.letterboxd_rating, mdb.myanimelist_rating, mdb.content_rating, mdb.commonsense,
-                    expiration_date.strftime("%Y-%m-%d"), key_id
-                ))
+        with self._writer("mdb_data3", "key_id", key_id) as cursor:
+            cursor.execute("INSERT OR IGNORE INTO mdb_data3(key_id) VALUES(?)", (key_id,))
+            update_sql = "UPDATE mdb_data3 SET title = ?, year = ?, released = ?, type = ?, imdbid = ?, traktid = ?, " \
+                         "tmdbid = ?, score = ?, imdb_rating = ?, metacritic_rating = ?, metacriticuser_rating = ?, " \
+                         "trakt_rating = ?, tomatoes_rating = ?, tomatoesaudience_rating = ?, tmdb_rating = ?, " \
+                         "letterboxd_rating = ?, myanimelist_rating = ?, certification = ?, commonsense = ?, expiration_date = ? WHERE key_id = ?"
+            cursor.execute(update_sql, (
+                mdb.title, mdb.year, mdb.released.strftime("%Y-%m-%d") if mdb.released else None, mdb.type,
+                mdb.imdbid, mdb.traktid, mdb.tmdbid, mdb.score, mdb.imdb_rating, mdb.metacritic_rating,
+                mdb.metacriticuser_rating, mdb.trakt_rating, mdb.tomatoes_rating, mdb.tomatoesaudience_rating,
+                mdb.tmdb_rating, mdb.letterboxd_rating, mdb.myanimelist_rating, mdb.content_rating, mdb.commonsense,
+                int(expiration_date.timestamp()), key_id
+            ))
 
+    @lru_query("anidb_data")
     def query_anidb(self, anidb_id, expiration):
         anidb_dict = {}
         expired = None
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
+        with self._connection() as connection:
             with closing(connection.cursor()) as cursor:
+                self._check_pending("anidb_data", "anidb_id", anidb_id)
                 cursor.execute("SELECT * FROM anidb_data WHERE anidb_id = ?", (anidb_id,))
                 row = cursor.fetchone()
                 if row:
@@ -525,31 +1002,31 @@ class Cache:
                     anidb_dict["score"] = row["score"] if row["score"] else None
                     anidb_dict["released"] = row["released"] if row["released"] else None
                     anidb_dict["tags"] = row["tags"] if row["tags"] else None
-                    datetime_object = datetime.strptime(row["expiration_date"], "%Y-%m-%d")
+                    datetime_object = datetime.fromtimestamp(row["expiration_date"])
                     time_between_insertion = datetime.now() - datetime_object
                     expired = time_between_insertion.days > expiration
         return anidb_dict, expired
 
     def update_anidb(self, expired, anidb_id, anidb, expiration):
+        self._lru_invalidate("anidb_data", anidb_id)
         expiration_date = datetime.now() if expired is True else (datetime.now() - timedelta(days=random.randint(1, expiration)))
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
-            with closing(connection.cursor()) as cursor:
-                cursor.execute("INSERT OR IGNORE INTO anidb_data(anidb_id) VALUES(?)", (anidb_id,))
-                update_sql = "UPDATE anidb_data SET main_title = ?, titles = ?, rating = ?, average = ?, score = ?, " \
-                             "released = ?, tags = ?, expiration_date = ? WHERE anidb_id = ?"
-                cursor.execute(update_sql, (
-                    anidb.main_title, str(anidb.titles), anidb.rating, anidb.average, anidb.score,
-                    anidb.released.strftime("%Y-%m-%d") if anidb.released else None, "|".join(anidb.tags),
-                    expiration_date.strftime("%Y-%m-%d"), anidb_id
-                ))
+        with self._writer("anidb_data", "anidb_id", anidb_id) as cursor:
+            cursor.execute("INSERT OR IGNORE INTO anidb_data(anidb_id) VALUES(?)", (anidb_id,))
+            update_sql = "UPDATE anidb_data SET main_title = ?, titles = ?, rating = ?, average = ?, score = ?, " \
+                         "released = ?, tags = ?, expiration_date = ? WHERE anidb_id = ?"
+            cursor.execute(update_sql, (
+                anidb.main_title, str(anidb.titles), anidb.rating, anidb.average, anidb.score,
+                anidb.released.strftime("%Y-%m-%d") if anidb.released else None, "|".join(anidb.tags),
+                int(expiration_date.timestamp()), anidb_id
+            ))
 
+    @lru_query("mal_data")
     def query_mal(self, mal_id, expiration):
         mal_dict = {}
         expired = None
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
+        with self._connection() as connection:
             with closing(connection.cursor()) as cursor:
+                self._check_pending("mal_data", "mal_id", mal_id)
                 cursor.execute("SELECT * FROM mal_data WHERE mal_id = ?", (mal_id,))
                 row = cursor.fetchone()
                 if row:
@@ -564,30 +1041,30 @@ class Cache:
                     mal_dict["rank"] = row["rank"] if row["rank"] else None
                     mal_dict["popularity"] = row["popularity"] if row["popularity"] else None
                     mal_dict["genres"] = row["genres"] if row["genres"] else None
-                    datetime_object = datetime.strptime(row["expiration_date"], "%Y-%m-%d")
+                    datetime_object = datetime.fromtimestamp(row["expiration_date"])
                     time_between_insertion = datetime.now() - datetime_object
                     expired = time_between_insertion.days > expiration
         return mal_dict, expired
 
     def update_mal(self, expired, mal_id, mal, expiration):
+        self._lru_invalidate("mal_data", mal_id)
         expiration_date = datetime.now() if expired is True else (datetime.now() - timedelta(days=random.randint(1, expiration)))
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
-            with closing(connection.cursor()) as cursor:
-                cursor.execute("INSERT OR IGNORE INTO mal_data(mal_id) VALUES(?)", (mal_id,))
-                update_sql = "UPDATE mal_data SET title = ?, title_english = ?, title_japanese = ?, status = ?, airing = ?, " \
-                             "aired = ?, rating = ?, score = ?, rank = ?, popularity = ?, genres = ? , expiration_date = ? WHERE mal_id = ?"
-                cursor.execute(update_sql, (
-                    mal.title, mal.title_english, mal.title_japanese, mal.status, mal.airing, mal.aired.strftime("%Y-%m-%d") if mal.aired else None,
-                    mal.rating, mal.score, mal.rank, mal.popularity, "|".join(mal.genres), expiration_date.strftime("%Y-%m-%d"), mal_id
-                ))
+        with self._writer("mal_data", "mal_id", mal_id) as cursor:
+            cursor.execute("INSERT OR IGNORE INTO mal_data(mal_id) VALUES(?)", (mal_id,))
+            update_sql = "UPDATE mal_data SET title = ?, title_english = ?, title_japanese = ?, status = ?, airing = ?, " \
+                         "aired = ?, rating = ?, score = ?, rank = ?, popularity = ?, genres = ? , expiration_date = ? WHERE mal_id = ?"
+            cursor.execute(update_sql, (
+                mal.title, mal.title_english, mal.title_japanese, mal.status, mal.airing, mal.aired.strftime("%Y-%m-%d") if mal.aired else None,
+                mal.rating, mal.score, mal.rank, mal.popularity, "|".join(mal.genres), int(expiration_date.timestamp()), mal_id
+            ))
 
+    @lru_query("tmdb_movie_data")
     def query_tmdb_movie(self, tmdb_id, expiration):
         tmdb_dict = {}
         expired = None
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
+        with self._connection() as connection:
             with closing(connection.cursor()) as cursor:
+                self._check_pending("tmdb_movie_data", "tmdb_id", tmdb_id)
                 cursor.execute("SELECT * FROM tmdb_movie_data WHERE tmdb_id = ?", (tmdb_id,))
                 row = cursor.fetchone()
                 if row:
@@ -608,34 +1085,34 @@ class Cache:
                     tmdb_dict["release_date"] = datetime.strptime(row["release_date"], "%Y-%m-%d") if row["release_date"] else None
                     tmdb_dict["collection_id"] = row["collection_id"] if row["collection_id"] else None
                     tmdb_dict["collection_name"] = row["collection_name"] if row["collection_name"] else None
-                    datetime_object = datetime.strptime(row["expiration_date"], "%Y-%m-%d")
+                    datetime_object = datetime.fromtimestamp(row["expiration_date"])
                     time_between_insertion = datetime.now() - datetime_object
                     expired = time_between_insertion.days > expiration
         return tmdb_dict, expired
 
     def update_tmdb_movie(self, expired, obj, expiration):
+        self._lru_invalidate("tmdb_movie_data", obj.tmdb_id)
         expiration_date = datetime.now() if expired is True else (datetime.now() - timedelta(days=random.randint(1, expiration)))
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
-            with closing(connection.cursor()) as cursor:
-                cursor.execute("INSERT OR IGNORE INTO tmdb_movie_data(tmdb_id) VALUES(?)", (obj.tmdb_id,))
-                update_sql = "UPDATE tmdb_movie_data SET title = ?, original_title = ?, studio = ?, overview = ?, tagline = ?, imdb_id = ?, " \
-                             "poster_url = ?, backdrop_url = ?, vote_count = ?, vote_average = ?, language_iso = ?, " \
-                             "language_name = ?, genres = ?, keywords = ?, release_date = ?, collection_id = ?, " \
-                             "collection_name = ?, expiration_date = ? WHERE tmdb_id = ?"
-                cursor.execute(update_sql, (
-                    obj.title, obj.original_title, obj.studio, obj.overview, obj.tagline, obj.imdb_id, obj.poster_url, obj.backdrop_url,
-                    obj.vote_count, obj.vote_average, obj.language_iso, obj.language_name, "|".join(obj.genres), "|".join(obj.keywords),
-                    obj.release_date.strftime("%Y-%m-%d") if obj.release_date else None, obj.collection_id, obj.collection_name,
-                    expiration_date.strftime("%Y-%m-%d"), obj.tmdb_id
-                ))
+        with self._writer("tmdb_movie_data", "tmdb_id", obj.tmdb_id) as cursor:
+            cursor.execute("INSERT OR IGNORE INTO tmdb_movie_data(tmdb_id) VALUES(?)", (obj.tmdb_id,))
+            update_sql = "UPDATE tmdb_movie_data SET title = ?, original_title = ?, studio = ?, overview = ?, tagline = ?, imdb_id = ?, " \
+                         "poster_url = ?, backdrop_url = ?, vote_count = ?, vote_average = ?, language_iso = ?, " \
+                         "language_name = ?, genres = ?, keywords = ?, release_date = ?, collection_id = ?, " \
+                         "collection_name = ?, expiration_date = ? WHERE tmdb_id = ?"
+            cursor.execute(update_sql, (
+                obj.title, obj.original_title, obj.studio, obj.overview, obj.tagline, obj.imdb_id, obj.poster_url, obj.backdrop_url,
+                obj.vote_count, obj.vote_average, obj.language_iso, obj.language_name, "|".join(obj.genres), "|".join(obj.keywords),
+                obj.release_date.strftime("%Y-%m-%d") if obj.release_date else None, obj.collection_id, obj.collection_name,
+                int(expiration_date.timestamp()), obj.tmdb_id
+            ))
 
+    @lru_query("tmdb_show_data")
     def query_tmdb_show(self, tmdb_id, expiration):
         tmdb_dict = {}
         expired = None
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
+        with self._connection() as connection:
             with closing(connection.cursor()) as cursor:
+                self._check_pending("tmdb_show_data", "tmdb_id", tmdb_id)
                 cursor.execute("SELECT * FROM tmdb_show_data WHERE tmdb_id = ?", (tmdb_id,))
                 row = cursor.fetchone()
                 if row:
@@ -660,36 +1137,36 @@ class Cache:
                     tmdb_dict["tvdb_id"] = row["tvdb_id"] if row["tvdb_id"] else None
                     tmdb_dict["countries"] = row["countries"] if row["countries"] else ""
                     tmdb_dict["seasons"] = row["seasons"] if row["seasons"] else ""
-                    datetime_object = datetime.strptime(row["expiration_date"], "%Y-%m-%d")
+                    datetime_object = datetime.fromtimestamp(row["expiration_date"])
                     time_between_insertion = datetime.now() - datetime_object
                     expired = time_between_insertion.days > expiration
         return tmdb_dict, expired
 
     def update_tmdb_show(self, expired, obj, expiration):
+        self._lru_invalidate("tmdb_show_data", obj.tmdb_id)
         expiration_date = datetime.now() if expired is True else (datetime.now() - timedelta(days=random.randint(1, expiration)))
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
-            with closing(connection.cursor()) as cursor:
-                cursor.execute("INSERT OR IGNORE INTO tmdb_show_data(tmdb_id) VALUES(?)", (obj.tmdb_id,))
-                update_sql = "UPDATE tmdb_show_data SET title = ?, original_title = ?, studio = ?, overview = ?, tagline = ?, imdb_id = ?, " \
-                             "poster_url = ?, backdrop_url = ?, vote_count = ?, vote_average = ?, language_iso = ?, " \
-                             "language_name = ?, genres = ?, keywords = ?, first_air_date = ?, last_air_date = ?, status = ?, " \
-                             "type = ?, tvdb_id = ?, countries = ?, seasons = ?, expiration_date = ? WHERE tmdb_id = ?"
-                cursor.execute(update_sql, (
-                    obj.title, obj.original_title, obj.studio, obj.overview, obj.tagline, obj.imdb_id, obj.poster_url, obj.backdrop_url,
-                    obj.vote_count, obj.vote_average, obj.language_iso, obj.language_name, "|".join(obj.genres), "|".join(obj.keywords),
-                    obj.first_air_date.strftime("%Y-%m-%d") if obj.first_air_date else None,
-                    obj.last_air_date.strftime("%Y-%m-%d") if obj.last_air_date else None,
-                    obj.status, obj.type, obj.tvdb_id, "|".join([str(c) for c in obj.countries]), "|".join([str(s) for s in obj.seasons]),
-                    expiration_date.strftime("%Y-%m-%d"), obj.tmdb_id
-                ))
+        with self._writer("tmdb_show_data", "tmdb_id", obj.tmdb_id) as cursor:
+            cursor.execute("INSERT OR IGNORE INTO tmdb_show_data(tmdb_id) VALUES(?)", (obj.tmdb_id,))
+            update_sql = "UPDATE tmdb_show_data SET title = ?, original_title = ?, studio = ?, overview = ?, tagline = ?, imdb_id = ?, " \
+                         "poster_url = ?, backdrop_url = ?, vote_count = ?, vote_average = ?, language_iso = ?, " \
+                         "language_name = ?, genres = ?, keywords = ?, first_air_date = ?, last_air_date = ?, status = ?, " \
+                         "type = ?, tvdb_id = ?, countries = ?, seasons = ?, expiration_date = ? WHERE tmdb_id = ?"
+            cursor.execute(update_sql, (
+                obj.title, obj.original_title, obj.studio, obj.overview, obj.tagline, obj.imdb_id, obj.poster_url, obj.backdrop_url,
+                obj.vote_count, obj.vote_average, obj.language_iso, obj.language_name, "|".join(obj.genres), "|".join(obj.keywords),
+                obj.first_air_date.strftime("%Y-%m-%d") if obj.first_air_date else None,
+                obj.last_air_date.strftime("%Y-%m-%d") if obj.last_air_date else None,
+                obj.status, obj.type, obj.tvdb_id, "|".join([str(c) for c in obj.countries]), "|".join([str(s) for s in obj.seasons]),
+                int(expiration_date.timestamp()), obj.tmdb_id
+            ))
 
+    @lru_query("tvdb_data3")
     def query_tvdb(self, tvdb_id, is_movie, expiration):
         tvdb_dict = {}
         expired = None
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
+        with self._connection() as connection:
             with closing(connection.cursor()) as cursor:
+                self._check_pending("tvdb_data3", "tvdb_id", tvdb_id)
                 cursor.execute("SELECT * FROM tvdb_data3 WHERE tvdb_id = ? and type = ?", (tvdb_id, "movie" if is_movie else "show"))
                 row = cursor.fetchone()
                 if row:
@@ -701,58 +1178,58 @@ class Cache:
                     tvdb_dict["background_url"] = row["background_url"] if row["background_url"] else ""
                     tvdb_dict["release_date"] = datetime.strptime(row["release_date"], "%Y-%m-%d") if row["release_date"] else None
                     tvdb_dict["genres"] = row["genres"] if row["genres"] else ""
-                    datetime_object = datetime.strptime(row["expiration_date"], "%Y-%m-%d")
+                    datetime_object = datetime.fromtimestamp(row["expiration_date"])
                     time_between_insertion = datetime.now() - datetime_object
                     expired = time_between_insertion.days > expiration
         return tvdb_dict, expired
 
     def update_tvdb(self, expired, obj, expiration):
+        self._lru_invalidate("tvdb_data3", obj.tvdb_id)
         expiration_date = datetime.now() if expired is True else (datetime.now() - timedelta(days=random.randint(1, expiration)))
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
-            with closing(connection.cursor()) as cursor:
-                cursor.execute("INSERT OR IGNORE INTO tvdb_data3(tvdb_id, type) VALUES(?, ?)", (obj.tvdb_id, "movie" if obj.is_movie else "show"))
-                update_sql = "UPDATE tvdb_data3 SET title = ?, summary = ?, poster_url = ?, background_url = ?, " \
-                             "release_date = ?, genres = ?, expiration_date = ? WHERE tvdb_id = ? AND type = ?"
-                tvdb_date = f"{str(obj.release_date.year).zfill(4)}-{str(obj.release_date.month).zfill(2)}-{str(obj.release_date.day).zfill(2)}" if obj.release_date else None
-                cursor.execute(update_sql, (
-                    obj.title, obj.summary, obj.poster_url, obj.background_url, tvdb_date, "|".join(obj.genres),
-                    expiration_date.strftime("%Y-%m-%d"), obj.tvdb_id, "movie" if obj.is_movie else "show"
-                ))
+        with self._writer("tvdb_data3", "tvdb_id", obj.tvdb_id) as cursor:
+            cursor.execute("INSERT OR IGNORE INTO tvdb_data3(tvdb_id, type) VALUES(?, ?)", (obj.tvdb_id, "movie" if obj.is_movie else "show"))
+            update_sql = "UPDATE tvdb_data3 SET title = ?, summary = ?, poster_url = ?, background_url = ?, " \
+                         "release_date = ?, genres = ?, expiration_date = ? WHERE tvdb_id = ? AND type = ?"
+            tvdb_date = f"{str(obj.release_date.year).zfill(4)}-{str(obj.release_date.month).zfill(2)}-{str(obj.release_date.day).zfill(2)}" if obj.release_date else None
+            cursor.execute(update_sql, (
+                obj.title, obj.summary, obj.poster_url, obj.background_url, tvdb_date, "|".join(obj.genres),
+                int(expiration_date.timestamp()), obj.tvdb_id, "movie" if obj.is_movie else "show"
+            ))
 
+    @lru_query("tvdb_map")
     def query_tvdb_map(self, tvdb_url, expiration):
         tvdb_id = None
         expired = None
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
+        with self._connection() as connection:
             with closing(connection.cursor()) as cursor:
+                self._check_pending("tvdb_map", "tvdb_url", tvdb_url)
                 cursor.execute("SELECT * FROM tvdb_map WHERE tvdb_url = ?", (tvdb_url, ))
                 row = cursor.fetchone()
                 if row:
                     tvdb_id = int(row["tvdb_id"]) if row["tvdb_id"] else None
-                    datetime_object = datetime.strptime(row["expiration_date"], "%Y-%m-%d")
+                    datetime_object = datetime.fromtimestamp(row["expiration_date"])
                     time_between_insertion = datetime.now() - datetime_object
                     expired = time_between_insertion.days > expiration
         return tvdb_id, expired
 
     def update_tvdb_map(self, expired, tvdb_url, tvdb_id, expiration):
+        self._lru_invalidate("tvdb_map", tvdb_url)
         expiration_date = datetime.now() if expired is True else (datetime.now() - timedelta(days=random.randint(1, expiration)))
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
-            with closing(connection.cursor()) as cursor:
-                cursor.execute("INSERT OR IGNORE INTO tvdb_map(tvdb_url) VALUES(?)", (tvdb_url, ))
-                cursor.execute("UPDATE tvdb_map SET tvdb_id = ?, expiration_date = ? WHERE tvdb_url = ?", (tvdb_id, expiration_date.strftime("%Y-%m-%d"), tvdb_url))
+        with self._writer("tvdb_map", "tvdb_url", tvdb_url) as cursor:
+            cursor.execute("INSERT OR IGNORE INTO tvdb_map(tvdb_url) VALUES(?)", (tvdb_url, ))
+            cursor.execute("UPDATE tvdb_map SET tvdb_id = ?, expiration_date = ? WHERE tvdb_url = ?", (tvdb_id, int(expiration_date.timestamp()), tvdb_url))
 
+    @lru_query("anime_map")
     def query_anime_map(self, anime_id, id_type):
         ids = None
         expired = None
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
+        with self._connection() as connection:
             with closing(connection.cursor()) as cursor:
+                self._check_pending("anime_map", id_type, anime_id)
                 cursor.execute(f"SELECT * FROM anime_map WHERE {id_type} = ?", (anime_id, ))
                 row = cursor.fetchone()
                 if row and row["anidb"]:
-                    datetime_object = datetime.strptime(row["expiration_date"], "%Y-%m-%d")
+                    datetime_object = datetime.fromtimestamp(row["expiration_date"])
                     time_between_insertion = datetime.now() - datetime_object
                     ids = {
                         "anilist": int(row["anilist"]) if row["anilist"] else None,
@@ -764,17 +1241,15 @@ class Cache:
         return ids, expired
 
     def update_anime_map(self, expired, anime_ids):
+        self._lru_invalidate("anime_map", *anime_ids.values())
         expiration_date = datetime.now() if expired is True else (datetime.now() - timedelta(days=random.randint(1, self.expiration)))
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
-            with closing(connection.cursor()) as cursor:
-                cursor.execute("INSERT OR IGNORE INTO anime_map(anidb) VALUES(?)", (anime_ids["anidb"],))
-                cursor.execute("UPDATE anime_map SET anilist = ?, myanimelist = ?, kitsu = ?, expiration_date = ? WHERE anidb = ?", (anime_ids["anidb"], anime_ids["myanimelist"], anime_ids["kitsu"], expiration_date.strftime("%Y-%m-%d"), anime_ids["anidb"]))
+        with self._writer("anime_map", "anidb", anime_ids["anidb"]) as cursor:
+            cursor.execute("INSERT OR IGNORE INTO anime_map(anidb) VALUES(?)", (anime_ids["anidb"],))
+            cursor.execute("UPDATE anime_map SET anilist = ?, myanimelist = ?, kitsu = ?, expiration_date = ? WHERE anidb = ?", (anime_ids["anidb"], anime_ids["myanimelist"], anime_ids["kitsu"], int(expiration_date.timestamp()), anime_ids["anidb"]))
 
     def get_image_table_name(self, library):
         table_name = None
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
+        with self._connection() as connection:
             with closing(connection.cursor()) as cursor:
                 cursor.execute(f"SELECT * FROM image_maps WHERE library = ?", (library,))
                 row = cursor.fetchone()
@@ -820,10 +1295,11 @@ class Cache:
                         )
         return table_name
 
+    @lru_query(lambda rating_key, table_name: table_name)
     def query_image_map(self, rating_key, table_name):
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
+        with self._connection() as connection:
             with closing(connection.cursor()) as cursor:
+                self._check_pending(table_name, "rating_key", rating_key)
                 cursor.execute(f"SELECT * FROM {table_name} WHERE rating_key = ?", (rating_key,))
                 row = cursor.fetchone()
                 if row:
@@ -831,11 +1307,10 @@ class Cache:
         return None, None, None
 
     def update_image_map(self, rating_key, table_name, location, compare, overlay=""):
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
-            with closing(connection.cursor()) as cursor:
-                cursor.execute(f"INSERT OR IGNORE INTO {table_name}(rating_key) VALUES(?)", (rating_key,))
-                cursor.execute(f"UPDATE {table_name} SET location = ?, compare = ?, overlay = ? WHERE rating_key = ?", (location, compare, overlay, rating_key))
+        self._lru_invalidate(table_name, rating_key)
+        with self._writer(table_name, "rating_key", rating_key) as cursor:
+            cursor.execute(f"INSERT OR IGNORE INTO {table_name}(rating_key) VALUES(?)", (rating_key,))
+            cursor.execute(f"UPDATE {table_name} SET location = ?, compare = ?, overlay = ? WHERE rating_key = ?", (location, compare, overlay, rating_key))
 
     def query_radarr_adds(self, tmdb_id, library):
         return self.query_arr_adds(tmdb_id, library, "radarr", "tmdb_id")
@@ -843,10 +1318,11 @@ class Cache:
     def query_sonarr_adds(self, tvdb_id, library):
         return self.query_arr_adds(tvdb_id, library, "sonarr", "tvdb_id")
 
+    @lru_query(lambda t_id, library, arr, id_type: f"{arr}_adds")
     def query_arr_adds(self, t_id, library, arr, id_type):
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
+        with self._connection() as connection:
             with closing(connection.cursor()) as cursor:
+                self._check_pending(f"{arr}_adds", id_type, t_id)
                 cursor.execute(f"SELECT * FROM {arr}_adds WHERE {id_type} = ? AND library = ?", (t_id, library))
                 row = cursor.fetchone()
                 if row and row[id_type]:
@@ -860,71 +1336,164 @@ class Cache:
         return self.update_arr_adds(tvdb_id, library, "sonarr", "tvdb_id")
 
     def update_arr_adds(self, t_id, library, arr, id_type):
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
-            with closing(connection.cursor()) as cursor:
-                cursor.execute(f"INSERT OR IGNORE INTO {arr}_adds({id_type}, library) VALUES(?, ?)", (t_id, library))
+        self._lru_invalidate(f"{arr}_adds", t_id)
+        with self._writer(f"{arr}_adds", id_type, t_id) as cursor:
+            cursor.execute(f"INSERT OR IGNORE INTO {arr}_adds({id_type}, library) VALUES(?, ?)", (t_id, library))
 
     def update_list_cache(self, list_type, list_data, expired, expiration):
+        self._lru_invalidate("list_cache", list_data)
         list_key = None
         expiration_date = datetime.now() if expired is True else (datetime.now() - timedelta(days=expiration))
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
+        with self._writer("list_cache", "list_data", list_data) as cursor:
+            cursor.execute(f"INSERT OR IGNORE INTO list_cache(list_type, list_data) VALUES(?, ?)", (list_type, list_data))
+            cursor.execute(f"UPDATE list_cache SET expiration_date = ?, expiration = ? WHERE list_type = ? AND list_data = ?", (int(expiration_date.timestamp()), expiration, list_type, list_data))
+        with self._connection() as connection:
             with closing(connection.cursor()) as cursor:
-                cursor.execute(f"INSERT OR IGNORE INTO list_cache(list_type, list_data) VALUES(?, ?)", (list_type, list_data))
-                cursor.execute(f"UPDATE list_cache SET expiration_date = ? WHERE list_type = ? AND list_data = ?", (expiration_date.strftime("%Y-%m-%d"), list_type, list_data))
+                self._check_pending("list_cache", "list_data", list_data)
                 cursor.execute(f"SELECT * FROM list_cache WHERE list_type = ? AND list_data = ?", (list_type, list_data))
                 row = cursor.fetchone()
                 if row and row["key"]:
                     list_key = row["key"]
         return list_key
 
+    @lru_query("list_cache", key_index=1)
     def query_list_cache(self, list_type, list_data, expiration):
         list_key = None
         expired = None
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
+        with self._connection() as connection:
             with closing(connection.cursor()) as cursor:
+                self._check_pending("list_cache", "list_data", list_data)
                 cursor.execute(f"SELECT * FROM list_cache WHERE list_type = ? AND list_data = ?", (list_type, list_data))
                 row = cursor.fetchone()
                 if row and row["key"]:
-                    datetime_object = datetime.strptime(row["expiration_date"], "%Y-%m-%d")
+                    datetime_object = datetime.fromtimestamp(row["expiration_date"])
                     time_between_insertion = datetime.now() - datetime_object
                     list_key = row["key"]
                     expired = time_between_insertion.days > expiration
         return list_key, expired
 
     def update_list_ids(self, list_key, media_ids):
-        final_ids = []
+        compressor = zlib.compressobj()
+        chunks = []
         for media_id, media_type in media_ids:
-            final_ids.append((list_key, media_id, media_type))
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
+            chunks.append(compressor.compress(f"{self._encode_id(media_id)}\t{self._encode_id(media_type)}\n".encode("utf-8")))
+        chunks.append(compressor.flush())
+        with self._writer("list_blobs", "list_key", list_key, replace=True) as cursor:
+            cursor.execute("DELETE FROM list_ids WHERE list_key = ?", (list_key,))
+            cursor.execute("INSERT OR IGNORE INTO list_blobs(list_key) VALUES(?)", (list_key,))
+            cursor.execute("UPDATE list_blobs SET version = ?, data = ? WHERE list_key = ?", (LIST_BLOB_VERSION, sqlite3.Binary(b"".join(chunks)), list_key))
+
+    def _encode_id(self, value):
+        return "\0" if value is None else str(value)
+
+    def _decode_id(self, value):
+        return None if value == "\0" else value
+
+    def iter_list_ids(self, list_key):
+        data = None
+        rows = []
+        with self._connection() as connection:
             with closing(connection.cursor()) as cursor:
-                cursor.executemany(f"INSERT OR IGNORE INTO list_ids(list_key, media_id, media_type) VALUES(?, ?, ?)", final_ids)
+                self._check_pending("list_blobs", "list_key", list_key)
+                cursor.execute("SELECT * FROM list_blobs WHERE list_key = ?", (list_key,))
+                row = cursor.fetchone()
+                if row and row["version"] == LIST_BLOB_VERSION:
+                    data = memoryview(row["data"])
+                else:
+                    cursor.execute(f"SELECT * FROM list_ids WHERE list_key = ?", (list_key,))
+                    rows = [(r["media_id"], r["media_type"]) for r in cursor.fetchall()]
+        if data is None:
+            yield from rows
+            return
+        decompressor = zlib.decompressobj()
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        leftover = ""
+        for i in range(0, len(data), 65536):
+            lines = (leftover + decoder.decode(decompressor.decompress(data[i:i + 65536]))).split("\n")
+            leftover = lines.pop()
+            yield from self._parse_ids(lines)
+        yield from self._parse_ids((leftover + decoder.decode(decompressor.flush(), final=True)).split("\n"))
+
+    def _parse_ids(self, lines):
+        for line in lines:
+            if line:
+                media_id, media_type = line.split("\t")
+                yield self._decode_id(media_id), self._decode_id(media_type)
 
     def query_list_ids(self, list_key):
-        ids = []
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
-            with closing(connection.cursor()) as cursor:
-                cursor.execute(f"SELECT * FROM list_ids WHERE list_key = ?", (list_key,))
-                for row in cursor:
-                    ids.append((row["media_id"], row["media_type"]))
-        return ids
+        return CachedIds(self, list_key)
 
     def delete_list_ids(self, list_key):
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
+        with self._writer("list_blobs", "list_key", list_key, replace=True) as cursor:
+            cursor.execute(f"DELETE FROM list_ids WHERE list_key = ?", (list_key,))
+            cursor.execute(f"DELETE FROM list_blobs WHERE list_key = ?", (list_key,))
+
+    def query_library_snapshot(self, library):
+        snapshot = {}
+        full_sync = None
+        with self._connection() as connection:
             with closing(connection.cursor()) as cursor:
-                cursor.execute(f"DELETE FROM list_ids WHERE list_key = ?", (list_key,))
+                self._check_pending("library_snapshots", "library", library)
+                cursor.execute("SELECT * FROM library_syncs WHERE library = ?", (library,))
+                row = cursor.fetchone()
+                if row and row["full_sync"]:
+                    full_sync = datetime.fromtimestamp(row["full_sync"])
+                    cursor.execute("SELECT rating_key, guid, updated_at FROM library_snapshots WHERE library = ?", (library,))
+                    snapshot = {r["rating_key"]: (r["guid"], r["updated_at"]) for r in cursor}
+        return snapshot, full_sync
+
+    def update_library_snapshot(self, library, items, full=False, removed=None):
+        with self._writer("library_snapshots", "library", library, replace=full) as cursor:
+            if removed:
+                cursor.executemany("DELETE FROM library_snapshots WHERE library = ? AND rating_key = ?", [(library, rating_key) for rating_key in removed])
+            if full:
+                cursor.execute("DELETE FROM library_snapshots WHERE library = ?", (library,))
+                cursor.execute("INSERT OR IGNORE INTO library_syncs(library) VALUES(?)", (library,))
+                cursor.execute("UPDATE library_syncs SET full_sync = ? WHERE library = ?", (int(datetime.now().timestamp()), library))
+            cursor.executemany("INSERT OR REPLACE INTO library_snapshots(library, rating_key, guid, updated_at) VALUES(?, ?, ?, ?)",
+                               [(library, rating_key, guid, updated_at) for rating_key, guid, updated_at in items])
 
+    def query_asset_listings(self):
+        if self._asset_listings is None:
+            self.flush()
+            with self._connection() as connection:
+                with closing(connection.cursor()) as cursor:
+                    cursor.execute("SELECT directory, mtime, entries, scanned FROM asset_listings")
+                    self._asset_listings = {row["directory"]: (row["mtime"], [tuple(e) for e in json.loads(row["entries"])], row["scanned"]) for row in cursor}
+        return self._asset_listings
+
+    def update_asset_listing(self, directory, mtime, entries, scanned):
+        self.query_asset_listings()[directory] = (mtime, entries, scanned)
+        with self._writer("asset_listings", "directory", directory) as cursor:
+            cursor.execute("INSERT OR IGNORE INTO asset_listings(directory) VALUES(?)", (directory,))
+            cursor.execute("UPDATE asset_listings SET mtime = ?, entries = ?, scanned = ? WHERE directory = ?", (mtime, json.dumps(entries), scanned, directory))
+
+    @lru_query("image_fingerprints")
+    def query_image_fingerprint(self, location):
+        with self._connection() as connection:
+            with closing(connection.cursor()) as cursor:
+                self._check_pending("image_fingerprints", "location", location)
+                cursor.execute("SELECT * FROM image_fingerprints WHERE location = ?", (location,))
+                row = cursor.fetchone()
+                if row:
+                    expired = not row["expiration_date"] or (datetime.now() - datetime.fromtimestamp(row["expiration_date"])).days > self.expiration
+                    return row["size"], row["mtime"], row["etag"], row["last_modified"], row["fingerprint"], expired
+        return None
+
+    def update_image_fingerprint(self, location, fingerprint, size=None, mtime=None, etag=None, last_modified=None):
+        self._lru_invalidate("image_fingerprints", location)
+        with self._writer("image_fingerprints", "location", location) as cursor:
+            cursor.execute("INSERT OR IGNORE INTO image_fingerprints(location) VALUES(?)", (location,))
+            cursor.execute("UPDATE image_fingerprints SET size = ?, mtime = ?, etag = ?, last_modified = ?, fingerprint = ?, expiration_date = ? WHERE location = ?",
+                           (size, mtime, etag, last_modified, fingerprint, int(datetime.now().timestamp()), location))
+
+    @lru_query("imdb_parental")
     def query_imdb_parental(self, imdb_id, expiration):
         imdb_dict = {}
         expired = None
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
+        with self._connection() as connection:
             with closing(connection.cursor()) as cursor:
+                self._check_pending("imdb_parental", "imdb_id", imdb_id)
                 cursor.execute("SELECT * FROM imdb_parental WHERE imdb_id = ?", (imdb_id,))
                 row = cursor.fetchone()
                 if row:
@@ -933,28 +1502,28 @@ class Cache:
                     imdb_dict["profanity"] = row["profanity"] if row["profanity"] else "None"
                     imdb_dict["alcohol"] = row["alcohol"] if row["alcohol"] else "None"
                     imdb_dict["frightening"] = row["frightening"] if row["frightening"] else "None"
-                    datetime_object = datetime.strptime(row["expiration_date"], "%Y-%m-%d")
+                    datetime_object = datetime.fromtimestamp(row["expiration_date"])
                     time_between_insertion = datetime.now() - datetime_object
                     expired = time_between_insertion.days > expiration
         return imdb_dict, expired
 
     def update_imdb_parental(self, expired, imdb_id, parental, expiration):
+        self._lru_invalidate("imdb_parental", imdb_id)
         expiration_date = datetime.now() if expired is True else (datetime.now() - timedelta(days=random.randint(1, expiration)))
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
-            with closing(connection.cursor()) as cursor:
-                cursor.execute("INSERT OR IGNORE INTO imdb_parental(imdb_id) VALUES(?)", (imdb_id,))
-                update_sql = "UPDATE imdb_parental SET nudity = ?, violence = ?, profanity = ?, alcohol = ?, " \
-                             "frightening = ?, expiration_date = ? WHERE imdb_id = ?"
-                cursor.execute(update_sql, (parental["nudity"], parental["violence"], parental["profanity"], parental["alcohol"],
-                                            parental["frightening"], expiration_date.strftime("%Y-%m-%d"), imdb_id))
+        with self._writer("imdb_parental", "imdb_id", imdb_id) as cursor:
+            cursor.execute("INSERT OR IGNORE INTO imdb_parental(imdb_id) VALUES(?)", (imdb_id,))
+            update_sql = "UPDATE imdb_parental SET nudity = ?, violence = ?, profanity = ?, alcohol = ?, " \
+                         "frightening = ?, expiration_date = ? WHERE imdb_id = ?"
+            cursor.execute(update_sql, (parental["nudity"], parental["violence"], parental["profanity"], parental["alcohol"],
+                                        parental["frightening"], int(expiration_date.timestamp()), imdb_id))
 
+    @lru_query("ergast_race")
     def query_ergast(self, year, expiration):
         ergast_list = []
         expired = None
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
+        with self._connection() as connection:
             with closing(connection.cursor()) as cursor:
+                self._check_pending("ergast_race", "season", year)
                 cursor.execute("SELECT * FROM ergast_race WHERE season = ?", (year,))
                 for row in cursor.fetchall():
                     if row:
@@ -965,27 +1534,27 @@ class Cache:
                             "date": row["date"] if row["date"] else None
                         })
                         if not expired:
-                            datetime_object = datetime.strptime(row["expiration_date"], "%Y-%m-%d")
+                            datetime_object = datetime.fromtimestamp(row["expiration_date"])
                             time_between_insertion = datetime.now() - datetime_object
                             expired = time_between_insertion.days > expiration
         return ergast_list, expired
 
     def update_ergast(self, expired, season, races, expiration):
+        self._lru_invalidate("ergast_race", season)
         expiration_date = datetime.now() if expired is True else (datetime.now() - timedelta(days=random.randint(1, expiration)))
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
-            with closing(connection.cursor()) as cursor:
-                cursor.execute("DELETE FROM ergast_race WHERE season = ?", (season,))
-                cursor.executemany("INSERT OR IGNORE INTO ergast_race(season, round) VALUES(?, ?)", [(r.season, r.round) for r in races])
-                cursor.executemany("UPDATE ergast_race SET name = ?, date = ?, expiration_date = ? WHERE season = ? AND round = ?",
-                                   [(r.name, r.date.strftime("%Y-%m-%d") if r.date else None,
-                                     expiration_date.strftime("%Y-%m-%d"), r.season, r.round) for r in races])
+        with self._writer("ergast_race", "season", season, replace=True) as cursor:
+            cursor.execute("DELETE FROM ergast_race WHERE season = ?", (season,))
+            cursor.executemany("INSERT OR IGNORE INTO ergast_race(season, round) VALUES(?, ?)", [(r.season, r.round) for r in races])
+            cursor.executemany("UPDATE ergast_race SET name = ?, date = ?, expiration_date = ? WHERE season = ? AND round = ?",
+                               [(r.name, r.date.strftime("%Y-%m-%d") if r.date else None,
+                                 int(expiration_date.timestamp()), r.season, r.round) for r in races])
 
+    @lru_query("overlay_special_text")
     def query_overlay_special_text(self, rating_key):
         attrs = {}
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
+        with self._connection() as connection:
             with closing(connection.cursor()) as cursor:
+                self._check_pending("overlay_special_text", "rating_key", rating_key)
                 cursor.execute("SELECT * FROM overlay_special_text WHERE rating_key = ?", (rating_key, ))
                 for row in cursor.fetchall():
                     if row:
@@ -993,19 +1562,19 @@ class Cache:
         return attrs
 
     def update_overlay_special_text(self, rating_key, data_type, text):
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
-            with closing(connection.cursor()) as cursor:
-                cursor.execute("INSERT OR IGNORE INTO overlay_special_text(rating_key, type) VALUES(?, ?)", (rating_key, data_type))
-                cursor.execute("UPDATE overlay_special_text SET text = ? WHERE rating_key = ? AND type = ?", (text, rating_key, data_type))
+        self._lru_invalidate("overlay_special_text", rating_key)
+        with self._writer("overlay_special_text", "rating_key", rating_key) as cursor:
+            cursor.execute("INSERT OR IGNORE INTO overlay_special_text(rating_key, type) VALUES(?, ?)", (rating_key, data_type))
+            cursor.execute("UPDATE overlay_special_text SET text = ? WHERE rating_key = ? AND type = ?", (text, rating_key, data_type))
 
+    @lru_query("testing")
     def query_testing(self, name):
         value1 = None
         value2 = None
         success = None
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
+        with self._connection() as connection:
             with closing(connection.cursor()) as cursor:
+                self._check_pending("testing", "name", name)
                 cursor.execute(f"SELECT * FROM testing WHERE name = ?", (name,))
                 row = cursor.fetchone()
                 if row:
@@ -1015,9 +1584,38 @@ class Cache:
         return value1, value2, success
 
     def update_testing(self, name, value1, value2, success):
-        with sqlite3.connect(self.cache_path) as connection:
-            connection.row_factory = sqlite3.Row
-            with closing(connection.cursor()) as cursor:
-                cursor.execute(f"INSERT OR IGNORE INTO testing(name) VALUES(?)", (name,))
-                sql = f"UPDATE testing SET value1 = ?, value2 = ?, success = ? WHERE name = ?"
-                cursor.execute(sql, (value1, value2, success, name))
+        self._lru_invalidate("testing", name)
+        with self._writer("testing", "name", name) as cursor:
+            cursor.execute(f"INSERT OR IGNORE INTO testing(name) VALUES(?)", (name,))
+            sql = f"UPDATE testing SET value1 = ?, value2 = ?, success = ? WHERE name = ?"
+            cursor.execute(sql, (value1, value2, success, name))
+
+
+class CachedIds:
+    def __init__(self, cache, list_key):
+        self.cache = cache
+        self.list_key = list_key
+        self._length = None
+
+    def __iter__(self):
+        return self.cache.iter_list_ids(self.list_key)
+
+    def __len__(self):
+        if self._length is None:
+            self._length = sum(1 for _ in self)
+        return self._length
+
+    def __repr__(self):
+        return repr(list(self))
+
+
+class _BufferedCursor:
+    def __init__(self):
+        self.statements = []
+
+    def execute(self, sql, params=()):
+        self.statements.append((sql, tuple(params)))
+
+    def executemany(self, sql, seq_of_params):
+        for params in seq_of_params:
+            self.execute(sql, params)
@@ -19,6 +19,7 @@ from modules.omdb import OMDb
 from modules.overlays import Overlays
 from modules.plex import Plex
 from modules.radarr import Radarr
+from modules.retries import retry
 from modules.sonarr import Sonarr
 from modules.reciperr import Reciperr
 from modules.mdblist import Mdblist
@@ -28,7 +29,6 @@ from modules.trakt import Trakt
 from modules.tvdb import TVDb
 from modules.util import Failed, NotScheduled, NotScheduledRange, YAML
 from modules.webhooks import Webhooks
-from retrying import retry
 
 logger = util.logger
 
@@ -333,6 +333,8 @@ class ConfigFile:
         self.general = {
             "cache": check_for_attribute(self.data, "cache", parent="settings", var_type="bool", default=True),
             "cache_expiration": check_for_attribute(self.data, "cache_expiration", parent="settings", var_type="int", default=60, int_min=1),
+            "cache_write_behind": check_for_attribute(self.data, "cache_write_behind", parent="settings", var_type="bool", default=False),
+            "cache_refresh_budget": check_for_attribute(self.data, "cache_refresh_budget", parent="settings", var_type="int", default=100, int_min=1),
             "asset_directory": check_for_attribute(self.data, "asset_directory", parent="settings", var_type="list_path", default_is_none=True),
             "asset_folders": check_for_attribute(self.data, "asset_folders", parent="settings", var_type="bool", default=True),
             "asset_depth": check_for_attribute(self.data, "asset_depth", parent="settings", var_type="int", default=0),
@@ -348,6 +350,10 @@ class ConfigFile:
             "default_collection_order": check_for_attribute(self.data, "default_collection_order", parent="settings", default_is_none=True),
             "minimum_items": check_for_attribute(self.data, "minimum_items", parent="settings", var_type="int", default=1),
             "item_refresh_delay": check_for_attribute(self.data, "item_refresh_delay", parent="settings", var_type="int", default=0),
+            "load_threads": check_for_attribute(self.data, "load_threads", parent="settings", var_type="int", default=4, int_min=1),
+            "upload_threads": check_for_attribute(self.data, "upload_threads", parent="settings", var_type="int", default=4, int_min=1),
+            "delta_sync": check_for_attribute(self.data, "delta_sync", parent="settings", var_type="bool", default=False),
+            "delta_full_resync": check_for_attribute(self.data, "delta_full_resync", parent="settings", var_type="int", default=7, int_min=1),
             "delete_below_minimum": check_for_attribute(self.data, "delete_below_minimum", parent="settings", var_type="bool", default=False),
             "delete_not_scheduled": check_for_attribute(self.data, "delete_not_scheduled", parent="settings", var_type="bool", default=False),
             "run_again_delay": check_for_attribute(self.data, "run_again_delay", parent="settings", var_type="int", default=0),
@@ -387,7 +393,7 @@ class ConfigFile:
 
         if self.general["cache"]:
             logger.separator()
-            self.Cache = Cache(self.config_path, self.general["cache_expiration"])
+            self.Cache = Cache(self.config_path, self.general["cache_expiration"], write_behind=self.general["cache_write_behind"])
         else:
             self.Cache = None
         self.GitHub = GitHub(self)
@@ -679,6 +685,10 @@ class ConfigFile:
                 params["show_asset_not_needed"] = check_for_attribute(lib, "show_asset_not_needed", parent="settings", var_type="bool", default=self.general["show_asset_not_needed"], do_print=False, save=False)
                 params["minimum_items"] = check_for_attribute(lib, "minimum_items", parent="settings", var_type="int", default=self.general["minimum_items"], do_print=False, save=False)
                 params["item_refresh_delay"] = check_for_attribute(lib, "item_refresh_delay", parent="settings", var_type="int", default=self.general["item_refresh_delay"], do_print=False, save=False)
+                params["load_threads"] = check_for_attribute(lib, "load_threads", parent="settings", var_type="int", default=self.general["load_threads"], int_min=1, do_print=False, save=False)
+                params["upload_threads"] = check_for_attribute(lib, "upload_threads", parent="settings", var_type="int", default=self.general["upload_threads"], int_min=1, do_print=False, save=False)
+                params["delta_sync"] = check_for_attribute(lib, "delta_sync", parent="settings", var_type="bool", default=self.general["delta_sync"], do_print=False, save=False)
+                params["delta_full_resync"] = check_for_attribute(lib, "delta_full_resync", parent="settings", var_type="int", default=self.general["delta_full_resync"], int_min=1, do_print=False, save=False)
                 params["delete_below_minimum"] = check_for_attribute(lib, "delete_below_minimum", parent="settings", var_type="bool", default=self.general["delete_below_minimum"], do_print=False, save=False)
                 params["delete_not_scheduled"] = check_for_attribute(lib, "delete_not_scheduled", parent="settings", var_type="bool", default=self.general["delete_not_scheduled"], do_print=False, save=False)
                 params["ignore_ids"] = check_for_attribute(lib, "ignore_ids", parent="settings", var_type="int_list", default_is_none=True, do_print=False, save=False)
@@ -982,7 +992,7 @@ class ConfigFile:
     def get_json(self, url, json=None, headers=None, params=None):
         return self.get(url, json=json, headers=headers, params=params).json()
 
-    @retry(stop_max_attempt_number=6, wait_fixed=10000)
+    @retry("http")
     def get(self, url, json=None, headers=None, params=None):
         return self.session.get(url, json=json, headers=headers, params=params)
 
@@ -995,6 +1005,6 @@ class ConfigFile:
     def post_json(self, url, data=None, json=None, headers=None):
         return self.post(url, data=data, json=json, headers=headers).json()
 
-    @retry(stop_max_attempt_number=6, wait_fixed=10000)
+    @retry("http")
     def post(self, url, data=None, json=None, headers=None):
         return self.session.post(url, data=data, json=json, headers=headers)
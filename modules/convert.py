@@ -206,13 +206,15 @@ class Convert:
         else:
             return None
 
-    def ids_from_cache(self, ratingKey, guid, item_type, check_id, library):
+    def ids_from_cache(self, ratingKey, guid, item_type, check_id, library, cache_data=None):
         media_id_type = None
         cache_id = None
         imdb_check = None
         expired = None
         if self.config.Cache:
-            cache_id, imdb_check, media_type, expired = self.config.Cache.query_guid_map(guid)
+            if cache_data is None:
+                cache_data = self.config.Cache.query_guid_map(guid)
+            cache_id, imdb_check, media_type, expired = cache_data
             if (cache_id or imdb_check) and not expired:
                 media_id_type = "movie" if "movie" in media_type else "show"
                 if item_type == "hama" and check_id.startswith("anidb"):
@@ -222,18 +224,24 @@ class Convert:
                     library.mal_map[int(check_id)] = ratingKey
         return media_id_type, cache_id, imdb_check, expired
 
+    def cache_fresh(self, cache_data):
+        if not cache_data:
+            return False
+        cache_id, imdb_check, _, expired = cache_data
+        return bool(cache_id or imdb_check) and expired is False
+
     def scan_guid(self, guid_str):
         guid = requests.utils.urlparse(guid_str)
         return guid.scheme.split(".")[-1], guid.netloc
 
-    def get_id(self, item, library):
+    def get_id(self, item, library, cache_data=None):
         expired = None
         tmdb_id = []
         tvdb_id = []
         imdb_id = []
         anidb_id = None
         item_type, check_id = self.scan_guid(item.guid)
-        media_id_type, cache_id, imdb_check, expired = self.ids_from_cache(item.ratingKey, item.guid, item_type, check_id, library)
+        media_id_type, cache_id, imdb_check, expired = self.ids_from_cache(item.ratingKey, item.guid, item_type, check_id, library, cache_data=cache_data)
         if (cache_id or imdb_check) and expired is False:
             return media_id_type, cache_id, imdb_check
         try:
@@ -1,6 +1,10 @@
-import os
+import os, requests
 from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 from modules import util, operations
+from modules.assets import AssetIndex
 from modules.meta import MetadataFile, OverlayFile
 from modules.operations import Operations
 from modules.util import Failed, NotScheduled, YAML
@@ -31,6 +35,7 @@ class Library(ABC):
         self.movie_rating_key_map = {}
         self.show_rating_key_map = {}
         self.cached_items = {}
+        self.reload_batch_size = 100
         self.run_again = []
         self.overlays_old = []
         self.type = ""
@@ -61,6 +66,15 @@ class Library(ABC):
         self.default_collection_order = params["default_collection_order"]
         self.minimum_items = params["minimum_items"]
         self.item_refresh_delay = params["item_refresh_delay"]
+        self.load_threads = params["load_threads"]
+        self.upload_threads = params["upload_threads"]
+        self.uploads = deque()
+        self.upload_chains = {}
+        self.upload_executor = None
+        self.url_fingerprints = {}
+        self.asset_index = AssetIndex(self.asset_depth, cache=self.config.Cache, probe=self.asset_folders and self.dimensional_asset_rename, threads=self.load_threads)
+        self.delta_sync = params["delta_sync"]
+        self.delta_full_resync = params["delta_full_resync"]
         self.delete_below_minimum = params["delete_below_minimum"]
         self.delete_not_scheduled = params["delete_not_scheduled"]
         self.missing_only_released = params["missing_only_released"]
@@ -159,52 +173,148 @@ class Library(ABC):
                     logger.error(e)
                     logger.info(f"Overlay File Failed To Load")
 
-    def upload_images(self, item, poster=None, background=None, overlay=False):
+    def upload_images(self, item, poster=None, background=None, overlay=False, queue=False):
         poster_uploaded = False
         if poster is not None:
             try:
-                image_compare = None
-                if self.config.Cache:
-                    _, image_compare, _ = self.config.Cache.query_image_map(item.ratingKey, self.image_table_name)
-                if not image_compare or str(poster.compare) != str(image_compare):
+                if self.image_changed(item, poster, self.image_table_name):
                     if hasattr(item, "labels"):
                         test = [la.tag for la in self.item_labels(item)]
                         if overlay and "Overlay" in test:
                             item.removeLabel("Overlay")
                             if isinstance(item._edits, dict):
                                 item.saveEdits()
-                    self._upload_image(item, poster)
-                    poster_uploaded = True
-                    logger.info(f"Detail: {poster.attribute} updated {poster.message}")
+                    if queue:
+                        self.queue_upload(item, lambda: self._upload_image(item, poster, reload=False), lambda: self._image_uploaded(item, poster, self.image_table_name),
+                                          lambda e: self._image_failed(poster))
+                    else:
+                        self._upload_image(item, poster)
+                        poster_uploaded = True
+                        logger.info(f"Detail: {poster.attribute} updated {poster.message}")
                 elif self.show_asset_not_needed:
                     logger.info(f"Detail: {poster.prefix}poster update not needed")
             except Failed:
-                logger.stacktrace()
-                logger.error(f"Detail: {poster.attribute} failed to update {poster.message}")
+                self._image_failed(poster)
 
         background_uploaded = False
         if background is not None:
             try:
-                image_compare = None
-                if self.config.Cache:
-                    _, image_compare, _ = self.config.Cache.query_image_map(item.ratingKey, f"{self.image_table_name}_backgrounds")
-                if not image_compare or str(background.compare) != str(image_compare):
-                    self._upload_image(item, background)
-                    background_uploaded = True
-                    logger.info(f"Detail: {background.attribute} updated {background.message}")
+                if self.image_changed(item, background, f"{self.image_table_name}_backgrounds"):
+                    if queue:
+                        self.queue_upload(item, lambda: self._upload_image(item, background, reload=False), lambda: self._image_uploaded(item, background, f"{self.image_table_name}_backgrounds"),
+                                          lambda e: self._image_failed(background))
+                    else:
+                        self._upload_image(item, background)
+                        background_uploaded = True
+                        logger.info(f"Detail: {background.attribute} updated {background.message}")
                 elif self.show_asset_not_needed:
                     logger.info(f"Detail: {background.prefix}background update not needed")
             except Failed:
-                logger.stacktrace()
-                logger.error(f"Detail: {background.attribute} failed to update {background.message}")
+                self._image_failed(background)
         if self.config.Cache:
             if poster_uploaded:
-                self.config.Cache.update_image_map(item.ratingKey, self.image_table_name, "", poster.compare if poster else "")
+                self.config.Cache.update_image_map(item.ratingKey, self.image_table_name, "", poster.fingerprint or poster.compare)
             if background_uploaded:
-                self.config.Cache.update_image_map(item.ratingKey, f"{self.image_table_name}_backgrounds", "", background.compare)
+                self.config.Cache.update_image_map(item.ratingKey, f"{self.image_table_name}_backgrounds", "", background.fingerprint or background.compare)
 
         return poster_uploaded, background_uploaded
 
+    def _image_uploaded(self, item, image, table_name):
+        try:
+            self.reload(item, force=True)
+        except Failed as e:
+            logger.debug(e)
+        logger.info(f"Detail: {image.attribute} updated {image.message}")
+        if self.config.Cache:
+            self.config.Cache.update_image_map(item.ratingKey, table_name, "", image.fingerprint or image.compare)
+
+    def _image_failed(self, image):
+        logger.stacktrace()
+        logger.error(f"Detail: {image.attribute} failed to update {image.message}")
+
+    def image_changed(self, item, image, table_name):
+        if not self.config.Cache:
+            return True
+        _, image_compare, _ = self.config.Cache.query_image_map(item.ratingKey, table_name)
+        image.fingerprint = self.image_fingerprint(image)
+        if image_compare and image.fingerprint and str(image_compare) == str(image.compare):
+            self.config.Cache.update_image_map(item.ratingKey, table_name, "", image.fingerprint)
+            return False
+        return not image_compare or str(image.fingerprint or image.compare) != str(image_compare)
+
+    def image_fingerprint(self, image):
+        stored = self.config.Cache.query_image_fingerprint(image.location)
+        _size, _mtime, _etag, _modified, _fingerprint, _expired = stored if stored else (None, None, None, None, None, True)
+        try:
+            if not image.is_url:
+                stat = os.stat(image.location)
+                if _fingerprint and _size == stat.st_size and _mtime == stat.st_mtime_ns:
+                    return _fingerprint
+                new_fingerprint = util.file_fingerprint(image.location)
+                self.config.Cache.update_image_fingerprint(image.location, new_fingerprint, size=stat.st_size, mtime=stat.st_mtime_ns)
+                return new_fingerprint
+            if image.location in self.url_fingerprints:
+                return self.url_fingerprints[image.location]
+            if _fingerprint and not _etag and not _modified and not _expired:
+                self.url_fingerprints[image.location] = _fingerprint
+                return _fingerprint
+            headers = {}
+            if _fingerprint and _etag:
+                headers["If-None-Match"] = _etag
+            if _fingerprint and _modified:
+                headers["If-Modified-Since"] = _modified
+            response = self.config.get(image.location, headers=headers)
+            if response.status_code == 304 and _fingerprint:
+                new_fingerprint = _fingerprint
+            elif response.status_code >= 400:
+                raise Failed(f"Image Error: {response.status_code} response from {image.location}")
+            else:
+                new_fingerprint = util.fingerprint(response.content)
+                self.config.Cache.update_image_fingerprint(image.location, new_fingerprint, etag=response.headers.get("ETag"), last_modified=response.headers.get("Last-Modified"))
+            self.url_fingerprints[image.location] = new_fingerprint
+            return new_fingerprint
+        except (Failed, OSError, requests.exceptions.RequestException) as e:
+            logger.debug(f"Fingerprint Error: {e}")
+            return None
+
+    def queue_upload(self, item, upload, success, failure):
+        if self.upload_executor is None:
+            self.upload_executor = ThreadPoolExecutor(max_workers=self.upload_threads)
+        previous = self.upload_chains.get(item.ratingKey)
+
+        def run_upload():
+            if previous:
+                try:
+                    previous.result()
+                except Exception:
+                    pass
+            return upload()
+
+        future = self.upload_executor.submit(run_upload)
+        self.upload_chains[item.ratingKey] = future
+        self.uploads.append((future, success, failure))
+        self._complete_uploads(pending=self.upload_threads * 4)
+
+    def _complete_uploads(self, pending=0):
+        while self.uploads and (self.uploads[0][0].done() or len(self.uploads) > pending):
+            future, success, failure = self.uploads.popleft()
+            try:
+                future.result()
+            except Exception as e:
+                failure(e)
+            else:
+                success()
+
+    def flush_uploads(self):
+        try:
+            self._complete_uploads()
+        finally:
+            self.uploads.clear()
+            self.upload_chains = {}
+            if self.upload_executor is not None:
+                self.upload_executor.shutdown()
+                self.upload_executor = None
+
     def get_id_from_maps(self, key):
         key = str(key)
         if key in self.movie_rating_key_map:
@@ -217,7 +327,7 @@ class Library(ABC):
         pass
 
     @abstractmethod
-    def _upload_image(self, item, image):
+    def _upload_image(self, item, image, reload=True):
         pass
 
     @abstractmethod
@@ -228,6 +338,14 @@ class Library(ABC):
     def reload(self, item, force=False):
         pass
 
+    @abstractmethod
+    def reload_many(self, items, batch_size=None):
+        pass
+
+    @abstractmethod
+    def alter_collection_many(self, items, collection, smart_label_collection=False, add=True, chunk_size=100):
+        pass
+
     @abstractmethod
     def edit_tags(self, attr, obj, add_tags=None, remove_tags=None, sync_tags=None, do_print=True, locked=True, is_locked=None):
         pass
@@ -237,7 +355,35 @@ class Library(ABC):
         pass
 
     @abstractmethod
-    def get_all(self, builder_level=None, load=False):
+    def queue_tag_edits(self):
+        pass
+
+    @abstractmethod
+    def flush_tag_edits(self, stop=True, chunk_size=100):
+        pass
+
+    @abstractmethod
+    def batch_tag_edits(self):
+        pass
+
+    @abstractmethod
+    def remove_all_labels(self, libtype):
+        pass
+
+    @abstractmethod
+    def get_all(self, builder_level=None, load=False, records=False):
+        pass
+
+    @abstractmethod
+    def materialize(self, item, cache=True):
+        pass
+
+    @abstractmethod
+    def get_records(self, rating_keys):
+        pass
+
+    @abstractmethod
+    def sync_items(self):
         pass
 
     def add_additions(self, collection, items, is_movie):
@@ -287,34 +433,58 @@ class Library(ABC):
         logger.info("")
         logger.separator(f"Caching {self.name} Library Items", space=False, border=False)
         logger.info("")
-        items = self.get_all()
+        items = self.get_all(records=True)
         for item in items:
             self.cached_items[item.ratingKey] = (item, False)
         return items
 
     def map_guids(self, items):
-        for i, item in enumerate(items, 1):
-            if isinstance(item, tuple):
-                logger.ghost(f"Processing: {i}/{len(items)}")
-                key, guid = item
-            else:
-                logger.ghost(f"Processing: {i}/{len(items)} {item.title}")
-                key = item.ratingKey
-                guid = item.guid
-            if key not in self.movie_rating_key_map and key not in self.show_rating_key_map:
-                if isinstance(item, tuple):
-                    item_type, check_id = self.config.Convert.scan_guid(guid)
-                    id_type, main_id, imdb_id, _ = self.config.Convert.ids_from_cache(key, guid, item_type, check_id, self)
+        guid_cache = None
+        if self.config.Cache:
+            guid_cache = self.config.Cache.query_guid_map_many([
+                item[1] if isinstance(item, tuple) else item.guid for item in items
+                if (item[0] if isinstance(item, tuple) else item.ratingKey) not in self.movie_rating_key_map
+                   and (item[0] if isinstance(item, tuple) else item.ratingKey) not in self.show_rating_key_map
+            ])
+        if guid_cache is not None:
+            stale = []
+            for item in items:
+                key, guid = item if isinstance(item, tuple) else (item.ratingKey, item.guid)
+                if (isinstance(item, tuple) or item.guids is None) and key not in self.movie_rating_key_map and key not in self.show_rating_key_map \
+                        and not self.config.Convert.cache_fresh(guid_cache.get(guid)):
+                    stale.append(key)
+            if stale:
+                logger.info(f"Loading {len(stale)} {self.type}s with Expired Cache Entries")
+                records = {}
+                for record in self.get_records(stale):
+                    records[record.ratingKey] = record
+                    if record.ratingKey not in self.cached_items:
+                        self.cached_items[record.ratingKey] = (record, False)
+                items = [records.get(item[0] if isinstance(item, tuple) else item.ratingKey, item) for item in items]
+        with self.config.Cache.transaction() if self.config.Cache else nullcontext():
+            for i, item in enumerate(items, 1):
+                if isinstance(item, tuple) or not item.title:
+                    logger.ghost(f"Processing: {i}/{len(items)}")
+                    key, guid = item if isinstance(item, tuple) else (item.ratingKey, item.guid)
                 else:
-                    id_type, main_id, imdb_id = self.config.Convert.get_id(item, self)
-                if main_id:
-                    if id_type == "movie":
-                        self.movie_rating_key_map[key] = main_id[0]
-                        util.add_dict_list(main_id, key, self.movie_map)
-                    elif id_type == "show":
-                        self.show_rating_key_map[key] = main_id[0]
-                        util.add_dict_list(main_id, key, self.show_map)
-                if imdb_id:
-                    util.add_dict_list(imdb_id, key, self.imdb_map)
+                    logger.ghost(f"Processing: {i}/{len(items)} {item.title}")
+                    key = item.ratingKey
+                    guid = item.guid
+                if key not in self.movie_rating_key_map and key not in self.show_rating_key_map:
+                    cache_data = guid_cache.get(guid, (None, None, None, None)) if guid_cache is not None else None
+                    if isinstance(item, tuple) or item.guids is None:
+                        item_type, check_id = self.config.Convert.scan_guid(guid)
+                        id_type, main_id, imdb_id, _ = self.config.Convert.ids_from_cache(key, guid, item_type, check_id, self, cache_data=cache_data)
+                    else:
+                        id_type, main_id, imdb_id = self.config.Convert.get_id(item, self, cache_data=cache_data)
+                    if main_id:
+                        if id_type == "movie":
+                            self.movie_rating_key_map[key] = main_id[0]
+                            util.add_dict_list(main_id, key, self.movie_map)
+                        elif id_type == "show":
+                            self.show_rating_key_map[key] = main_id[0]
+                            util.add_dict_list(main_id, key, self.show_map)
+                    if imdb_id:
+                        util.add_dict_list(imdb_id, key, self.imdb_map)
         logger.info("")
         logger.info(f"Processed {len(items)} {self.type}s")
@@ -724,6 +724,8 @@ class MetadataFile(DataFile):
                         lib_all = library.get_all()
                         for i, item in enumerate(lib_all, 1):
                             logger.ghost(f"Scanning: {i}/{len(lib_all)} {item.title}")
+                            if (i - 1) % self.library.reload_batch_size == 0:
+                                self.library.reload_many(lib_all[i - 1:i - 1 + self.library.reload_batch_size])
                             try:
                                 item = self.library.reload(item)
                                 for person in getattr(item, f"{auto_type}s")[:person_depth]:
@@ -0,0 +1,62 @@
+import json, re, threading
+from urllib.parse import urlparse
+
+id_segment = re.compile(r"^(\d+(,\d+)*|tt\d+|[0-9a-fA-F]{12,}|[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12})$")
+
+class RequestMetrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.phase = "Other"
+        self.endpoints = {}
+
+    def reset(self):
+        with self.lock:
+            self.phase = "Other"
+            self.endpoints = {}
+
+    def normalize(self, url):
+        parsed = urlparse(url)
+        segments = []
+        for segment in parsed.path.split("/"):
+            if segment and id_segment.match(segment):
+                segments.append("{ids}" if "," in segment else "{id}")
+            else:
+                segments.append(segment)
+        return f"{parsed.netloc}{'/'.join(segments)}"
+
+    def record(self, method, url, elapsed, size):
+        key = (self.phase, f"{method} {self.normalize(url)}")
+        with self.lock:
+            if key not in self.endpoints:
+                self.endpoints[key] = {"count": 0, "bytes": 0, "times": []}
+            self.endpoints[key]["count"] += 1
+            self.endpoints[key]["bytes"] += size
+            self.endpoints[key]["times"].append(elapsed)
+
+    def percentile(self, times, percent):
+        ordered = sorted(times)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+    def summary(self):
+        with self.lock:
+            items = list(self.endpoints.items())
+        results = []
+        for (phase, endpoint), data in items:
+            results.append({
+                "phase": phase,
+                "endpoint": endpoint,
+                "count": data["count"],
+                "bytes": data["bytes"],
+                "total": sum(data["times"]),
+                "p50": self.percentile(data["times"], 50),
+                "p95": self.percentile(data["times"], 95),
+                "p99": self.percentile(data["times"], 99),
+                "max": max(data["times"])
+            })
+        return sorted(results, key=lambda r: r["total"], reverse=True)
+
+    def save(self, path):
+        with open(path, "w") as handle:
+            json.dump(self.summary(), handle, indent=2)
+
+metrics = RequestMetrics()
@@ -87,6 +87,8 @@ class Operations:
                 logger.error("Asset Error: No Asset Directory for Assets For All")
 
             for i, item in enumerate(items, 1):
+                if (i - 1) % self.library.reload_batch_size == 0:
+                    self.library.reload_many(items[i - 1:i - 1 + self.library.reload_batch_size])
                 try:
                     item = self.library.reload(item)
                 except Failed as e:
@@ -97,7 +99,7 @@ class Operations:
                 current_labels = [la.tag for la in self.library.item_labels(item)] if self.library.assets_for_all or self.library.mass_imdb_parental_labels else []
 
                 if self.library.assets_for_all and self.library.asset_directory:
-                    self.library.find_and_upload_assets(item, current_labels)
+                    self.library.find_and_upload_assets(item, current_labels, queue=True)
 
                 locked_fields = [f.name for f in item.fields if f.locked]
 
@@ -474,8 +476,9 @@ class Operations:
                                         new_poster = f"{self.library.url}{poster.key}&X-Plex-Token={self.library.token}"
                                         poster_location = "Plex"
                             if new_poster:
-                                self.library.upload_poster(item, new_poster, url=poster_url)
-                                logger.infd(f"Poster | Reset from {poster_location}")
+                                self.library.queue_upload(item, lambda i=item, p=new_poster, u=poster_url: self.library.upload_poster(i, p, url=u),
+                                                          lambda t=item.title, loc=poster_location: logger.info(f"{t} Poster | Reset from {loc}"),
+                                                          lambda e, t=item.title: logger.error(f"{t} Poster | Reset Failed: {e}"))
                             else:
                                 logger.infd(f"Poster | No Reset Image Found")
                     if self.library.mass_background_update:
@@ -499,8 +502,9 @@ class Operations:
                                         new_background = f"{self.library.url}{background.key}&X-Plex-Token={self.library.token}"
                                         background_location = "Plex"
                             if new_background:
-                                self.library.upload_background(item, new_background, url=background_url)
-                                logger.infd(f"Background | Reset from {background_location}")
+                                self.library.queue_upload(item, lambda i=item, b=new_background, u=background_url: self.library.upload_background(i, b, url=u),
+                                                          lambda t=item.title, loc=background_location: logger.info(f"{t} Background | Reset from {loc}"),
+                                                          lambda e, t=item.title: logger.error(f"{t} Background | Reset Failed: {e}"))
                             else:
                                 logger.infd(f"Background | No Reset Image Found")
 
@@ -560,6 +564,8 @@ class Operations:
                             ep.saveEdits()
                             logger.info(f"Batch Edits:{batch_display}")
 
+            self.library.flush_uploads()
+
             if self.library.Radarr and self.library.radarr_add_all_existing:
                 try:
                     self.library.Radarr.add_tmdb(radarr_adds)
@@ -1,4 +1,5 @@
 import os, re, time
+from contextlib import nullcontext
 from datetime import datetime
 from modules import plex, util, overlay
 from modules.builder import CollectionBuilder
@@ -70,7 +71,7 @@ class Overlays:
         if not self.library.remove_overlays:
             logger.separator(f"{'Re-' if self.library.reapply_overlays else ''}Applying Overlays for the {self.library.name} Library")
             logger.info("")
-            for i, (over_key, (item, over_names)) in enumerate(sorted(key_to_overlays.items(), key=lambda io: self.library.get_item_sort_title(io[1][0])), 1):
+            for i, (over_key, (item, over_names)) in enumerate(self.in_transaction(sorted(key_to_overlays.items(), key=lambda io: self.library.get_item_sort_title(io[1][0]))), 1):
                 item_title = self.library.get_item_sort_title(item, atr="title")
                 try:
                     logger.ghost(f"Overlaying: {i}/{len(key_to_overlays)} {item_title}")
@@ -152,7 +153,12 @@ class Overlays:
                     changed_image = False
                     new_backup = None
                     if poster:
-                        if image_compare and str(poster.compare) != str(image_compare):
+                        if self.config.Cache:
+                            poster.fingerprint = self.library.image_fingerprint(poster)
+                            if image_compare and poster.fingerprint and str(image_compare) == str(poster.compare):
+                                self.config.Cache.update_image_map(item.ratingKey, f"{self.library.image_table_name}_overlays", image, poster.fingerprint, overlay="|".join(overlay_compare))
+                                image_compare = poster.fingerprint
+                        if image_compare and str(poster.fingerprint or poster.compare) != str(image_compare):
                             changed_image = True
                     elif has_overlay:
                         if os.path.exists(os.path.join(self.library.overlay_backup, f"{item.ratingKey}.png")):
@@ -342,7 +348,7 @@ class Overlays:
                             self.library.upload_poster(item, temp)
                             self.library.edit_tags("label", item, add_tags=["Overlay"], do_print=False)
                             self.library.reload(item, force=True)
-                            poster_compare = poster.compare if poster else item.thumb
+                            poster_compare = (poster.fingerprint or poster.compare) if poster else item.thumb
                             logger.info(f"{item_title[:60]:<60} | Overlays Applied: {', '.join(over_names)}")
                         except (OSError, BadRequest, SyntaxError) as e:
                             logger.stacktrace()
@@ -364,6 +370,10 @@ class Overlays:
         logger.separator(f"Finished {self.library.name} Library Overlays\nOverlays Run Time: {overlay_run_time}")
         return overlay_run_time
 
+    def in_transaction(self, items):
+        with self.config.Cache.transaction() if self.config.Cache else nullcontext():
+            yield from items
+
     def compile_overlays(self):
         key_to_item = {}
         properties = {}
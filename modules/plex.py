@@ -1,9 +1,12 @@
-import os, plexapi, re, requests
+import os, plexapi, re, requests, threading
+from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime, timedelta
-from modules import builder, util
+from modules import assets, builder, util
 from modules.library import Library
+from modules.retries import retry
 from modules.util import Failed, ImageData
-from PIL import Image
 from plexapi import utils
 from plexapi.audio import Artist, Track, Album
 from plexapi.exceptions import BadRequest, NotFound, Unauthorized
@@ -12,8 +15,8 @@ from plexapi.library import Role, FilterChoice
 from plexapi.playlist import Playlist
 from plexapi.server import PlexServer
 from plexapi.video import Movie, Show, Season, Episode
-from retrying import retry
 from urllib import parse
+from xml.etree import ElementTree
 from xml.etree.ElementTree import ParseError
 
 logger = util.logger
@@ -228,6 +231,9 @@ builder_level_music_options = ["album", "track"]
 builder_level_options = builder_level_show_options + builder_level_music_options
 collection_mode_keys = {-1: "default", 0: "hide", 1: "hideItems", 2: "showItems"}
 collection_order_keys = {0: "release", 1: "alpha", 2: "custom"}
+filter_item_types = [(Movie, "movie"), (Show, "show"), (Season, "season"), (Episode, "episode"), (Artist, "artist"), (Album, "album"), (Track, "track")]
+filter_item_classes = tuple(item_class for item_class, _ in filter_item_types)
+upload_limits = {}
 item_advance_keys = {
     "item_album_sorting": ("albumSort", album_sorting_options),
     "item_episode_sorting": ("episodeSort", episode_sorting_options),
@@ -427,6 +433,72 @@ watchlist_sorts = {
     "critic_rating.asc": "rating:asc", "critic_rating.desc": "rating:desc",
 }
 
+reload_includes = {
+    "checkFiles": False, "includeAllConcerts": False, "includeBandwidths": False, "includeChapters": False,
+    "includeChildren": False, "includeConcerts": False, "includeExternalMedia": False, "includeExtras": False,
+    "includeFields": False, "includeGeolocation": False, "includeLoudnessRamps": False, "includeMarkers": False,
+    "includeOnDeck": False, "includePopularLeaves": False, "includeRelated": False, "includeRelatedCount": 0,
+    "includeReviews": False, "includeStations": False
+}
+
+class ItemTag:
+    __slots__ = ("id", "tag")
+
+    def __init__(self, id=None, tag=None):
+        self.id = id
+        self.tag = tag
+
+class ItemRecord:
+    __slots__ = ("ratingKey", "key", "guid", "guids", "type", "title", "titleSort", "year", "updatedAt", "labels", "_searchType", "_item", "_initpath", "_library")
+
+    def __init__(self, library, data, initpath):
+        self.ratingKey = utils.cast(int, data.get("ratingKey"))
+        self.key = data.get("key")
+        self.guid = data.get("guid")
+        self.guids = tuple(ItemTag(id=g.get("id")) for g in data.findall("Guid"))
+        self.type = data.get("type")
+        self.title = data.get("title")
+        self.titleSort = data.get("titleSort", self.title)
+        self.year = utils.cast(int, data.get("year"))
+        self.updatedAt = utils.toDatetime(data.get("updatedAt"))
+        self.labels = tuple(ItemTag(id=utils.cast(int, t.get("id")), tag=t.get("tag")) for t in data.findall("Label"))
+        self._searchType = self.type
+        self._item = None
+        self._initpath = initpath
+        self._library = library
+
+    def __getattr__(self, attr):
+        if attr.startswith("__") or attr in ItemRecord.__slots__:
+            raise AttributeError(attr)
+        return getattr(self._library.materialize(self), attr)
+
+    def __eq__(self, other):
+        return other not in [None, []] and self.key == other.key
+
+    def __hash__(self):
+        return hash(self.key)
+
+    def __repr__(self):
+        return f"<ItemRecord:{self.ratingKey}:{self.title}>"
+
+class LazyItems(Sequence):
+    def __init__(self, library, records, cache):
+        self.library = library
+        self.records = records
+        self.cache = cache
+
+    def __len__(self):
+        return len(self.records)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.library.materialize_many(self.records[index], cache=self.cache)
+        return self.library.materialize(self.records[index], cache=self.cache)
+
+    def __iter__(self):
+        for i in range(0, len(self.records), self.library.reload_batch_size):
+            yield from self.library.materialize_many(self.records[i:i + self.library.reload_batch_size], cache=self.cache)
+
 class Plex(Library):
     def __init__(self, config, params):
         super().__init__(config, params)
@@ -434,6 +506,8 @@ class Plex(Library):
         self.url = params["plex"]["url"]
         self.token = params["plex"]["token"]
         self.timeout = params["plex"]["timeout"]
+        if self.url not in upload_limits:
+            upload_limits[self.url] = threading.BoundedSemaphore(self.upload_threads)
         logger.secret(self.url)
         logger.secret(self.token)
         try:
@@ -462,6 +536,7 @@ class Plex(Library):
         self.type = self.Plex.type.capitalize()
         self._users = []
         self._all_items = []
+        self._tag_batch = None
         self._account = None
         self.agent = self.Plex.agent
         self.is_movie = self.type == "Movie"
@@ -491,43 +566,187 @@ class Plex(Library):
                 return []
         return self.get_filter_items(args)
 
-    @retry(stop_max_attempt_number=6, wait_fixed=10000, retry_on_exception=util.retry_if_not_plex)
+    @retry("plex", retry_on_exception=util.retry_if_not_plex)
     def search(self, title=None, sort=None, maxresults=None, libtype=None, **kwargs):
         return self.Plex.search(title=title, sort=sort, maxresults=maxresults, libtype=libtype, **kwargs)
 
-    @retry(stop_max_attempt_number=6, wait_fixed=10000, retry_on_exception=util.retry_if_not_plex)
+    @retry("plex", retry_on_exception=util.retry_if_not_plex)
     def exact_search(self, title, libtype=None, year=None):
         terms = {"title=": title}
         if year:
             terms["year"] = year
         return self.Plex.search(libtype=libtype, **terms)
 
-    @retry(stop_max_attempt_number=6, wait_fixed=10000, retry_on_exception=util.retry_if_not_plex)
+    @retry("plex", retry_on_exception=util.retry_if_not_plex)
     def fetchItem(self, data):
         return self.PlexServer.fetchItem(data)
 
-    def get_all(self, builder_level=None, load=False):
+    def get_all(self, builder_level=None, load=False, records=False):
         if load and builder_level in [None, "show", "artist", "movie"]:
             self._all_items = []
         if self._all_items and builder_level in [None, "show", "artist", "movie"]:
-            return self._all_items
+            results = self._all_items
+        else:
+            results = self._load_records(builder_level)
+            if builder_level in [None, "show", "artist", "movie"]:
+                self._all_items = results
+        if records:
+            return results
+        return LazyItems(self, results, builder_level in [None, "show", "artist", "movie"])
+
+    def _load_records(self, builder_level, filters=None):
         builder_type = builder_level if builder_level else self.Plex.TYPE
         if not builder_level:
             builder_level = self.type
-        logger.info(f"Loading All {builder_level.capitalize()}s from Library: {self.name}")
-        key = f"/library/sections/{self.Plex.key}/all?includeGuids=1&type={utils.searchType(builder_type)}"
-        container_start = 0
+        logger.info(f"Loading {'Changed' if filters else 'All'} {builder_level.capitalize()}s from Library: {self.name}")
+        key = f"/library/sections/{self.Plex.key}/all?includeGuids=1&type={utils.searchType(builder_type)}{f'&{filters}' if filters else ''}"
         container_size = plexapi.X_PLEX_CONTAINER_SIZE
-        results = []
-        while self.Plex._totalViewSize is None or container_start <= self.Plex._totalViewSize:
-            results.extend(self.fetchItems(key, container_start, container_size))
-            logger.ghost(f"Loaded: {container_start}/{self.Plex._totalViewSize}")
-            container_start += container_size
-        logger.info(f"Loaded {self.Plex._totalViewSize} {builder_level.capitalize()}s")
-        if builder_level in [None, "show", "artist", "movie"]:
-            self._all_items = results
+        results, total_size = self.fetchRecords(key, 0, container_size)
+        logger.ghost(f"Loaded: {len(results)}/{total_size}")
+        page = results
+        if total_size is not None and total_size > container_size:
+            with ThreadPoolExecutor(max_workers=self.load_threads) as executor:
+                pages = executor.map(lambda container_start: self.fetchRecords(key, container_start, container_size), range(container_size, total_size, container_size))
+                for page, _ in pages:
+                    results.extend(page)
+                    logger.ghost(f"Loaded: {len(results)}/{total_size}")
+        while len(page) == container_size:
+            page, _ = self.fetchRecords(key, len(results), container_size)
+            results.extend(page)
+            logger.ghost(f"Loaded: {len(results)}/{total_size}")
+        logger.exorcise()
+        logger.info(f"Loaded {len(results)} {builder_level.capitalize()}s")
         return results
 
+    @retry("plex", retry_on_exception=util.retry_if_not_plex)
+    def fetchRecords(self, key, container_start, container_size):
+        response = self.PlexServer._session.get(self.PlexServer.url(key), headers=self.PlexServer._headers(), timeout=self.timeout, stream=True,
+                                                params={"X-Plex-Container-Start": container_start, "X-Plex-Container-Size": container_size})
+        if response.status_code == 401:
+            raise Unauthorized(f"({response.status_code}) {key}")
+        elif response.status_code == 404:
+            raise NotFound(f"({response.status_code}) {key}")
+        elif response.status_code >= 400:
+            raise BadRequest(f"({response.status_code}) {key}")
+        response.raw.decode_content = True
+        records = []
+        total_size = None
+        container = None
+        depth = 0
+        for event, elem in ElementTree.iterparse(response.raw, events=("start", "end")):
+            if event == "start":
+                depth += 1
+                if depth == 1:
+                    container = elem
+                    total_size = utils.cast(int, elem.get("totalSize"))
+            else:
+                depth -= 1
+                if depth == 1:
+                    records.append(ItemRecord(self, elem, key))
+                    container.clear()
+        return records, total_size
+
+    def sync_items(self):
+        snapshot, full_sync = self.config.Cache.query_library_snapshot(self.mapping_name)
+        if snapshot and full_sync and (datetime.now() - full_sync).days < self.delta_full_resync:
+            since = max([u for _, u in snapshot.values() if u], default=0)
+            changed = {}
+            for field in ["updatedAt", "addedAt"]:
+                for record in self._load_records(None, filters=f"{field}>>={since}"):
+                    changed[record.ratingKey] = record
+            _, total_size = self.fetchRecords(f"/library/sections/{self.Plex.key}/all?type={utils.searchType(self.Plex.TYPE)}", 0, 0)
+            known_keys = set(snapshot) | set(changed)
+            removed = set()
+            if total_size is not None and total_size < len(known_keys):
+                current_keys = self.get_filter_keys(f"?type={utils.searchType(self.Plex.TYPE)}")
+                if current_keys <= known_keys:
+                    removed = known_keys - current_keys
+                    total_size = len(current_keys)
+            if total_size is not None and total_size == len(known_keys) - len(removed):
+                for record in changed.values():
+                    self.cached_items[record.ratingKey] = (record, False)
+                self.config.Cache.update_library_snapshot(self.mapping_name, [(r.ratingKey, r.guid, int(r.updatedAt.timestamp()) if r.updatedAt else None) for r in changed.values()], removed=removed)
+                logger.info(f"Library: {self.mapping_name} Delta Synced ({len(changed)} Changed, {len(removed)} Deleted)")
+                unchanged = [self._snapshot_record(k, g, u) for k, (g, u) in snapshot.items() if k not in changed and k not in removed]
+                return [r for k, r in changed.items() if k not in removed] + unchanged, removed
+            logger.info(f"Library: {self.mapping_name} Snapshot is Out of Date")
+        items = self.cache_items()
+        removed = set(snapshot) - set([i.ratingKey for i in items])
+        if snapshot:
+            logger.info(f"Library: {self.mapping_name} Full Sync ({len(removed)} Deleted)")
+        self.config.Cache.update_library_snapshot(self.mapping_name, [(i.ratingKey, i.guid, int(i.updatedAt.timestamp()) if i.updatedAt else None) for i in items], full=True)
+        return items, removed
+
+    def _snapshot_record(self, rating_key, guid, updated_at):
+        attrs = {"ratingKey": str(rating_key), "key": f"/library/metadata/{rating_key}", "guid": guid, "type": self.Plex.TYPE}
+        if updated_at:
+            attrs["updatedAt"] = str(updated_at)
+        record = ItemRecord(self, ElementTree.Element("Directory", attrs), f"/library/metadata/{rating_key}")
+        record.guids = None
+        return record
+
+    def get_records(self, rating_keys):
+        records = []
+        for i in range(0, len(rating_keys), self.reload_batch_size):
+            batch = rating_keys[i:i + self.reload_batch_size]
+            try:
+                page, _ = self.fetchRecords(f"/library/metadata/{','.join([str(k) for k in batch])}?includeGuids=1", 0, len(batch))
+                records.extend(page)
+            except (BadRequest, NotFound) as e:
+                logger.debug(f"Batch Load Failed: {e}")
+        return records
+
+    def materialize(self, item, cache=True):
+        if not isinstance(item, ItemRecord):
+            return item
+        if item.ratingKey in self.cached_items:
+            cached_item, _ = self.cached_items[item.ratingKey]
+            if not isinstance(cached_item, ItemRecord):
+                return cached_item
+        obj = item._item
+        if obj is None:
+            self._load_items({item.ratingKey: item})
+            obj = item._item
+            if obj is None:
+                raise Failed(f"Plex Error: Item {item.ratingKey} not found")
+            if not cache:
+                item._item = None
+        if cache:
+            self.cached_items[item.ratingKey] = (obj, False)
+        return obj
+
+    def materialize_many(self, items, cache=True):
+        missing = {}
+        for item in items:
+            if isinstance(item, ItemRecord) and item._item is None and \
+                    (item.ratingKey not in self.cached_items or isinstance(self.cached_items[item.ratingKey][0], ItemRecord)):
+                missing[item.ratingKey] = item
+        keys = list(missing)
+        for i in range(0, len(keys), self.reload_batch_size):
+            try:
+                self._load_items({k: missing[k] for k in keys[i:i + self.reload_batch_size]})
+            except (BadRequest, NotFound) as e:
+                logger.debug(f"Batch Load Failed: {e}")
+        objs = []
+        for item in items:
+            if item.ratingKey in missing and missing[item.ratingKey]._item is None:
+                logger.debug(f"Plex Error: Item {item.ratingKey} not found")
+                continue
+            objs.append(self.materialize(item, cache=cache))
+            if not cache and item.ratingKey in missing:
+                item._item = None
+        return objs
+
+    @retry("plex", retry_on_exception=util.retry_if_not_plex)
+    def _load_items(self, records):
+        data = self.PlexServer.query(f"/library/metadata/{','.join([str(k) for k in records])}")
+        for elem in data if data is not None else []:
+            rating_key = utils.cast(int, elem.get("ratingKey"))
+            if rating_key in records:
+                obj = self.Plex._buildItem(elem, initpath=records[rating_key]._initpath)
+                obj.librarySectionID = utils.cast(int, self.Plex.key)
+                records[rating_key]._item = obj
+
     def upload_theme(self, collection, url=None, filepath=None):
         key = f"/library/metadata/{collection.ratingKey}/themes"
         if url:
@@ -535,66 +754,67 @@ class Plex(Library):
         elif filepath:
             self.PlexServer.query(key, method=self.PlexServer._session.post, data=open(filepath, 'rb').read())
 
-    @retry(stop_max_attempt_number=6, wait_fixed=10000, retry_on_exception=util.retry_if_not_plex)
+    @retry("plex", retry_on_exception=util.retry_if_not_plex)
     def create_playlist(self, name, items):
         return self.PlexServer.createPlaylist(name, items=items)
 
-    @retry(stop_max_attempt_number=6, wait_fixed=10000, retry_on_exception=util.retry_if_not_plex)
+    @retry("plex", retry_on_exception=util.retry_if_not_plex)
     def fetchItems(self, key, container_start, container_size):
         return self.Plex.fetchItems(key, container_start=container_start, container_size=container_size)
 
-    @retry(stop_max_attempt_number=6, wait_fixed=10000, retry_on_exception=util.retry_if_not_plex)
+    @retry("plex", retry_on_exception=util.retry_if_not_plex)
     def moveItem(self, obj, item, after):
         obj.moveItem(item, after=after)
 
-    @retry(stop_max_attempt_number=6, wait_fixed=10000, retry_on_exception=util.retry_if_not_plex)
+    @retry("plex", retry_on_exception=util.retry_if_not_plex)
     def query(self, method):
         return method()
 
-    @retry(stop_max_attempt_number=6, wait_fixed=10000, retry_on_exception=util.retry_if_not_plex)
+    @retry("plex", retry_on_exception=util.retry_if_not_plex)
     def query_data(self, method, data):
         return method(data)
 
-    @retry(stop_max_attempt_number=6, wait_fixed=10000, retry_on_exception=util.retry_if_not_plex)
+    @retry("plex", retry_on_exception=util.retry_if_not_plex)
     def tag_edit(self, item, attribute, data, locked=True, remove=False):
         return item.editTags(attribute, data, locked=locked, remove=remove)
 
-    @retry(stop_max_attempt_number=6, wait_fixed=10000, retry_on_exception=util.retry_if_not_failed)
+    @retry("plex", retry_on_exception=util.retry_if_not_failed)
     def query_collection(self, item, collection, locked=True, add=True):
         if add:
             item.addCollection(collection, locked=locked)
         else:
             item.removeCollection(collection, locked=locked)
 
-    @retry(stop_max_attempt_number=6, wait_fixed=10000, retry_on_exception=util.retry_if_not_plex)
+    @retry("plex", retry_on_exception=util.retry_if_not_plex)
+    def bulk_edit_query(self, search_type, rating_keys, edits):
+        args = {"type": search_type, "id": ",".join([str(k) for k in rating_keys]), **edits}
+        self.PlexServer.query(f"/library/sections/{self.Plex.key}/all{utils.joinArgs(args)}", method=self.PlexServer._session.put)
+
+    @retry("plex", retry_on_exception=util.retry_if_not_plex)
     def collection_mode_query(self, collection, data):
         collection.modeUpdate(mode=data)
 
-    @retry(stop_max_attempt_number=6, wait_fixed=10000, retry_on_exception=util.retry_if_not_plex)
+    @retry("plex", retry_on_exception=util.retry_if_not_plex)
     def collection_order_query(self, collection, data):
         collection.sortUpdate(sort=data)
 
-    @retry(stop_max_attempt_number=6, wait_fixed=10000, retry_on_exception=util.retry_if_not_plex)
+    @retry("plex", retry_on_exception=util.retry_if_not_plex)
     def item_labels(self, item):
         try:
             return item.labels
         except BadRequest:
             raise Failed(f"Item: {item.title} Labels failed to load")
 
-    @retry(stop_max_attempt_number=6, wait_fixed=10000, retry_on_exception=util.retry_if_not_plex)
+    @retry("plex", retry_on_exception=util.retry_if_not_plex)
     def reload(self, item, force=False):
         is_full = False
         cached_item = item
         if cached_item.ratingKey in self.cached_items:
             cached_item, is_full = self.cached_items[cached_item.ratingKey]
+        cached_item = self.materialize(cached_item)
         try:
             if not is_full or force:
-                cached_item.reload(checkFiles=False, includeAllConcerts=False, includeBandwidths=False,
-                                   includeChapters=False, includeChildren=False, includeConcerts=False,
-                                   includeExternalMedia=False, includeExtras=False, includeFields=False,
-                                   includeGeolocation=False, includeLoudnessRamps=False, includeMarkers=False,
-                                   includeOnDeck=False, includePopularLeaves=False, includeRelated=False,
-                                   includeRelatedCount=0, includeReviews=False, includeStations=False)
+                cached_item.reload(**reload_includes)
                 cached_item._initpath = cached_item._details_key
                 self.cached_items[cached_item.ratingKey] = (cached_item, True)
             return cached_item
@@ -602,44 +822,81 @@ class Plex(Library):
             logger.stacktrace()
             raise Failed(f"Item Failed to Load: {e}")
 
-    @retry(stop_max_attempt_number=6, wait_fixed=10000, retry_on_exception=util.retry_if_not_plex)
+    def reload_many(self, items, batch_size=None):
+        if not batch_size:
+            batch_size = self.reload_batch_size
+        partial = []
+        for item in items:
+            cached_item, is_full = self.cached_items[item.ratingKey] if item.ratingKey in self.cached_items else (item, False)
+            if not is_full:
+                partial.append(cached_item)
+        batches = {}
+        for cached_item in self.materialize_many(partial):
+            includes = cached_item._buildDetailsKey(**reload_includes).partition("?")[2]
+            if includes not in batches:
+                batches[includes] = {}
+            batches[includes][cached_item.ratingKey] = cached_item
+        for includes, batch in batches.items():
+            keys = list(batch)
+            for i in range(0, len(keys), batch_size):
+                try:
+                    self._reload_batch({k: batch[k] for k in keys[i:i + batch_size]}, includes)
+                except (BadRequest, NotFound) as e:
+                    logger.debug(f"Batch Reload Failed: {e}")
+
+    @retry("plex", retry_on_exception=util.retry_if_not_plex)
+    def _reload_batch(self, batch, includes):
+        data = self.PlexServer.query(f"/library/metadata/{','.join([str(k) for k in batch])}{f'?{includes}' if includes else ''}")
+        for elem in data if data is not None else []:
+            rating_key = utils.cast(int, elem.get("ratingKey"))
+            if rating_key in batch:
+                item = batch[rating_key]
+                item._loadData(elem)
+                item._initpath = item._details_key
+                self.cached_items[rating_key] = (item, True)
+
+    @retry("plex", retry_on_exception=util.retry_if_not_plex)
     def edit_query(self, item, edits, advanced=False):
         if advanced:
             item.editAdvanced(**edits)
         else:
             item.edit(**edits)
 
-    @retry(stop_max_attempt_number=6, wait_fixed=10000, retry_on_exception=util.retry_if_not_plex)
-    def _upload_image(self, item, image):
-        try:
-            if image.is_poster and image.is_url:
-                item.uploadPoster(url=image.location)
-            elif image.is_poster:
-                item.uploadPoster(filepath=image.location)
-            elif image.is_url:
-                item.uploadArt(url=image.location)
-            else:
-                item.uploadArt(filepath=image.location)
+    @retry("plex", retry_on_exception=util.retry_if_not_plex)
+    def _upload_image(self, item, image, reload=True):
+        with upload_limits[self.url]:
+            try:
+                if image.is_poster and image.is_url:
+                    item.uploadPoster(url=image.location)
+                elif image.is_poster:
+                    item.uploadPoster(filepath=image.location)
+                elif image.is_url:
+                    item.uploadArt(url=image.location)
+                else:
+                    item.uploadArt(filepath=image.location)
+            except BadRequest as e:
+                item.refresh()
+                raise Failed(e)
+        if reload:
             self.reload(item, force=True)
-        except BadRequest as e:
-            item.refresh()
-            raise Failed(e)
 
-    @retry(stop_max_attempt_number=6, wait_fixed=10000, retry_on_exception=util.retry_if_not_plex)
+    @retry("plex", retry_on_exception=util.retry_if_not_plex)
     def upload_poster(self, item, image, url=False):
-        if url:
-            item.uploadPoster(url=image)
-        else:
-            item.uploadPoster(filepath=image)
+        with upload_limits[self.url]:
+            if url:
+                item.uploadPoster(url=image)
+            else:
+                item.uploadPoster(filepath=image)
 
-    @retry(stop_max_attempt_number=6, wait_fixed=10000, retry_on_exception=util.retry_if_not_plex)
+    @retry("plex", retry_on_exception=util.retry_if_not_plex)
     def upload_background(self, item, image, url=False):
-        if url:
-            item.uploadArt(url=image)
-        else:
-            item.uploadArt(filepath=image)
+        with upload_limits[self.url]:
+            if url:
+                item.uploadArt(url=image)
+            else:
+                item.uploadArt(filepath=image)
 
-    @retry(stop_max_attempt_number=6, wait_fixed=10000, retry_on_exception=util.retry_if_not_failed)
+    @retry("plex", retry_on_exception=util.retry_if_not_failed)
     def get_actor_id(self, name):
         results = self.Plex.hubSearch(name)
         for result in results:
@@ -665,7 +922,7 @@ class Plex(Library):
             logger.debug(f"Search Attribute: {final_search}")
             raise Failed(f"Plex Error: plex_search attribute: {search_name} not supported")
 
-    @retry(stop_max_attempt_number=6, wait_fixed=10000, retry_on_exception=util.retry_if_not_plex)
+    @retry("plex", retry_on_exception=util.retry_if_not_plex)
     def get_tags(self, tag):
         if isinstance(tag, str):
             match = re.match(r'(?:([a-zA-Z]*)\.)?([a-zA-Z]+)', tag)
@@ -686,7 +943,7 @@ class Plex(Library):
             items = [i for i in self.Plex.findItems(self.Plex._server.query(tag.key[:-7]), FilterChoice) if i.key not in keys]
         return items
 
-    @retry(stop_max_attempt_number=6, wait_fixed=10000, retry_on_exception=util.retry_if_not_plex)
+    @retry("plex", retry_on_exception=util.retry_if_not_plex)
     def _query(self, key, post=False, put=False):
         if post:                method = self.Plex._server._session.post
         elif put:               method = self.Plex._server._session.put
@@ -743,6 +1000,33 @@ class Plex(Library):
                 locked = field is not None
             self.query_collection(item, collection, locked=locked, add=add)
 
+    def alter_collection_many(self, items, collection, smart_label_collection=False, add=True, chunk_size=100):
+        tag = "label" if smart_label_collection else "collection"
+        groups = {}
+        for item in items:
+            locked = True
+            if not smart_label_collection and self.agent in ["tv.plex.agents.movie", "tv.plex.agents.series"]:
+                field = next((f for f in item.fields if f.name == "collection"), None)
+                locked = field is not None
+            group = (utils.searchType(item._searchType), locked)
+            if group not in groups:
+                groups[group] = []
+            groups[group].append(item)
+        for (search_type, locked), group_items in groups.items():
+            edits = {f"{tag}.locked": 1 if locked else 0}
+            if add:
+                edits[f"{tag}[0].tag.tag"] = collection
+            else:
+                edits[f"{tag}[].tag.tag-"] = parse.quote(str(collection))
+            for i in range(0, len(group_items), chunk_size):
+                chunk = group_items[i:i + chunk_size]
+                try:
+                    self.bulk_edit_query(search_type, [c.ratingKey for c in chunk], edits)
+                except (BadRequest, NotFound) as e:
+                    logger.debug(f"Bulk Edit Failed: {e}")
+                    for item in chunk:
+                        self.alter_collection(item, collection, smart_label_collection=smart_label_collection, add=add)
+
     def move_item(self, collection, item, after=None):
         key = f"{collection.key}/items/{item}/move"
         if after:
@@ -981,6 +1265,16 @@ class Plex(Library):
         key = f"/library/sections/{self.Plex.key}/all{uri_args}"
         return self.Plex._search(key, None, 0, plexapi.X_PLEX_CONTAINER_SIZE)
 
+    def get_filter_keys(self, uri_args):
+        key = f"/library/sections/{self.Plex.key}/all{uri_args}"
+        container_size = plexapi.X_PLEX_CONTAINER_SIZE
+        records, total_size = self.fetchRecords(key, 0, container_size)
+        keys = set(r.ratingKey for r in records)
+        while len(records) == container_size and (total_size is None or len(keys) < total_size):
+            records, _ = self.fetchRecords(key, len(keys), container_size)
+            keys.update(r.ratingKey for r in records)
+        return keys
+
     def get_collection_name_and_items(self, collection, smart_label_collection):
         name = collection.title if isinstance(collection, (Collection, Playlist)) else str(collection)
         return name, self.get_collection_items(collection, smart_label_collection)
@@ -1030,10 +1324,10 @@ class Plex(Library):
             _add = [t for t in _add_tags + _sync_tags if t not in _item_tags]
             _remove = [t for t in _item_tags if (sync_tags is not None and t not in _sync_tags) or t in _remove_tags]
             if _add:
-                self.tag_edit(obj, actual, _add, locked=locked)
+                self._edit_or_queue_tags(obj, actual, _add, locked=locked)
                 display += f"+{', +'.join(_add)}"
             if _remove:
-                self.tag_edit(obj, actual, _remove, locked=locked, remove=True)
+                self._edit_or_queue_tags(obj, actual, _remove, locked=locked, remove=True)
                 if display:
                     display += ", "
                 display += f"-{', -'.join(_remove)}"
@@ -1045,6 +1339,67 @@ class Plex(Library):
                 logger.info(final)
         return final[28:] if final else final
 
+    def _edit_or_queue_tags(self, obj, attr, tags, locked=True, remove=False):
+        if self._tag_batch is None:
+            self.tag_edit(obj, attr, tags, locked=locked, remove=remove)
+        else:
+            for tag in tags:
+                group = (utils.searchType(obj._searchType), attr, tag, remove, locked)
+                if group not in self._tag_batch:
+                    self._tag_batch[group] = []
+                self._tag_batch[group].append(obj)
+
+    def queue_tag_edits(self):
+        if self._tag_batch is None:
+            self._tag_batch = {}
+
+    def flush_tag_edits(self, stop=True, chunk_size=100):
+        if self._tag_batch:
+            batch = self._tag_batch
+            self._tag_batch = {}
+            for (search_type, attr, tag, remove, locked), items in batch.items():
+                edits = {f"{attr}.locked": 1 if locked else 0}
+                if remove:
+                    edits[f"{attr}[].tag.tag-"] = parse.quote(str(tag))
+                else:
+                    edits[f"{attr}[0].tag.tag"] = tag
+                for i in range(0, len(items), chunk_size):
+                    chunk = items[i:i + chunk_size]
+                    try:
+                        self.bulk_edit_query(search_type, [c.ratingKey for c in chunk], edits)
+                    except (BadRequest, NotFound) as e:
+                        logger.debug(f"Bulk Edit Failed: {e}")
+                        for item in chunk:
+                            try:
+                                self.tag_edit(item, attr, [tag], locked=locked, remove=remove)
+                            except (BadRequest, NotFound):
+                                logger.error(f"{item.title[:25]:<25} | {attr.capitalize()} | Failed to {'Remove' if remove else 'Add'} {tag}")
+        if stop:
+            self._tag_batch = None
+
+    @contextmanager
+    def batch_tag_edits(self):
+        outer = self._tag_batch is None
+        self.queue_tag_edits()
+        try:
+            yield
+        finally:
+            self.flush_tag_edits(stop=outer)
+
+    def remove_all_labels(self, libtype):
+        removed = {}
+        with self.batch_tag_edits():
+            for choice in self.get_tags(f"{libtype}.label"):
+                key = choice.fastKey if "type=" in choice.fastKey else f"{choice.fastKey}{'&' if '?' in choice.fastKey else '?'}type={utils.searchType(libtype)}"
+                for item in self.Plex._search(key, None, 0, plexapi.X_PLEX_CONTAINER_SIZE):
+                    if item.ratingKey not in removed:
+                        removed[item.ratingKey] = (item, [])
+                    removed[item.ratingKey][1].append(choice.title)
+                    self._edit_or_queue_tags(item, "label", [choice.title], remove=True)
+        for item, labels in removed.values():
+            logger.info(f"{item.title[:25]:<25} | Label | -{', -'.join(labels)}")
+        return len(removed)
+
     def item_images(self, item, group, alias, initial=False, asset_location=None, title=None, image_name=None, folder_name=None):
         if title is None:
             title = item.title
@@ -1066,14 +1421,14 @@ class Plex(Library):
             self.upload_images(item, poster=poster, background=background, overlay=True)
         return asset_location, folder_name
 
-    def find_and_upload_assets(self, item, current_labels):
+    def find_and_upload_assets(self, item, current_labels, queue=False):
         item_dir = None
         name = None
         try:
             poster, background, item_dir, name = self.find_item_assets(item)
             if "Overlay" not in current_labels:
                 if poster or background:
-                    self.upload_images(item, poster=poster, background=background)
+                    self.upload_images(item, poster=poster, background=background, queue=queue)
                 elif self.show_missing_assets and self.asset_folders:
                     logger.warning(f"Asset Warning: No poster or background found in the assets folder '{item_dir}'")
                 elif self.show_missing_assets:
@@ -1094,7 +1449,7 @@ class Plex(Library):
                     elif self.show_missing_season_assets and season.seasonNumber > 0:
                         missing_seasons += f"\nMissing Season {season.seasonNumber} Poster"
                     if season_poster or season_background and "Overlay" not in [la.tag for la in self.item_labels(season)]:
-                        self.upload_images(season, poster=season_poster, background=season_background)
+                        self.upload_images(season, poster=season_poster, background=season_background, queue=queue)
                 except Failed as e:
                     if self.show_missing_assets:
                         logger.warning(e)
@@ -1105,7 +1460,7 @@ class Plex(Library):
                             if episode_poster or episode_background:
                                 found_episode = True
                                 if "Overlay" not in [la.tag for la in self.item_labels(episode)]:
-                                    self.upload_images(episode, poster=episode_poster, background=episode_background)
+                                    self.upload_images(episode, poster=episode_poster, background=episode_background, queue=queue)
                             elif self.show_missing_episode_assets:
                                 missing_episodes += f"\nMissing {episode.seasonEpisode.upper()} Title Card"
                     except Failed as e:
@@ -1124,7 +1479,7 @@ class Plex(Library):
                     elif self.show_missing_season_assets:
                         missing_assets += f"\nMissing Album {album.title} Poster"
                     if album_poster or album_background:
-                        self.upload_images(album, poster=album_poster, background=album_background)
+                        self.upload_images(album, poster=album_poster, background=album_background, queue=queue)
                 except Failed as e:
                     if self.show_missing_assets:
                         logger.warning(e)
@@ -1178,21 +1533,9 @@ class Plex(Library):
         if not item_asset_directory:
             for ad in asset_directory:
                 if self.asset_folders:
-                    if os.path.isdir(os.path.join(ad, folder_name)):
-                        item_asset_directory = os.path.join(ad, folder_name)
-                    else:
-                        for n in range(1, self.asset_depth + 1):
-                            new_path = ad
-                            for i in range(1, n + 1):
-                                new_path = os.path.join(new_path, "*")
-                            matches = util.glob_filter(os.path.join(new_path, folder_name))
-                            if len(matches) > 0:
-                                item_asset_directory = os.path.abspath(matches[0])
-                                break
-                else:
-                    matches = util.glob_filter(os.path.join(ad, f"{file_name}.*"))
-                    if len(matches) > 0:
-                        item_asset_directory = ad
+                    item_asset_directory = self.asset_index.find_folder(ad, folder_name)
+                elif self.asset_index.find_files(ad, file_name):
+                    item_asset_directory = ad
                 if item_asset_directory:
                     break
             if not item_asset_directory:
@@ -1200,41 +1543,42 @@ class Plex(Library):
                     if self.create_asset_folders and asset_directory:
                         item_asset_directory = os.path.join(asset_directory[0], folder_name)
                         os.makedirs(item_asset_directory, exist_ok=True)
+                        self.asset_index.add_folder(asset_directory[0], folder_name, item_asset_directory)
                         logger.warning(f"Asset Warning: Asset Directory Not Found and Created: {item_asset_directory}")
                     else:
                         raise Failed(f"Asset Warning: Unable to find asset folder: '{folder_name}'")
                 return None, None, item_asset_directory, folder_name
 
-        poster_filter = os.path.join(item_asset_directory, f"{file_name}.*")
-        background_filter = os.path.join(item_asset_directory, "background.*" if file_name == "poster" else f"{file_name}_background.*")
-
-        poster_matches = util.glob_filter(poster_filter)
+        poster_matches = self.asset_index.find_files(item_asset_directory, file_name)
         if len(poster_matches) > 0:
             poster = ImageData("asset_directory", os.path.abspath(poster_matches[0]), prefix=prefix, is_url=False)
 
-        background_matches = util.glob_filter(background_filter)
+        background_matches = self.asset_index.find_files(item_asset_directory, "background" if file_name == "poster" else f"{file_name}_background")
         if len(background_matches) > 0:
             background = ImageData("asset_directory", os.path.abspath(background_matches[0]), prefix=prefix, is_poster=False, is_url=False)
 
         if is_top_level and self.asset_folders and self.dimensional_asset_rename and (not poster or not background):
-            for file in util.glob_filter(os.path.join(item_asset_directory, "*.*")):
-                if file.lower().endswith((".jpg", ".png", ".jpeg")):
+            renamed = False
+            for file in sorted(self.asset_index.list_files(item_asset_directory)):
+                if file.lower().endswith(assets.image_extensions):
                     try:
-                        image = Image.open(file)
-                        _w, _h = image.size
-                        image.close()
+                        _w, _h = self.asset_index.image_size(file)
                         if not poster and _h >= _w:
                             new_path = os.path.join(os.path.dirname(file), f"poster{os.path.splitext(file)[1].lower()}")
                             os.rename(file, new_path)
+                            renamed = True
                             poster = ImageData("asset_directory", os.path.abspath(new_path), prefix=prefix, is_url=False)
                         elif not background and _w > _h:
                             new_path = os.path.join(os.path.dirname(file), f"background{os.path.splitext(file)[1].lower()}")
                             os.rename(file, new_path)
+                            renamed = True
                             background = ImageData("asset_directory", os.path.abspath(new_path), prefix=prefix, is_poster=False, is_url=False)
                         if poster and background:
                             break
                     except OSError:
                         logger.error(f"Asset Error: Failed to open image: {file}")
+            if renamed:
+                self.asset_index.invalidate(item_asset_directory)
 
         return poster, background, item_asset_directory, folder_name
 
@@ -1372,100 +1716,93 @@ class Plex(Library):
             logger.warning(f"Collection Warning: {text} attribute will run as {final}")
         return attribute, modifier, final
 
-    def check_filters(self, item, filters_in, current_time):
-        for filter_method, filter_data in filters_in:
-            filter_attr, modifier, filter_final = self.split(filter_method)
-            if self.check_filter(item, filter_attr, modifier, filter_final, filter_data, current_time) is False:
+    def compile_filters(self, filters_in, current_time):
+        return [self.compile_filter(filter_method, filter_data, current_time) for filter_method, filter_data in filters_in]
+
+    def check_filters(self, item, filter_plan):
+        if filter_plan and isinstance(item, filter_item_classes):
+            item = self.reload(item)
+        for check in filter_plan:
+            if check(item) is False:
                 return False
         return True
 
-    def check_filter(self, item, filter_attr, modifier, filter_final, filter_data, current_time):
+    def compile_filter(self, filter_method, filter_data, current_time):
+        filter_attr, modifier, filter_final = self.split(filter_method)
         filter_actual = attribute_translation[filter_attr] if filter_attr in attribute_translation else filter_attr
-        if isinstance(item, Movie):
-            item_type = "movie"
-        elif isinstance(item, Show):
-            item_type = "show"
-        elif isinstance(item, Season):
-            item_type = "season"
-        elif isinstance(item, Episode):
-            item_type = "episode"
-        elif isinstance(item, Artist):
-            item_type = "artist"
-        elif isinstance(item, Album):
-            item_type = "album"
-        elif isinstance(item, Track):
-            item_type = "track"
-        else:
-            return True
-        item = self.reload(item)
-        if filter_attr not in builder.filters[item_type]:
-            return True
-        elif filter_attr in builder.date_filters:
-            if util.is_date_filter(getattr(item, filter_actual), modifier, filter_data, filter_final, current_time):
-                return False
+        item_classes = tuple(item_class for item_class, item_type in filter_item_types if filter_attr in builder.filters[item_type])
+        if not item_classes:
+            return lambda item: True
+        if filter_attr in builder.date_filters:
+            if modifier in ["", ".not", ".before", ".after"]:
+                if modifier in [".before", ".after"]:
+                    filter_date = util.validate_date(filter_data, filter_final)
+                else:
+                    filter_date = current_time - timedelta(days=filter_data)
+                date_check = {
+                    "": lambda value: value >= filter_date,
+                    ".not": lambda value: value < filter_date,
+                    ".before": lambda value: value < filter_date,
+                    ".after": lambda value: value > filter_date
+                }[modifier]
+                def check(item):
+                    value = getattr(item, filter_actual)
+                    return value is not None and date_check(value)
+            else:
+                def check(item):
+                    return not util.is_date_filter(getattr(item, filter_actual), modifier, filter_data, filter_final, current_time)
         elif filter_attr in builder.string_filters:
-            values = []
             if filter_attr == "audio_track_title":
-                for media in item.media:
-                    for part in media.parts:
-                        values.extend([a.extendedDisplayTitle for a in part.audioStreams() if a.extendedDisplayTitle])
+                def get_values(item):
+                    return [a.extendedDisplayTitle for media in item.media for part in media.parts for a in part.audioStreams() if a.extendedDisplayTitle]
             elif filter_attr in ["audio_codec", "audio_profile", "video_codec", "video_profile"]:
-                for media in item.media:
-                    attr = getattr(media, filter_actual)
-                    if attr and attr not in values:
-                        values.append(attr)
+                def get_values(item):
+                    values = []
+                    for media in item.media:
+                        attr = getattr(media, filter_actual)
+                        if attr and attr not in values:
+                            values.append(attr)
+                    return values
             elif filter_attr in ["filepath", "folder"]:
-                values = [loc for loc in item.locations if loc]
+                def get_values(item):
+                    return [loc for loc in item.locations if loc]
             else:
-                test_value = getattr(item, filter_actual)
-                values = [test_value] if test_value else []
-            if util.is_string_filter(values, modifier, filter_data):
-                return False
+                def get_values(item):
+                    test_value = getattr(item, filter_actual)
+                    return [test_value] if test_value else []
+            is_filtered = util.compile_string_filter(modifier, filter_data)
+            def check(item):
+                return not is_filtered(get_values(item))
         elif filter_attr in builder.boolean_filters:
-            filter_check = False
             if filter_attr == "has_collection":
-                filter_check = len(item.collections) > 0
+                def get_value(item):
+                    return len(item.collections) > 0
             elif filter_attr == "has_overlay":
-                for label in self.item_labels(item):
-                    if label.tag.lower().endswith(" overlay") or label.tag.lower() == "overlay":
-                        filter_check = True
-                        break
+                def get_value(item):
+                    return any(label.tag.lower().endswith(" overlay") or label.tag.lower() == "overlay" for label in self.item_labels(item))
             elif filter_attr == "has_dolby_vision":
-                for media in item.media:
-                    for part in media.parts:
-                        for stream in part.videoStreams():
-                            if stream.DOVIPresent:
-                                filter_check = True
-                                break
-            if util.is_boolean_filter(filter_data, filter_check):
-                return False
-        elif filter_attr == "history":
-            item_date = item.originallyAvailableAt
-            if item_date is None:
-                return False
-            elif filter_data == "day":
-                if item_date.month != current_time.month or item_date.day != current_time.day:
+                def get_value(item):
+                    return any(stream.DOVIPresent for media in item.media for part in media.parts for stream in part.videoStreams())
+            else:
+                def get_value(item):
                     return False
+            def check(item):
+                return not util.is_boolean_filter(filter_data, get_value(item))
+        elif filter_attr == "history":
+            if filter_data == "day":
+                history_days = frozenset([(current_time.month, current_time.day)])
             elif filter_data == "month":
-                if item_date.month != current_time.month:
-                    return False
+                history_days = None
             else:
-                date_match = False
-                for i in range(filter_data):
-                    check_date = current_time - timedelta(days=i)
-                    if item_date.month == check_date.month and item_date.day == check_date.day:
-                        date_match = True
-                if date_match is False:
+                history_days = frozenset((d.month, d.day) for d in [current_time - timedelta(days=i) for i in range(filter_data)])
+            def check(item):
+                item_date = item.originallyAvailableAt
+                if item_date is None:
                     return False
+                elif history_days is None:
+                    return item_date.month == current_time.month
+                return (item_date.month, item_date.day) in history_days
         elif filter_attr in ["seasons", "episodes", "albums", "tracks"]:
-            if filter_attr == "seasons":
-                sub_items = item.seasons()
-            elif filter_attr == "albums":
-                sub_items = item.albums()
-            elif filter_attr == "tracks":
-                sub_items = item.tracks()
-            else:
-                sub_items = item.episodes()
             filters_in = []
             percentage = 60
             for sub_atr, sub_data in filter_data.items():
@@ -1473,69 +1810,75 @@ class Plex(Library):
                     percentage = sub_data
                 else:
                     filters_in.append((sub_atr, sub_data))
-            failure_threshold = len(sub_items) * ((100 - percentage) / 100)
-            failures = 0
-            for sub_item in sub_items:
-                if self.check_filters(sub_item, filters_in, current_time) is False:
-                    failures += 1
-                if failures > failure_threshold:
-                    return False
+            sub_plan = self.compile_filters(filters_in, current_time)
+            def check(item):
+                sub_items = getattr(item, filter_attr)()
+                failure_threshold = len(sub_items) * ((100 - percentage) / 100)
+                failures = 0
+                for sub_item in sub_items:
+                    if self.check_filters(sub_item, sub_plan) is False:
+                        failures += 1
+                    if failures > failure_threshold:
+                        return False
+                return True
         elif filter_attr in builder.number_filters or modifier in [".gt", ".gte", ".lt", ".lte", ".count_gt", ".count_gte", ".count_lt", ".count_lte"]:
-            test_number = []
             if filter_attr in ["channels", "height", "width", "aspect"]:
-                test_number = 0
-                for media in item.media:
-                    attr = getattr(media, filter_actual)
-                    if attr and attr > test_number:
-                        test_number = attr
+                def get_number(item):
+                    test_number = 0
+                    for media in item.media:
+                        attr = getattr(media, filter_actual)
+                        if attr and attr > test_number:
+                            test_number = attr
+                    return test_number
             elif filter_attr == "versions":
-                test_number = len(item.media)
+                def get_number(item):
+                    return len(item.media)
             elif filter_attr == "audio_language":
-                for media in item.media:
-                    for part in media.parts:
-                        test_number.extend([a.language for a in part.audioStreams()])
+                def get_number(item):
+                    return [a.language for media in item.media for part in media.parts for a in part.audioStreams()]
             elif filter_attr == "subtitle_language":
-                for media in item.media:
-                    for part in media.parts:
-                        test_number.extend([s.language for s in part.subtitleStreams()])
+                def get_number(item):
+                    return [s.language for media in item.media for part in media.parts for s in part.subtitleStreams()]
             elif filter_attr == "duration":
-                test_number = getattr(item, filter_actual) / 60000
+                def get_number(item):
+                    return getattr(item, filter_actual) / 60000
             else:
-                test_number = getattr(item, filter_actual)
-            if modifier in [".count_gt", ".count_gte", ".count_lt", ".count_lte"]:
-                test_number = len(test_number) if test_number else 0
-                modifier = f".{modifier[7:]}"
-            if test_number is None or util.is_number_filter(test_number, modifier, filter_data):
-                return False
+                def get_number(item):
+                    return getattr(item, filter_actual)
+            is_count = modifier in [".count_gt", ".count_gte", ".count_lt", ".count_lte"]
+            number_modifier = f".{modifier[7:]}" if is_count else modifier
+            def check(item):
+                test_number = get_number(item)
+                if is_count:
+                    test_number = len(test_number) if test_number else 0
+                return not (test_number is None or util.is_number_filter(test_number, number_modifier, filter_data))
         else:
-            attrs = []
-            if filter_attr in ["resolution", "audio_language", "subtitle_language"]:
-                for media in item.media:
-                    if filter_attr == "resolution":
-                        attrs.append(media.videoResolution)
-                    for part in media.parts:
-                        if filter_attr == "audio_language":
-                            for a in part.audioStreams():
-                                attrs.extend([a.language, a.languageCode])
-                        if filter_attr == "subtitle_language":
-                            for s in part.subtitleStreams():
-                                attrs.extend([s.language, s.languageCode])
+            if filter_attr == "resolution":
+                def get_attrs(item):
+                    return [media.videoResolution for media in item.media]
+            elif filter_attr == "audio_language":
+                def get_attrs(item):
+                    return [lang for media in item.media for part in media.parts for a in part.audioStreams() for lang in [a.language, a.languageCode]]
+            elif filter_attr == "subtitle_language":
+                def get_attrs(item):
+                    return [lang for media in item.media for part in media.parts for s in part.subtitleStreams() for lang in [s.language, s.languageCode]]
             elif filter_attr in ["content_rating", "year", "rating"]:
-                attrs = [getattr(item, filter_actual)]
-            elif filter_attr in ["actor", "country", "director", "genre", "label", "producer", "writer",
-                                 "collection", "network"]:
-                attrs = [attr.tag for attr in getattr(item, filter_actual)]
+                def get_attrs(item):
+                    return [getattr(item, filter_actual)]
+            elif filter_attr in ["actor", "country", "director", "genre", "label", "producer", "writer", "collection", "network"]:
+                def get_attrs(item):
+                    return [attr.tag for attr in getattr(item, filter_actual)]
             else:
                 raise Failed(f"Filter Error: filter: {filter_final} not supported")
             if modifier == ".regex":
-                has_match = False
-                for reg in filter_data:
-                    for name in attrs:
-                        if re.compile(reg).search(name):
-                            has_match = True
-                if has_match is False:
-                    return False
-            elif (not list(set(filter_data) & set(attrs)) and modifier == "") \
-                    or (list(set(filter_data) & set(attrs)) and modifier == ".not"):
-                return False
-        return True
+                regexes = [re.compile(reg) for reg in filter_data]
+                def check(item):
+                    return any(regex.search(name) for name in get_attrs(item) for regex in regexes)
+            elif modifier in ["", ".not"]:
+                filter_set = frozenset(filter_data)
+                def check(item):
+                    return filter_set.isdisjoint(get_attrs(item)) == (modifier == ".not")
+            else:
+                def check(item):
+                    return True
+        return lambda item: not isinstance(item, item_classes) or check(item)
@@ -0,0 +1,81 @@
+from datetime import datetime
+from modules import util
+from modules.util import Failed, LimitReached
+
+logger = util.logger
+
+class CacheRefresh:
+    def __init__(self, config):
+        self.config = config
+        self.budget = config.general["cache_refresh_budget"]
+
+    def _services(self):
+        services = []
+        if self.config.TMDb:
+            services.append(("TMDb Movies", "tmdb_movie_data", "tmdb_id", self.config.TMDb.expiration, self._tmdb_movie, None))
+            services.append(("TMDb Shows", "tmdb_show_data", "tmdb_id", self.config.TMDb.expiration, self._tmdb_show, None))
+        if self.config.OMDb:
+            services.append(("OMDb", "omdb_data3", "imdb_id", self.config.OMDb.expiration, self._omdb, lambda: self.config.OMDb.limit))
+        if self.config.Mdblist.has_key:
+            services.append(("MdbList", "mdb_data3", "key_id", self.config.Mdblist.expiration, self._mdb, lambda: self.config.Mdblist.limit))
+        if self.config.AniDB.client:
+            services.append(("AniDB", "anidb_data", "anidb_id", self.config.AniDB.expiration, self._anidb, None))
+        return services
+
+    def _tmdb_movie(self, tmdb_id):
+        self.config.Cache.update_tmdb_movie(True, self.config.TMDb.get_movie(int(tmdb_id), ignore_cache=True), self.config.TMDb.expiration)
+
+    def _tmdb_show(self, tmdb_id):
+        self.config.Cache.update_tmdb_show(True, self.config.TMDb.get_show(int(tmdb_id), ignore_cache=True), self.config.TMDb.expiration)
+
+    def _omdb(self, imdb_id):
+        self.config.Cache.update_omdb(True, self.config.OMDb.get_omdb(imdb_id, ignore_cache=True), self.config.OMDb.expiration)
+
+    def _mdb(self, key):
+        if key.startswith("tt"):
+            mdb = self.config.Mdblist._request(imdb_id=key, ignore_cache=True)
+        elif key.startswith(("tvm", "tvs")):
+            mdb = self.config.Mdblist._request(tvdb_id=key[3:], is_movie=key.startswith("tvm"), ignore_cache=True)
+        elif key.startswith(("tm", "ts")):
+            mdb = self.config.Mdblist._request(tmdb_id=key[2:], is_movie=key.startswith("tm"), ignore_cache=True)
+        else:
+            raise Failed(f"MdbList Error: Unknown Cache Key: {key}")
+        self.config.Cache.update_mdb(True, key, mdb, self.config.Mdblist.expiration)
+
+    def _anidb(self, anidb_id):
+        self.config.Cache.update_anidb(True, anidb_id, self.config.AniDB.get_anime(int(anidb_id), ignore_cache=True), self.config.AniDB.expiration)
+
+    def run(self, next_run, deadline):
+        logger.separator("Refreshing Cache")
+        logger.info("")
+        logger.info(f"Refreshing entries expiring before {next_run.strftime('%H:%M %Y-%m-%d')} (Budget: {self.budget} per service)")
+        status = {}
+        for name, table, key_column, expiration, refresh, limited in self._services():
+            if datetime.now() >= deadline:
+                break
+            status[name] = {"due": 0, "refreshed": 0, "failed": 0}
+            keys = self.config.Cache.query_expiring(table, key_column, expiration, next_run, self.budget)
+            status[name]["due"] = len(keys)
+            for i, key in enumerate(keys, 1):
+                if datetime.now() >= deadline or (limited and limited()):
+                    break
+                logger.ghost(f"Refreshing {name}: {i}/{len(keys)} {key}")
+                try:
+                    refresh(key)
+                    status[name]["refreshed"] += 1
+                except LimitReached as e:
+                    logger.error(e)
+                    status[name]["failed"] += 1
+                    break
+                except Failed as e:
+                    logger.debug(e)
+                    status[name]["failed"] += 1
+            logger.exorcise()
+        self.config.Cache.flush()
+        logger.info("")
+        logger.info(f"{'Service':<27} | {'Due':>8} | {'Updated':>8} | {'Failed':>8} |")
+        logger.info(f"{logger.separating_character * 27} | {logger.separating_character * 8} | {logger.separating_character * 8} | {logger.separating_character * 8} |")
+        for name, counts in status.items():
+            logger.info(f"{name:<27} | {counts['due']:>8} | {counts['refreshed']:>8} | {counts['failed']:>8} |")
+        logger.info("")
+        logger.separator(f"Finished Refreshing Cache")
@@ -0,0 +1,124 @@
+import functools, random, threading, time
+from urllib.parse import urlparse
+from modules import util
+from modules.util import CircuitOpen
+
+logger = util.logger
+
+def _plex_host(args, kwargs):
+    return getattr(args[0], "url", None) if args else None
+
+def _url_host(args, kwargs):
+    url = kwargs["url"] if "url" in kwargs else args[1] if len(args) > 1 else None
+    return urlparse(url).netloc if isinstance(url, str) else None
+
+policies = {
+    "plex": {"attempts": 6, "base": 2, "cap": 30, "budget": 200, "threshold": 5, "cooldown": 300, "host": _plex_host},
+    "tmdb": {"attempts": 6, "base": 1, "cap": 20, "budget": 100, "threshold": 5, "cooldown": 300, "host": None},
+    "trakt": {"attempts": 6, "base": 2, "cap": 60, "budget": 50, "threshold": 5, "cooldown": 300, "host": None},
+    "tvdb": {"attempts": 6, "base": 2, "cap": 30, "budget": 50, "threshold": 5, "cooldown": 300, "host": None},
+    "http": {"attempts": 6, "base": 2, "cap": 30, "budget": 100, "threshold": 5, "cooldown": 300, "host": _url_host}
+}
+
+class RetryEngine:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.budgets = {}
+        self.circuits = {}
+        self.stats = {}
+
+    def reset(self):
+        with self.lock:
+            self.budgets = {}
+            self.circuits = {}
+            self.stats = {}
+
+    def _stat(self, service, key):
+        if service not in self.stats:
+            self.stats[service] = {"retries": 0, "exhausted": 0, "opened": 0, "rejected": 0}
+        self.stats[service][key] += 1
+
+    def before_call(self, service, host):
+        policy = policies[service]
+        with self.lock:
+            circuit = self.circuits.get((service, host))
+            if not circuit or circuit["opened"] is None:
+                return
+            if time.monotonic() - circuit["opened"] < policy["cooldown"]:
+                self._stat(service, "rejected")
+                raise CircuitOpen(f"{service.capitalize()} Error: {host or service} is unavailable, skipping request")
+            circuit["opened"] = None
+            circuit["failures"] = policy["threshold"] - 1
+
+    def on_success(self, service, host):
+        with self.lock:
+            if (service, host) in self.circuits:
+                del self.circuits[(service, host)]
+
+    def on_failure(self, service, host):
+        policy = policies[service]
+        with self.lock:
+            if (service, host) not in self.circuits:
+                self.circuits[(service, host)] = {"failures": 0, "opened": None}
+            circuit = self.circuits[(service, host)]
+            circuit["failures"] += 1
+            if circuit["opened"] is None and circuit["failures"] >= policy["threshold"]:
+                circuit["opened"] = time.monotonic()
+                self._stat(service, "opened")
+                logger.error(f"{service.capitalize()} Error: {host or service} failed {circuit['failures']} times in a row, pausing requests for {policy['cooldown']} seconds")
+                return False
+            return circuit["opened"] is None
+
+    def take_budget(self, service):
+        with self.lock:
+            used = self.budgets.get(service, 0)
+            if used >= policies[service]["budget"]:
+                self._stat(service, "exhausted")
+                return False
+            self.budgets[service] = used + 1
+            self._stat(service, "retries")
+            return True
+
+    def backoff(self, service, attempt):
+        policy = policies[service]
+        return random.uniform(0, min(policy["cap"], policy["base"] * 2 ** attempt))
+
+engine = RetryEngine()
+_active = threading.local()
+
+def retry(service, retry_on_exception=None):
+    policy = policies[service]
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not hasattr(_active, "services"):
+                _active.services = set()
+            if service in _active.services:
+                return func(*args, **kwargs)
+            host = policy["host"](args, kwargs) if policy["host"] else None
+            attempt = 0
+            _active.services.add(service)
+            try:
+                while True:
+                    engine.before_call(service, host)
+                    try:
+                        result = func(*args, **kwargs)
+                    except CircuitOpen:
+                        raise
+                    except Exception as e:
+                        if retry_on_exception and not retry_on_exception(e):
+                            engine.on_success(service, host)
+                            raise
+                        attempt += 1
+                        if not engine.on_failure(service, host) or attempt >= policy["attempts"] or not engine.take_budget(service):
+                            raise
+                        wait = engine.backoff(service, attempt)
+                        logger.debug(f"{service.capitalize()} Retry {attempt}/{policy['attempts'] - 1} in {wait:.1f}s: {e}")
+                        time.sleep(wait)
+                    else:
+                        engine.on_success(service, host)
+                        return result
+            finally:
+                _active.services.discard(service)
+        return wrapper
+    return decorator
@@ -1,7 +1,7 @@
 import re
 from modules import util
+from modules.retries import retry
 from modules.util import Failed
-from retrying import retry
 from tmdbapis import TMDbAPIs, TMDbException, NotFound, Movie
 
 logger = util.logger
@@ -127,7 +127,7 @@ class TMDbMovie(TMDBObj):
         if self._tmdb.config.Cache and not ignore_cache:
             self._tmdb.config.Cache.update_tmdb_movie(expired, self, self._tmdb.expiration)
 
-    @retry(stop_max_attempt_number=6, wait_fixed=10000, retry_on_exception=util.retry_if_not_failed)
+    @retry("tmdb", retry_on_exception=util.retry_if_not_failed)
     def load_movie(self):
         try:
             return self._tmdb.TMDb.movie(self.tmdb_id, partial="external_ids,keywords")
@@ -161,7 +161,7 @@ class TMDbShow(TMDBObj):
         if self._tmdb.config.Cache and not ignore_cache:
             self._tmdb.config.Cache.update_tmdb_show(expired, self, self._tmdb.expiration)
 
-    @retry(stop_max_attempt_number=6, wait_fixed=10000, retry_on_exception=util.retry_if_not_failed)
+    @retry("tmdb", retry_on_exception=util.retry_if_not_failed)
     def load_show(self):
         try:
             return self._tmdb.TMDb.tv_show(self.tmdb_id, partial="external_ids,keywords")
@@ -189,7 +189,7 @@ class TMDb:
             raise Failed(f"TMDb Error: No {convert_to.upper().replace('B_', 'b ')} found for TMDb ID {tmdb_id}")
         return check_id
 
-    @retry(stop_max_attempt_number=6, wait_fixed=10000, retry_on_exception=util.retry_if_not_failed)
+    @retry("tmdb", retry_on_exception=util.retry_if_not_failed)
     def convert_tvdb_to(self, tvdb_id):
         try:
             results = self.TMDb.find_by_id(tvdb_id=tvdb_id)
@@ -199,7 +199,7 @@ class TMDb:
             pass
         raise Failed(f"TMDb Error: No TMDb ID found for TVDb ID {tvdb_id}")
 
-    @retry(stop_max_attempt_number=6, wait_fixed=10000, retry_on_exception=util.retry_if_not_failed)
+    @retry("tmdb", retry_on_exception=util.retry_if_not_failed)
     def convert_imdb_to(self, imdb_id):
         try:
             results = self.TMDb.find_by_id(imdb_id=imdb_id)
@@ -228,51 +228,51 @@ class TMDb:
     def get_show(self, tmdb_id, ignore_cache=False):
         return TMDbShow(self, tmdb_id, ignore_cache=ignore_cache)
 
-    @retry(stop_max_attempt_number=6, wait_fixed=10000, retry_on_exception=util.retry_if_not_failed)
+    @retry("tmdb", retry_on_exception=util.retry_if_not_failed)
     def get_season(self, tmdb_id, season_number, partial=None):
         try:                            return self.TMDb.tv_season(tmdb_id, season_number, partial=partial)
         except NotFound as e:           raise Failed(f"TMDb Error: No Season found for TMDb ID {tmdb_id} Season {season_number}: {e}")
 
-    @retry(stop_max_attempt_number=6, wait_fixed=10000, retry_on_exception=util.retry_if_not_failed)
+    @retry("tmdb", retry_on_exception=util.retry_if_not_failed)
     def get_episode(self, tmdb_id, season_number, episode_number, partial=None):
         try:                            return self.TMDb.tv_episode(tmdb_id, season_number, episode_number, partial=partial)
         except NotFound as e:           raise Failed(f"TMDb Error: No Episode found for TMDb ID {tmdb_id} Season {season_number} Episode {episode_number}: {e}")
 
-    @retry(stop_max_attempt_number=6, wait_fixed=10000, retry_on_exception=util.retry_if_not_failed)
+    @retry("tmdb", retry_on_exception=util.retry_if_not_failed)
     def get_collection(self, tmdb_id, partial=None):
         try:                            return self.TMDb.collection(tmdb_id, partial=partial)
         except NotFound as e:           raise Failed(f"TMDb Error: No Collection found for TMDb ID {tmdb_id}: {e}")
 
-    @retry(stop_max_attempt_number=6, wait_fixed=10000, retry_on_exception=util.retry_if_not_failed)
+    @retry("tmdb", retry_on_exception=util.retry_if_not_failed)
     def get_person(self, tmdb_id, partial=None):
         try:                            return self.TMDb.person(tmdb_id, partial=partial)
         except NotFound as e:           raise Failed(f"TMDb Error: No Person found for TMDb ID {tmdb_id}: {e}")
 
-    @retry(stop_max_attempt_number=6, wait_fixed=10000, retry_on_exception=util.retry_if_not_failed)
+    @retry("tmdb", retry_on_exception=util.retry_if_not_failed)
     def _company(self, tmdb_id, partial=None):
         try:                            return self.TMDb.company(tmdb_id, partial=partial)
         except NotFound as e:           raise Failed(f"TMDb Error: No Company found for TMDb ID {tmdb_id}: {e}")
 
-    @retry(stop_max_attempt_number=6, wait_fixed=10000, retry_on_exception=util.retry_if_not_failed)
+    @retry("tmdb", retry_on_exception=util.retry_if_not_failed)
     def _network(self, tmdb_id, partial=None):
         try:                            return self.TMDb.network(tmdb_id, partial=partial)
         except NotFound as e:           raise Failed(f"TMDb Error: No Network found for TMDb ID {tmdb_id}: {e}")
 
-    @retry(stop_max_attempt_number=6, wait_fixed=10000, retry_on_exception=util.retry_if_not_failed)
+    @retry("tmdb", retry_on_exception=util.retry_if_not_failed)
     def _keyword(self, tmdb_id):
         try:                            return self.TMDb.keyword(tmdb_id)
         except NotFound as e:           raise Failed(f"TMDb Error: No Keyword found for TMDb ID {tmdb_id}: {e}")
 
-    @retry(stop_max_attempt_number=6, wait_fixed=10000, retry_on_exception=util.retry_if_not_failed)
+    @retry("tmdb", retry_on_exception=util.retry_if_not_failed)
     def get_list(self, tmdb_id):
         try:                            return self.TMDb.list(tmdb_id)
         except NotFound as e:           raise Failed(f"TMDb Error: No List found for TMDb ID {tmdb_id}: {e}")
 
-    @retry(stop_max_attempt_number=6, wait_fixed=10000, retry_on_exception=util.retry_if_not_failed)
+    @retry("tmdb", retry_on_exception=util.retry_if_not_failed)
     def get_popular_people(self, limit):
         return {str(p.id): p.name for p in self.TMDb.popular_people().get_results(limit)}
 
-    @retry(stop_max_attempt_number=6, wait_fixed=10000, retry_on_exception=util.retry_if_not_failed)
+    @retry("tmdb", retry_on_exception=util.retry_if_not_failed)
     def search_people(self, name):
         try:                            return self.TMDb.people_search(name)
         except NotFound:                raise Failed(f"TMDb Error: Actor {name} Not Found")
@@ -298,7 +298,7 @@ class TMDb:
         elif tmdb_type == "List":                   self.get_list(tmdb_id)
         return tmdb_id
 
-    @retry(stop_max_attempt_number=6, wait_fixed=10000, retry_on_exception=util.retry_if_not_failed)
+    @retry("tmdb", retry_on_exception=util.retry_if_not_failed)
     def get_items(self, method, data, region, is_movie, result_type):
         if method == "tmdb_popular":
             results = self.TMDb.popular_movies(region=region) if is_movie else self.TMDb.popular_tv()
@@ -1,7 +1,7 @@
 import requests, time, webbrowser
 from modules import util
+from modules.retries import retry
 from modules.util import Failed, TimeoutExpired, YAML
-from retrying import retry
 
 logger = util.logger
 
@@ -196,7 +196,7 @@ class Trakt:
             return True
         return False
 
-    @retry(stop_max_attempt_number=6, wait_fixed=10000, retry_on_exception=util.retry_if_not_failed)
+    @retry("trakt", retry_on_exception=util.retry_if_not_failed)
     def _request(self, url, params=None, json=None):
         headers = {
             "Content-Type": "application/json",
@@ -2,8 +2,8 @@ import requests, time
 from datetime import datetime
 from lxml.etree import ParserError
 from modules import util
+from modules.retries import retry
 from modules.util import Failed
-from retrying import retry
 
 logger = util.logger
 
@@ -111,7 +111,7 @@ class TVDb:
         description = response.xpath("//div[@class='block']/div[not(@style='display:none')]/p/text()")
         return description[0] if len(description) > 0 and len(description[0]) > 0 else ""
 
-    @retry(stop_max_attempt_number=6, wait_fixed=10000, retry_on_exception=util.retry_if_not_failed)
+    @retry("tvdb", retry_on_exception=util.retry_if_not_failed)
     def get_request(self, tvdb_url):
         return self.config.get_html(tvdb_url, headers=util.header(self.language))
 
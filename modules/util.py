@@ -1,4 +1,4 @@
-import glob, logging, os, re, requests, ruamel.yaml, signal, sys, time
+import bisect, glob, hashlib, logging, os, re, requests, ruamel.yaml, signal, sys, time
 from datetime import datetime, timedelta
 from num2words import num2words
 from pathvalidate import is_valid_filename, sanitize_filename
@@ -36,6 +36,9 @@ class NotScheduled(Exception):
 class NotScheduledRange(NotScheduled):
     pass
 
+class CircuitOpen(Failed):
+    pass
+
 class ImageData:
     def __init__(self, attribute, location, prefix="", is_poster=True, is_url=True):
         self.attribute = attribute
@@ -44,11 +47,22 @@ class ImageData:
         self.is_poster = is_poster
         self.is_url = is_url
         self.compare = location if is_url else os.stat(location).st_size
+        self.fingerprint = None
         self.message = f"{prefix}{'poster' if is_poster else 'background'} to [{'URL' if is_url else 'File'}] {location}"
 
     def __str__(self):
         return str(self.__dict__)
 
+def fingerprint(data):
+    return f"blake2b:{hashlib.blake2b(data, digest_size=16).hexdigest()}"
+
+def file_fingerprint(path):
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(1048576), b""):
+            digest.update(chunk)
+    return f"blake2b:{digest.hexdigest()}"
+
 def retry_if_not_failed(exception):
     return not isinstance(exception, Failed)
 
@@ -341,6 +355,24 @@ def validate_filename(filename):
         mapping_name = sanitize_filename(str(filename))
         return mapping_name, f"Log Folder Name: {filename} is invalid using {mapping_name}"
 
+def longest_increasing_subsequence(values):
+    tails, tail_indexes, previous = [], [], [None] * len(values)
+    for i, value in enumerate(values):
+        position = bisect.bisect_left(tails, value)
+        if position == len(tails):
+            tails.append(value)
+            tail_indexes.append(i)
+        else:
+            tails[position] = value
+            tail_indexes[position] = i
+        previous[i] = tail_indexes[position - 1] if position > 0 else None
+    output = []
+    i = tail_indexes[-1] if tail_indexes else None
+    while i is not None:
+        output.append(values[i])
+        i = previous[i]
+    return output[::-1]
+
 def item_title(item):
     if isinstance(item, Season):
         if f"Season {item.index}" == item.title:
@@ -525,18 +557,33 @@ def is_boolean_filter(value, data):
     return (data and not value) or (not data and value)
 
 def is_string_filter(values, modifier, data):
-    jailbreak = False
-    for value in values:
-        for check_value in data:
-            if (modifier in ["", ".not"] and check_value.lower() in value.lower()) \
-                    or (modifier in [".is", ".isnot"] and value.lower() == check_value.lower()) \
-                    or (modifier == ".begins" and value.lower().startswith(check_value.lower())) \
-                    or (modifier == ".ends" and value.lower().endswith(check_value.lower())) \
-                    or (modifier == ".regex" and re.compile(check_value).search(value)):
-                jailbreak = True
-                break
-        if jailbreak: break
-    return (jailbreak and modifier in [".not", ".isnot"]) or (not jailbreak and modifier in ["", ".is", ".begins", ".ends", ".regex"])
+    return compile_string_filter(modifier, data)(values)
+
+def compile_string_filter(modifier, data):
+    if modifier == ".regex":
+        regexes = [re.compile(check_value) for check_value in data]
+        matches = lambda value: any(regex.search(value) for regex in regexes)
+    else:
+        check_values = [check_value.lower() for check_value in data]
+        if modifier in [".is", ".isnot"]:
+            check_set = frozenset(check_values)
+            matches = lambda value: value.lower() in check_set
+        elif modifier == ".begins":
+            check_tuple = tuple(check_values)
+            matches = lambda value: value.lower().startswith(check_tuple)
+        elif modifier == ".ends":
+            check_tuple = tuple(check_values)
+            matches = lambda value: value.lower().endswith(check_tuple)
+        elif modifier in ["", ".not"]:
+            matches = lambda value: any(check_value in value.lower() for check_value in check_values)
+        else:
+            matches = lambda value: False
+    exclude_on_match = modifier in [".not", ".isnot"]
+    include_on_match = modifier in ["", ".is", ".begins", ".ends", ".regex"]
+    def is_filtered(values):
+        jailbreak = any(matches(value) for value in values)
+        return (jailbreak and exclude_on_match) or (not jailbreak and include_on_match)
+    return is_filtered
 
 def check_day(_m, _d):
     if _m in [1, 3, 5, 7, 8, 10, 12] and _d > 31:
@@ -1,6 +1,6 @@
 import argparse, os, sys, time, uuid
 from concurrent.futures import ProcessPoolExecutor
-from datetime import datetime
+from datetime import datetime, timedelta
 from modules.logs import MyLogger
 
 try:
@@ -37,6 +37,11 @@ parser.add_argument("-rc", "-cl", "--collection", "--collections", "--run-collec
 parser.add_argument("-rl", "-l", "--library", "--libraries", "--run-library", "--run-libraries", dest="libraries", help="Process only specified libraries (comma-separated list)", type=str)
 parser.add_argument("-rm", "-m", "--metadata", "--metadata-files", "--run-metadata-files", dest="metadata", help="Process only specified Metadata files (comma-separated list)", type=str)
 parser.add_argument("-ca", "--cache-library", "--cache-libraries", dest="cache_libraries", help="Cache Library load for 1 day", action="store_true", default=False)
+parser.add_argument("-cm", "--cache-maintenance", dest="cache_maintenance", help="Purge expired and orphaned cache data and compact the cache file", action="store_true", default=False)
+parser.add_argument("-ec", "--export-cache", dest="export_cache", help="Export the shareable cache tables to the given file", type=str)
+parser.add_argument("-ic", "--import-cache", dest="import_cache", help="Import and merge a cache export file", type=str)
+parser.add_argument("-rcr", "--refresh-cache", dest="refresh_cache", help="Refresh cache entries that will expire before the next scheduled run while waiting for it", action="store_true", default=False)
+parser.add_argument("-rs", "--request-stats", dest="request_stats", help="Save request statistics as JSON in the logs folder", action="store_true", default=False)
 parser.add_argument("-dc", "--delete", "--delete-collections", dest="delete_collections", help="Deletes all Collections in the Plex Library before running", action="store_true", default=False)
 parser.add_argument("-dl", "--delete-label", "--delete-labels", dest="delete_labels", help="Deletes all Labels in the Plex Library before running", action="store_true", default=False)
 parser.add_argument("-nc", "--no-countdown", dest="no_countdown", help="Run without displaying the countdown", action="store_true", default=False)
@@ -87,6 +92,11 @@ collections = get_arg("PMM_COLLECTIONS", args.collections)
 libraries = get_arg("PMM_LIBRARIES", args.libraries)
 metadata_files = get_arg("PMM_METADATA_FILES", args.metadata)
 cache_libraries = get_arg("PMM_CACHE_LIBRARIES", args.cache_libraries, arg_bool=True)
+cache_maintenance = get_arg("PMM_CACHE_MAINTENANCE", args.cache_maintenance, arg_bool=True)
+export_cache = get_arg("PMM_EXPORT_CACHE", args.export_cache)
+import_cache = get_arg("PMM_IMPORT_CACHE", args.import_cache)
+refresh_cache = get_arg("PMM_REFRESH_CACHE", args.refresh_cache, arg_bool=True)
+request_stats = get_arg("PMM_REQUEST_STATS", args.request_stats, arg_bool=True)
 delete_collections = get_arg("PMM_DELETE_COLLECTIONS", args.delete_collections, arg_bool=True)
 delete_labels = get_arg("PMM_DELETE_LABELS", args.delete_labels, arg_bool=True)
 resume = get_arg("PMM_RESUME", args.resume)
@@ -122,8 +132,12 @@ logger = MyLogger("Plex Meta Manager", default_dir, screen_width, divider[0], ig
 from modules import util
 util.logger = logger
 from modules.builder import CollectionBuilder
+from modules.cache import Cache
 from modules.config import ConfigFile
-from modules.util import Failed, NonExisting, NotScheduled, Deleted
+from modules.metrics import metrics
+from modules.refresh import CacheRefresh
+from modules.retries import engine as retry_engine
+from modules.util import Failed, NonExisting, NotScheduled, Deleted, YAML
 
 def my_except_hook(exctype, value, tb):
     if issubclass(exctype, KeyboardInterrupt):
@@ -138,7 +152,11 @@ old_send = requests.Session.send
 def new_send(*send_args, **kwargs):
     if kwargs.get("timeout", None) is None:
         kwargs["timeout"] = timeout
-    return old_send(*send_args, **kwargs)
+    send_start = time.perf_counter()
+    response = old_send(*send_args, **kwargs)
+    size = int(response.headers.get("Content-Length", 0)) if kwargs.get("stream") else len(response.content)
+    metrics.record(send_args[1].method, send_args[1].url, time.perf_counter() - send_start, size)
+    return response
 
 requests.Session.send = new_send
 
@@ -171,6 +189,40 @@ def process(attrs):
     with ProcessPoolExecutor(max_workers=1) as executor:
         executor.submit(start, *[attrs])
 
+def process_refresh(attrs):
+    executor = ProcessPoolExecutor(max_workers=1)
+    future = executor.submit(refresh, *[attrs])
+    executor.shutdown(wait=False)
+    return future
+
+def refresh(attrs):
+    if datetime.now() >= attrs["deadline"]:
+        return
+    logger.add_main_handler()
+    start_time = datetime.now()
+    attrs["time"] = start_time.strftime("%H:%M")
+    attrs["time_obj"] = start_time
+    attrs["read_only"] = True
+    attrs["version"] = version
+    attrs["no_missing"] = True
+    attrs["no_report"] = True
+    try:
+        config = ConfigFile(default_dir, attrs)
+    except Exception as e:
+        logger.stacktrace()
+        logger.critical(e)
+    else:
+        if config.Cache:
+            try:
+                CacheRefresh(config).run(attrs["next_run"], attrs["deadline"])
+            except Exception as e:
+                logger.stacktrace()
+                logger.critical(e)
+            finally:
+                config.Cache.close()
+        else:
+            logger.warning("Cache Refresh requires the cache to be enabled")
+
 def start(attrs):
     logger.add_main_handler()
     logger.separator()
@@ -220,6 +272,11 @@ def start(attrs):
     logger.debug(f"--ignore-schedules (PMM_IGNORE_SCHEDULES): {ignore_schedules}")
     logger.debug(f"--ignore-ghost (PMM_IGNORE_GHOST): {ignore_ghost}")
     logger.debug(f"--cache-libraries (PMM_CACHE_LIBRARIES): {cache_libraries}")
+    logger.debug(f"--cache-maintenance (PMM_CACHE_MAINTENANCE): {cache_maintenance}")
+    logger.debug(f"--export-cache (PMM_EXPORT_CACHE): {export_cache}")
+    logger.debug(f"--import-cache (PMM_IMPORT_CACHE): {import_cache}")
+    logger.debug(f"--refresh-cache (PMM_REFRESH_CACHE): {refresh_cache}")
+    logger.debug(f"--request-stats (PMM_REQUEST_STATS): {request_stats}")
     logger.debug(f"--delete-collections (PMM_DELETE_COLLECTIONS): {delete_collections}")
     logger.debug(f"--delete-labels (PMM_DELETE_LABELS): {delete_labels}")
     logger.debug(f"--resume (PMM_RESUME): {resume}")
@@ -234,6 +291,8 @@ def start(attrs):
     logger.debug("")
     logger.separator(f"Starting {start_type}Run")
     config = None
+    metrics.reset()
+    retry_engine.reset()
     stats = {"created": 0, "modified": 0, "deleted": 0, "added": 0, "unchanged": 0, "removed": 0, "radarr": 0, "sonarr": 0, "names": []}
     try:
         config = ConfigFile(default_dir, attrs)
@@ -247,6 +306,9 @@ def start(attrs):
             config.notify(e)
             logger.stacktrace()
             logger.critical(e)
+        finally:
+            if config.Cache:
+                config.Cache.close()
     logger.info("")
     end_time = datetime.now()
     run_time = str(end_time - start_time).split(".")[0]
@@ -384,6 +446,39 @@ def run_config(config, stats):
         logger.separator(f"Playlists Summary", space=False, border=False)
         logger.info("")
         print_status(playlist_status)
+    if config.Cache and config.Cache.lru_stats:
+        logger.info("")
+        logger.separator(f"Cache Summary", space=False, border=False)
+        logger.info("")
+        logger.info(f"{'Table':<27} | {'Hits':>8} | {'Misses':>8} | {'Evicted':>8} |")
+        logger.info(f"{logger.separating_character * 27} | {logger.separating_character * 8} | {logger.separating_character * 8} | {logger.separating_character * 8} |")
+        for table, table_stats in sorted(config.Cache.lru_stats.items()):
+            logger.info(f"{table:<27} | {table_stats['hits']:>8} | {table_stats['misses']:>8} | {table_stats['evictions']:>8} |")
+    if retry_engine.stats:
+        logger.info("")
+        logger.separator(f"Retry Summary", space=False, border=False)
+        logger.info("")
+        logger.info(f"{'Service':<27} | {'Retries':>8} | {'Denied':>8} | {'Opened':>8} | {'Skipped':>8} |")
+        logger.info(f"{logger.separating_character * 27} | {logger.separating_character * 8} | {logger.separating_character * 8} | {logger.separating_character * 8} | {logger.separating_character * 8} |")
+        for service, service_stats in sorted(retry_engine.stats.items()):
+            logger.info(f"{service:<27} | {service_stats['retries']:>8} | {service_stats['exhausted']:>8} | {service_stats['opened']:>8} | {service_stats['rejected']:>8} |")
+    request_summary = metrics.summary()
+    if request_summary:
+        logger.info("")
+        logger.separator(f"Request Summary", space=False, border=False)
+        logger.info("")
+        logger.info(f"{'Endpoint':<50} | {'Phase':<11} | {'Count':>7} | {'MB':>7} | {'p50 ms':>7} | {'p95 ms':>7} | {'Total s':>8} |")
+        logger.info(f"{logger.separating_character * 50} | {logger.separating_character * 11} | {logger.separating_character * 7} | {logger.separating_character * 7} | {logger.separating_character * 7} | {logger.separating_character * 7} | {logger.separating_character * 8} |")
+        for r in request_summary[:15]:
+            logger.info(f"{r['endpoint'][:50]:<50} | {r['phase']:<11} | {r['count']:>7} | {r['bytes'] / 1048576:>7.1f} | {r['p50'] * 1000:>7.0f} | {r['p95'] * 1000:>7.0f} | {r['total']:>8.1f} |")
+        if request_stats:
+            stats_path = os.path.join(logger.log_dir, "request_stats.json")
+            try:
+                metrics.save(stats_path)
+                logger.info("")
+                logger.info(f"Request Statistics saved to {stats_path}")
+            except OSError as e:
+                logger.error(f"Request Statistics Error: {e}")
 
     stats["added"] += amount_added
     for library in config.libraries:
@@ -474,18 +569,22 @@ def run_libraries(config):
                 else:
                     library_types = ["movie"]
                 for library_type in library_types:
-                    for item in library.get_all(builder_level=library_type):
-                        try:
-                            library.edit_tags("label", item, sync_tags=[])
-                        except NotFound:
-                            logger.error(f"{item.title[:25]:<25} | Labels Failed to be Removed")
+                    try:
+                        library.remove_all_labels(library_type)
+                    except NotFound as e:
+                        logger.error(f"{library_type.capitalize()} Labels Failed to be Removed: {e}")
                 library_status[library.name]["All Labels Deleted"] = str(datetime.now() - time_start).split('.')[0]
 
             time_start = datetime.now()
+            metrics.phase = "Mapping"
             temp_items = None
             list_key = None
             expired = None
-            if config.Cache:
+            if config.Cache and library.delta_sync:
+                temp_items, removed = library.sync_items()
+                for key in removed:
+                    library.cached_items.pop(key, None)
+            elif config.Cache:
                 list_key, expired = config.Cache.query_list_cache("library", library.mapping_name, 1)
                 if cache_libraries and list_key and expired is False:
                     logger.info(f"Library: {library.mapping_name} loaded from Cache")
@@ -503,20 +602,29 @@ def run_libraries(config):
                 logger.separator(f"Mapping {library.name} Library", space=False, border=False)
                 logger.info("")
                 library.map_guids(temp_items)
+                if config.Cache:
+                    config.Cache.flush()
             library_status[library.name]["Library Loading and Mapping"] = str(datetime.now() - time_start).split('.')[0]
 
             def run_operations_and_overlays():
                 if not test and not collection_only and not playlist_only and not config.requested_metadata_files:
                     if not overlays_only and library.library_operation:
+                        metrics.phase = "Operations"
                         library_status[library.name]["Library Operations"] = library.Operations.run_operations()
+                        if config.Cache:
+                            config.Cache.flush()
                     if not operations_only and (library.overlay_files or library.remove_overlays):
+                        metrics.phase = "Overlays"
                         library_status[library.name]["Library Overlays"] = library.Overlays.run_overlays()
+                        if config.Cache:
+                            config.Cache.flush()
 
             if library_first:
                 run_operations_and_overlays()
 
             if not operations_only and not overlays_only and not playlist_only:
                 time_start = datetime.now()
+                metrics.phase = "Collections"
                 for metadata in library.metadata_files:
                     metadata_name = metadata.get_file_name()
                     if config.requested_metadata_files and metadata_name not in config.requested_metadata_files:
@@ -552,6 +660,14 @@ def run_libraries(config):
             library.notify(e)
             logger.stacktrace()
             logger.critical(e)
+        finally:
+            library.flush_uploads()
+            library.flush_tag_edits()
+            if library.asset_index.scanned or library.asset_index.revalidated:
+                logger.debug(f"Asset Index: {library.asset_index.scanned} Directories Scanned, {library.asset_index.revalidated} Unchanged")
+            if config.Cache:
+                config.Cache.flush()
+            metrics.phase = "Other"
     return library_status
 
 def run_collection(config, library, metadata, requested_collections):
@@ -731,6 +847,8 @@ def run_collection(config, library, metadata, requested_collections):
             logger.error(f"Unknown Error: {e}")
             library.status[str(mapping_name)]["status"] = "Unknown Error"
             library.status[str(mapping_name)]["errors"].append(e)
+        if config.Cache:
+            config.Cache.flush()
         collection_run_time = str(datetime.now() - collection_start).split('.')[0]
         library.status[str(mapping_name)]["run_time"] = collection_run_time
         logger.info("")
@@ -740,6 +858,7 @@ def run_collection(config, library, metadata, requested_collections):
 def run_playlists(config):
     stats = {"created": 0, "modified": 0, "deleted": 0, "added": 0, "unchanged": 0, "removed": 0, "radarr": 0, "sonarr": 0, "names": []}
     status = {}
+    metrics.phase = "Playlists"
     logger.info("")
     logger.separator("Playlists")
     logger.info("")
@@ -917,10 +1036,80 @@ def run_playlists(config):
             logger.remove_playlist_handler(playlist_log_name)
     return status, stats
 
+def run_cache_tools():
+    logger.add_main_handler()
+    config_path = os.path.abspath(config_file) if config_file else os.path.join(default_dir, "config.yml")
+    try:
+        yaml = YAML(path=config_path)
+    except Failed as e:
+        logger.critical(e)
+        return
+    def get_expiration(data, default):
+        try:
+            return int(data["cache_expiration"]) if data and "cache_expiration" in data and data["cache_expiration"] else default
+        except (TypeError, ValueError):
+            return default
+    expiration = get_expiration(yaml.data.get("settings"), 60)
+    cache = Cache(config_path, expiration)
+
+    if import_cache:
+        logger.separator("Importing Cache")
+        logger.info("")
+        logger.info(f"Import File: {os.path.abspath(import_cache)}")
+        try:
+            imported = cache.import_cache(import_cache)
+            logger.info("")
+            logger.info(f"{'Table':<27} | {'Added':>8} | {'Updated':>8} | {'Skipped':>8} |")
+            logger.info(f"{logger.separating_character * 27} | {logger.separating_character * 8} | {logger.separating_character * 8} | {logger.separating_character * 8} |")
+            for table, amounts in imported.items():
+                logger.info(f"{table:<27} | {amounts['added']:>8} | {amounts['updated']:>8} | {amounts['skipped']:>8} |")
+        except (Failed, OSError) as e:
+            logger.error(e)
+        logger.info("")
+
+    if cache_maintenance:
+        logger.separator("Cache Maintenance")
+        logger.info("")
+        expirations = {}
+        for attr, tables in [("tmdb", ["tmdb_movie_data", "tmdb_show_data"]), ("omdb", ["omdb_data3"]), ("mdblist", ["mdb_data3"]), ("mal", ["mal_data"]), ("anidb", ["anidb_data"])]:
+            for table in tables:
+                expirations[table] = get_expiration(yaml.data.get(attr), 60)
+        libraries = [str(k) for k in yaml.data["libraries"]] if "libraries" in yaml.data and yaml.data["libraries"] else []
+        purged, dropped, size_before, size_after = cache.maintenance(libraries, expirations=expirations)
+        logger.info(f"{'Table':<27} | {'Purged':>8} |")
+        logger.info(f"{logger.separating_character * 27} | {logger.separating_character * 8} |")
+        for table, amount in purged.items():
+            logger.info(f"{table:<27} | {amount:>8} |")
+        logger.info("")
+        for library in dropped:
+            logger.info(f"Dropped Image Maps for Library: {library}")
+        logger.info(f"Cache Size: {size_before / 1048576:.2f} MB -> {size_after / 1048576:.2f} MB ({(size_before - size_after) / 1048576:.2f} MB Reclaimed)")
+        logger.info("")
+
+    if export_cache:
+        logger.separator("Exporting Cache")
+        logger.info("")
+        logger.info(f"Export File: {os.path.abspath(export_cache)}")
+        try:
+            exported = cache.export_cache(export_cache)
+            logger.info("")
+            logger.info(f"{'Table':<27} | {'Exported':>8} |")
+            logger.info(f"{logger.separating_character * 27} | {logger.separating_character * 8} |")
+            for table, amount in exported.items():
+                logger.info(f"{table:<27} | {amount:>8} |")
+        except OSError as e:
+            logger.error(e)
+        logger.info("")
+
+    cache.close()
+    logger.separator(f"Finished Cache Tools")
+
 if __name__ == "__main__":
     try:
         params = {"config_file": config_file, "ignore_schedules": ignore_schedules}
-        if run or test or collections or libraries or metadata_files or resume:
+        if cache_maintenance or export_cache or import_cache:
+            run_cache_tools()
+        elif run or test or collections or libraries or metadata_files or resume:
             params["collections"] = collections
             params["libraries"] = libraries
             params["metadata_files"] = metadata_files
@@ -938,8 +1127,16 @@ if __name__ == "__main__":
                         raise Failed(f"Argument Error: blank time argument")
             for time_to_run in valid_times:
                 schedule.every().day.at(time_to_run).do(process, params)
+            refreshed_for = None
+            refresh_future = None
             while True:
+                if refresh_future and datetime.now() >= refreshed_for - timedelta(minutes=15):
+                    refresh_future.cancel()
+                    refresh_future = None
                 schedule.run_pending()
+                if refresh_cache and refreshed_for != schedule.next_run() and schedule.idle_seconds() > 3600:
+                    refreshed_for = schedule.next_run()
+                    refresh_future = process_refresh({**params, "next_run": refreshed_for, "deadline": refreshed_for - timedelta(minutes=15)})
                 if not no_countdown:
                     current_time = datetime.now().strftime("%H:%M")
                     seconds = None